@@ -3,9 +3,10 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models.user_models import User
 from .models.group_models import Group
 from .models.thesis_models import Thesis
-from .models.document_models import Document
+from .models.document_models import Document, DocumentSnapshot
 from .models.schedule_models import DefenseSchedule
-from .models.notification_models import Notification
+from .models.notification_models import ArchivedNotification, Notification
+from .models.email_models import OutboundEmail
 
 class UserAdmin(BaseUserAdmin):
     list_display = ('email','first_name','last_name','role','is_staff','is_superuser')
@@ -37,6 +38,12 @@ class DocumentAdmin(admin.ModelAdmin):
     search_fields = ('thesis__title', 'uploaded_by__email')
     date_hierarchy = 'created_at'
 
+class DocumentSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('document', 'version', 'created_at')
+    list_filter = ('created_at',)
+    search_fields = ('document__thesis__title',)
+    date_hierarchy = 'created_at'
+
 class DefenseScheduleAdmin(admin.ModelAdmin):
     list_display = ('group', 'start_at', 'end_at', 'location', 'created_at')
     list_filter = ('start_at', 'created_at')
@@ -49,10 +56,25 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ('title', 'body', 'user__email')
     date_hierarchy = 'created_at'
 
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ('title', 'user', 'created_at', 'archived_at')
+    list_filter = ('created_at',)
+    search_fields = ('title', 'body', 'user__email')
+    date_hierarchy = 'created_at'
+
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to_email', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'to_email')
+    date_hierarchy = 'created_at'
+
 # Register models
 admin.site.register(User, UserAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Thesis, ThesisAdmin)
 admin.site.register(Document, DocumentAdmin)
+admin.site.register(DocumentSnapshot, DocumentSnapshotAdmin)
 admin.site.register(DefenseSchedule, DefenseScheduleAdmin)
 admin.site.register(Notification, NotificationAdmin)
+admin.site.register(ArchivedNotification, ArchivedNotificationAdmin)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
@@ -3,45 +3,235 @@ from channels.db import database_sync_to_async
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
 from .models import Document
+from .permissions.membership import GroupMembership
+from .utils.ot import OperationError, TextOperation, transform
+from .services.docs_write_buffer import acquire_format_buffer, release_format_buffer
+from .services.operation_log import (
+    claim_version, operation_log, operations_after, replay_document, seed_document,
+)
+from .utils.notifications import get_unread_count, notification_group_name
+from collections import Counter, deque
+from itertools import islice
+import asyncio
 import json
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
+
+class DocumentState:
+    """
+    Text of one document while it has editors connected to this process.
+
+    The operation log is the authority across workers: a version belongs to whichever
+    worker inserts its DocumentOperation row first. This state mirrors the log, is
+    fast-forwarded with operations other workers committed, and transforms client
+    operations sent against older versions past everything applied since.
+    A snapshot is taken every SNAPSHOT_INTERVAL versions and only the last
+    HISTORY_LIMIT operations are kept for transforming late-arriving edits.
+    """
+    SNAPSHOT_INTERVAL = 500
+    HISTORY_LIMIT = 5000
+
+    def __init__(self, text='', version=0):
+        self.text = text
+        self.version = version
+        self.history = deque()
+        self.history_start = version
+        self.snapshot_version = version
+        self.snapshot_text = text
+        self.editors = 0
+        # Held while a version is being claimed, so this process claims one at a time
+        self.lock = asyncio.Lock()
+
+    def length_at(self, version):
+        """Document length as of `version`"""
+        if version == self.version:
+            return len(self.text)
+        self.check_version(version)
+        return self.history[version - self.history_start].base_length
+
+    def check_version(self, version):
+        if (not isinstance(version, int) or isinstance(version, bool)
+                or not self.history_start <= version <= self.version):
+            raise OperationError(f'Version {version} is no longer available; resync from the snapshot')
+
+    def transform(self, operation, version):
+        """`operation`, sent against `version`, transformed past everything applied since"""
+        self.check_version(version)
+        for concurrent in islice(self.history, version - self.history_start, None):
+            operation = transform(operation, concurrent)[0]
+        return operation
+
+    def push(self, operation):
+        """Apply an operation made against the current version; returns the new version"""
+        self.text = operation.apply(self.text)
+        self.history.append(operation)
+        self.version += 1
+
+        # Snapshot on fixed versions so every worker mirroring the log takes the same ones
+        if self.version % self.SNAPSHOT_INTERVAL == 0:
+            self.snapshot_version, self.snapshot_text = self.version, self.text
+        while len(self.history) > self.HISTORY_LIMIT:
+            self.history.popleft()
+            self.history_start += 1
+        return self.version
+
+    def apply(self, operation, version):
+        """Transform `operation` from `version` to the head, apply it and return (operation, new_version)"""
+        operation = self.transform(operation, version)
+        return operation, self.push(operation)
+
+    def receive(self, ops, version):
+        """Fold in an operation committed elsewhere if it is the next version; returns whether it was"""
+        if version != self.version + 1:
+            return False
+        self.push(TextOperation(ops))
+        return True
+
+    def catch_up(self):
+        """The latest snapshot and the operations applied after it, for a joining editor"""
+        tail = islice(self.history, self.snapshot_version - self.history_start, None)
+        return {
+            'snapshot': {'version': self.snapshot_version, 'text': self.snapshot_text},
+            'operations': [operation.ops for operation in tail],
+            'version': self.version,
+        }
+
+
+class DocumentPresence:
+    """
+    Cursors and selections of the editors of one document connected to this process.
+
+    Updates are folded into the latest entry per user and sent to the document group
+    as one presence frame per TICK seconds instead of one broadcast per event. Frames
+    carry user ids only; names go out once, in user_joined and the joining editor's
+    document_state roster. The roster also holds editors connected to other workers,
+    learned from their user_joined broadcasts and user_present replies.
+    """
+    TICK = 0.05
+
+    def __init__(self, channel_layer, group_name):
+        self.channel_layer = channel_layer
+        self.group_name = group_name
+        self.users = {}
+        self.connections = Counter()
+        self.pending = {}
+        self.frames = 0
+        self._task = None
+
+    def join(self, user_info):
+        self.users[user_info['id']] = user_info
+        self.connections[user_info['id']] += 1
+
+    def leave(self, user_id):
+        """Drop one connection of `user_id`; returns True once nobody is left"""
+        self.connections[user_id] -= 1
+        if self.connections[user_id] <= 0:
+            del self.connections[user_id]
+            self.users.pop(user_id, None)
+            self.pending.pop(user_id, None)
+        if not self.connections and self._task:
+            self._task.cancel()
+        return not self.connections
+
+    def seen(self, user_info):
+        """Record an editor, possibly connected to another worker"""
+        self.users.setdefault(user_info['id'], user_info)
+
+    def gone(self, user_id):
+        """Forget an editor that left, unless it is still connected to this process"""
+        if user_id not in self.connections:
+            self.users.pop(user_id, None)
+
+    def roster(self):
+        return list(self.users.values())
+
+    def update(self, user_id, **fields):
+        """Record the user's latest cursor or selection for the next tick"""
+        self.pending.setdefault(user_id, {'id': user_id}).update(fields)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._tick())
+
+    async def _tick(self):
+        try:
+            await asyncio.sleep(self.TICK)
+            cursors, self.pending = list(self.pending.values()), {}
+            if cursors:
+                self.frames += 1
+                await self.channel_layer.group_send(self.group_name, {'type': 'presence', 'cursors': cursors})
+        finally:
+            self._task = None
+            # Updates that came in while the frame was being sent go out on the next tick
+            if self.pending and self.connections:
+                self._task = asyncio.ensure_future(self._tick())
+
+
+# Live document states and presence for this process, keyed by document id
+document_states = {}
+document_presence = {}
+# Tells broadcasts from this process apart from other workers'
+WORKER_ID = uuid.uuid4().hex
+
 class DocumentEditConsumer(AsyncWebsocketConsumer):
     """WebSocket consumer for real-time document collaboration"""
+    format_buffer = None
+    # Times an edit is re-transformed after losing its version to another worker
+    CLAIM_ATTEMPTS = 5
     
     async def connect(self):
         """Handle WebSocket connection"""
         self.document_id = self.scope['url_route']['kwargs']['document_id']
         self.document_group_name = f'doc_{self.document_id}'
         
+        # JWTAuthMiddleware resolves the user; anonymous sockets are refused
+        self.user = self.scope.get('user')
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4001)
+            return
+        # Same rule as IsDocumentOwnerOrGroupMember: only people who may open the document can edit it
+        if not await self.can_edit_document():
+            await self.close(code=4003)
+            return
+        self.user_info = {
+            'id': self.user.id,
+            'username': self.user.email,
+            'first_name': self.user.first_name,
+            'last_name': self.user.last_name
+        }
+        self.worker = WORKER_ID
+        
         # Join document group
         await self.channel_layer.group_add(
             self.document_group_name,
             self.channel_name
         )
         
-        # Store user info
-        self.user = self.scope.get('user')
-        if self.user and self.user.is_authenticated:
-            self.user_info = {
-                'id': self.user.id,
-                'username': self.user.username,
-                'first_name': self.user.first_name,
-                'last_name': self.user.last_name
-            }
-        else:
-            self.user_info = {'id': None, 'username': 'Anonymous'}
+        self.document_state = document_states.get(self.document_id)
+        if self.document_state is None:
+            # First editor in this process: resume from the persisted operation log
+            text, version = await self.load_document_history()
+            self.document_state = document_states.setdefault(self.document_id, DocumentState(text, version))
+        self.document_state.editors += 1
+        # Editors on other workers may have moved the document on since this process last heard
+        await self.sync_document_state()
+        self.document_presence = document_presence.get(self.document_id)
+        if self.document_presence is None:
+            self.document_presence = document_presence[self.document_id] = DocumentPresence(
+                self.channel_layer, self.document_group_name)
+        self.document_presence.join(self.user_info)
         
         await self.accept()
         
-        # Notify others that user joined
+        # Notify others that user joined; editors on other workers answer with user_present
         await self.channel_layer.group_send(
             self.document_group_name,
             {
                 'type': 'user_joined',
-                'user': self.user_info
+                'user': self.user_info,
+                'channel': self.channel_name,
+                'worker': self.worker
             }
         )
         
@@ -50,6 +240,20 @@ class DocumentEditConsumer(AsyncWebsocketConsumer):
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
+        if not hasattr(self, 'user_info'):
+            return
+        
+        # Persist this document's queued snapshots and drop its state once its last editor leaves
+        self.document_state.editors -= 1
+        if self.document_state.editors <= 0:
+            await operation_log.flush(self.document_id)
+            if self.document_state.editors <= 0:
+                document_states.pop(self.document_id, None)
+        if self.document_presence.leave(self.user.id):
+            document_presence.pop(self.document_id, None)
+        if self.format_buffer:
+            await release_format_buffer(self.document_id)
+        
         # Leave document group
         await self.channel_layer.group_discard(
             self.document_group_name,
@@ -61,7 +265,7 @@ class DocumentEditConsumer(AsyncWebsocketConsumer):
             self.document_group_name,
             {
                 'type': 'user_left',
-                'user': self.user_info
+                'user_id': self.user.id
             }
         )
     
@@ -86,64 +290,102 @@ class DocumentEditConsumer(AsyncWebsocketConsumer):
             logger.error(f"Error handling message: {e}")
     
     async def handle_text_change(self, data):
-        """Handle text editing changes"""
+        """Commit a text change to the operation log and broadcast the transformed operation"""
+        state = self.document_state
+        try:
+            async with state.lock:
+                version = data.get('version', state.version)
+                if isinstance(version, int) and version > state.version:
+                    # The client has seen versions committed on another worker
+                    await self.sync_document_state()
+                if data.get('ops') is not None:
+                    operation = TextOperation(data['ops'])
+                else:
+                    operation = TextOperation.from_change(
+                        data.get('operation'),  # insert, delete, replace
+                        data.get('position'),
+                        state.length_at(version),
+                        content=data.get('content', ''),
+                        length=data.get('length', 0),
+                    )
+                operation, version = await self.commit_operation(operation, version)
+                # Taken before the lock is released: other editors' operations may be applied after it
+                snapshot = state.snapshot_text if state.snapshot_version == version else None
+        except OperationError as e:
+            # The client can't be brought up to date incrementally; send it a fresh base
+            await self.send(text_data=json.dumps({'type': 'resync', 'error': str(e), **state.catch_up()}))
+            return
+        
         try:
             change_data = {
                 'type': 'text_change',
-                'user': self.user_info,
-                'operation': data.get('operation'),  # insert, delete, replace
-                'position': data.get('position'),
-                'content': data.get('content', ''),
-                'length': data.get('length', 0),
+                'user_id': self.user.id,
+                'sender': self.channel_name,
+                'ops': operation.ops,
+                'version': version,
                 'timestamp': data.get('timestamp')
             }
             
+            await self.send(text_data=json.dumps({'type': 'ack', 'version': version}))
+            
             # Broadcast to all users in document
             await self.channel_layer.group_send(
                 self.document_group_name,
                 change_data
             )
             
-            # Optionally save to database
-            await self.save_change_to_document(change_data)
+            if snapshot is not None:
+                operation_log.snapshot(self.document_id, version, snapshot)
             
         except Exception as e:
             logger.error(f"Error handling text change: {e}")
     
+    async def commit_operation(self, operation, version):
+        """
+        Transform `operation` to the head and claim the next version for it in the
+        operation log. When another worker claimed that version first, fast-forward
+        past its operations and try again. Called with the state's lock held.
+        """
+        state = self.document_state
+        for _ in range(self.CLAIM_ATTEMPTS):
+            transformed = state.transform(operation, version)
+            if await database_sync_to_async(claim_version)(
+                    self.document_id, state.version + 1, transformed.ops, self.user.id):
+                version = state.push(transformed)
+                self.shift_formatting(transformed)
+                return transformed, version
+            await self.sync_document_state()
+        raise OperationError('The document is changing too fast to apply this edit; resync and retry')
+    
+    async def sync_document_state(self):
+        """Fold in the operations other workers have committed since this process's version"""
+        state = self.document_state
+        for version, ops in await database_sync_to_async(operations_after)(self.document_id, state.version):
+            # A broadcast may have delivered some of these while the query ran
+            if version > state.version:
+                if not state.receive(ops, version):
+                    break
+                self.shift_formatting(TextOperation(ops))
+
+    def shift_formatting(self, operation):
+        """Move formatting still waiting to be written to Google Docs past a text edit just applied"""
+        if self.format_buffer:
+            self.format_buffer.transform(operation)
+    
     async def handle_cursor_position(self, data):
-        """Handle cursor position updates"""
-        cursor_data = {
-            'type': 'cursor_position',
-            'user': self.user_info,
-            'position': data.get('position'),
-            'timestamp': data.get('timestamp')
-        }
-        
-        await self.channel_layer.group_send(
-            self.document_group_name,
-            cursor_data
-        )
+        """Queue the cursor position for the document's next presence frame"""
+        self.document_presence.update(self.user.id, position=data.get('position'))
     
     async def handle_selection_change(self, data):
-        """Handle text selection changes"""
-        selection_data = {
-            'type': 'selection_change',
-            'user': self.user_info,
-            'start': data.get('start'),
-            'end': data.get('end'),
-            'timestamp': data.get('timestamp')
-        }
-        
-        await self.channel_layer.group_send(
-            self.document_group_name,
-            selection_data
-        )
+        """Queue the selection for the document's next presence frame"""
+        self.document_presence.update(self.user.id, selection={'start': data.get('start'), 'end': data.get('end')})
     
     async def handle_format_change(self, data):
         """Handle text formatting changes"""
         format_data = {
             'type': 'format_change',
-            'user': self.user_info,
+            'user_id': self.user.id,
+            'sender': self.channel_name,
             'start': data.get('start'),
             'end': data.get('end'),
             'format': data.get('format'),
@@ -155,11 +397,28 @@ class DocumentEditConsumer(AsyncWebsocketConsumer):
             format_data
         )
         
-        # Save formatting to Google Docs
-        await self.save_format_to_google_docs(format_data)
+        # Queue the formatting for the document's batched Google Docs write-back
+        if self.format_buffer and isinstance(format_data['format'], dict):
+            try:
+                await self.format_buffer.add(int(format_data['start']), int(format_data['end']),
+                                             format_data['format'])
+            except (TypeError, ValueError):
+                logger.error(f"Invalid format range: {format_data['start']}-{format_data['end']}")
     
     async def user_joined(self, event):
         """Handle user joined notification"""
+        self.document_presence.seen(event['user'])
+        if event['worker'] != self.worker:
+            # The joiner's process doesn't know this editor; tell it directly
+            await self.channel_layer.send(event['channel'], {'type': 'user_present', 'user': self.user_info})
+        await self.send(text_data=json.dumps({
+            'type': 'user_joined',
+            'user': event['user']
+        }))
+    
+    async def user_present(self, event):
+        """Add an editor connected to another worker to the roster and announce it like a join"""
+        self.document_presence.seen(event['user'])
         await self.send(text_data=json.dumps({
             'type': 'user_joined',
             'user': event['user']
@@ -167,85 +426,145 @@ class DocumentEditConsumer(AsyncWebsocketConsumer):
     
     async def user_left(self, event):
         """Handle user left notification"""
+        self.document_presence.gone(event['user_id'])
         await self.send(text_data=json.dumps({
             'type': 'user_left',
-            'user': event['user']
+            'user_id': event['user_id']
         }))
     
     async def text_change(self, event):
         """Handle text change broadcast"""
-        # Don't send back to sender
-        if event['user']['id'] != self.user_info['id']:
-            await self.send(text_data=json.dumps(event))
-    
-    async def cursor_position(self, event):
-        """Handle cursor position broadcast"""
-        # Don't send back to sender
-        if event['user']['id'] != self.user_info['id']:
-            await self.send(text_data=json.dumps(event))
-    
-    async def selection_change(self, event):
-        """Handle selection change broadcast"""
-        # Don't send back to sender
-        if event['user']['id'] != self.user_info['id']:
-            await self.send(text_data=json.dumps(event))
+        # Operations committed on another worker arrive here first; later ones are picked up by sync
+        if self.document_state.receive(event['ops'], event['version']):
+            self.shift_formatting(TextOperation(event['ops']))
+        # Don't send back to the connection it came from
+        if event['sender'] != self.channel_name:
+            await self.send(text_data=json.dumps({key: value for key, value in event.items() if key != 'sender'}))
+    
+    async def presence(self, event):
+        """Forward a presence frame without this user's own cursor"""
+        cursors = [cursor for cursor in event['cursors'] if cursor['id'] != self.user.id]
+        if cursors:
+            await self.send(text_data=json.dumps({'type': 'presence', 'cursors': cursors}))
     
     async def format_change(self, event):
         """Handle format change broadcast"""
-        # Don't send back to sender
-        if event['user']['id'] != self.user_info['id']:
-            await self.send(text_data=json.dumps(event))
+        # Don't send back to the connection it came from
+        if event['sender'] != self.channel_name:
+            await self.send(text_data=json.dumps({key: value for key, value in event.items() if key != 'sender'}))
     
-    @database_sync_to_async
-    def send_document_state(self):
+    async def send_document_state(self):
         """Send current document state to newly connected user"""
-        try:
-            document = Document.objects.get(id=self.document_id)
-            
-            # Send document metadata
-            import asyncio
-            asyncio.create_task(self.send(text_data=json.dumps({
+        state = await self.get_document_state()
+        if state and state['provider'] == 'google' and state['google_doc_url']:
+            from .services.google_docs_service import google_docs_service
+            google_doc_id = google_docs_service.extract_document_id_from_url(state['google_doc_url'])
+            if google_doc_id:
+                self.format_buffer = acquire_format_buffer(self.document_id, google_doc_id)
+        if state:
+            await self.send(text_data=json.dumps({
                 'type': 'document_state',
-                'document': {
-                    'id': document.id,
-                    'title': document.thesis.title if document.thesis else 'Untitled',
-                    'google_doc_url': document.google_doc_url,
-                    'provider': document.provider
-                }
-            })))
-            
+                'document': state,
+                'users': self.document_presence.roster(),
+                **self.document_state.catch_up()
+            }))
+    
+    @database_sync_to_async
+    def can_edit_document(self):
+        """Whether the user is an admin, the document's uploader or in its thesis's group"""
+        try:
+            document = Document.objects.select_related('thesis').get(id=self.document_id)
         except ObjectDoesNotExist:
-            logger.error(f"Document {self.document_id} not found")
-        except Exception as e:
-            logger.error(f"Error sending document state: {e}")
+            return False
+        if self.user.role == 'ADMIN' or document.uploaded_by_id == self.user.id:
+            return True
+        thesis = document.thesis
+        return bool(thesis) and thesis.group_id in GroupMembership.for_user(self.user)
     
     @database_sync_to_async
-    def save_change_to_document(self, change_data):
-        """Save changes to document (for conflict resolution)"""
+    def get_document_state(self):
+        """Load the document metadata sent to a newly connected user"""
         try:
-            # This could be implemented to save change history
-            # For now, we'll just log it
-            logger.info(f"Document change saved: {change_data}")
+            document = Document.objects.select_related('thesis').get(id=self.document_id)
+            return {
+                'id': document.id,
+                'title': document.thesis.title if document.thesis else 'Untitled',
+                'google_doc_url': document.google_doc_url,
+                'provider': document.provider
+            }
+        except ObjectDoesNotExist:
+            logger.error(f"Document {self.document_id} not found")
         except Exception as e:
-            logger.error(f"Error saving change: {e}")
+            logger.error(f"Error sending document state: {e}")
+        return None
     
     @database_sync_to_async
-    def save_format_to_google_docs(self, format_data):
-        """Save formatting changes to Google Docs"""
+    def load_document_history(self):
+        """Latest persisted (text, version) of the document, seeded from its Google Doc when it has none"""
         try:
-            from ..services.google_docs_service import google_docs_service
-            
-            document = Document.objects.get(id=self.document_id)
-            if document.google_doc_url and document.provider == 'google':
-                doc_id = google_docs_service.extract_document_id_from_url(document.google_doc_url)
-                if doc_id:
-                    # Apply formatting to Google Docs
-                    text_style = format_data.get('format', {})
-                    google_docs_service.format_text(
-                        doc_id, 
-                        format_data['start'], 
-                        format_data['end'], 
-                        text_style
-                    )
+            text, version, _ = replay_document(self.document_id)
+            if version == 0:
+                text = seed_document(self.document_id, self.initial_text)
+            return text, version
         except Exception as e:
-            logger.error(f"Error saving format to Google Docs: {e}")
+            logger.error(f"Error loading history of document {self.document_id}: {e}")
+        return '', 0
+    
+    def initial_text(self):
+        """The Google Doc's current text, or '' when the document has none that can be read"""
+        url = Document.objects.filter(id=self.document_id).values_list('google_doc_url', flat=True).first()
+        if not url:
+            return ''
+        from .services.google_docs_service import google_docs_service
+        google_doc_id = google_docs_service.extract_document_id_from_url(url)
+        text = google_docs_service.get_document_text(google_doc_id) if google_doc_id else None
+        if text is None:
+            logger.warning(f"Could not read the Google Doc of document {self.document_id}; starting it empty")
+            return ''
+        return text
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Per-user stream of new notifications and unread counts, so clients don't have to
+    poll NotificationViewSet. Publishing happens in api.utils.notifications.
+    """
+    
+    async def connect(self):
+        self.user = self.scope.get('user')
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4001)
+            return
+        # Keyed on the authenticated user, not on a resource from the URL, so no further check
+        self.group_name = notification_group_name(self.user.id)
+        
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        
+        # Start the client off with its badge count
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'unread_count': await database_sync_to_async(get_unread_count)(self.user.id)
+        }))
+    
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+    
+    async def notification_created(self, event):
+        """Forward a new notification, with the unread count after it when known"""
+        unread_count = event['unread_count']
+        if unread_count is None:
+            unread_count = await database_sync_to_async(get_unread_count)(self.user.id)
+        await self.send(text_data=json.dumps({
+            'type': 'notification',
+            'notification': event['notification'],
+            'unread_count': unread_count
+        }))
+    
+    async def unread_count(self, event):
+        """Forward a changed unread count, e.g. after notifications were read in another tab"""
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'unread_count': event['unread_count']
+        }))
@@ -0,0 +1,32 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from api.services.notification_retention import archive_notifications
+
+
+class Command(BaseCommand):
+    help = 'Move read notifications past the retention period into the archive table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Archive read notifications older than this many days')
+        parser.add_argument('--batch-size', type=int, help='Rows moved per transaction')
+        parser.add_argument('--interval', type=float,
+                            help='Keep running, archiving again every this many seconds')
+
+    def handle(self, *args, **options):
+        def run():
+            moved = archive_notifications(days=options['days'], batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Archived {moved} notifications'))
+
+        if not options['interval']:
+            run()
+            return
+
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+        while not stop.is_set():
+            run()
+            stop.wait(options['interval'])
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from api.services.google_drive_service import GoogleDriveService
+
+class Command(BaseCommand):
+    help = 'Authorize Google Drive access in a browser and save google_token.json (development only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8081, help='Port for the local OAuth redirect server')
+
+    def handle(self, *args, **options):
+        GoogleDriveService.authorize_interactively(port=options['port'])
+        self.stdout.write(self.style.SUCCESS('Saved Google Drive token'))
@@ -0,0 +1,31 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from api.services.drive_uploads import fail_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Mark Drive uploads left PENDING by a restarted or crashed worker as FAILED'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, help='Fail uploads still pending after this many minutes')
+        parser.add_argument('--interval', type=float,
+                            help='Keep running, checking again every this many seconds')
+
+    def handle(self, *args, **options):
+        def run():
+            failed = fail_stale_uploads(minutes=options['minutes'])
+            self.stdout.write(self.style.SUCCESS(f'Marked {failed} stale uploads as failed'))
+
+        if not options['interval']:
+            run()
+            return
+
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+        while not stop.is_set():
+            run()
+            stop.wait(options['interval'])
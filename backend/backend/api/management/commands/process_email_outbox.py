@@ -0,0 +1,35 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from api.services.email_outbox import OutboxWorker
+
+
+class Command(BaseCommand):
+    help = 'Send the emails waiting in the outbox, retrying failures, until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send what is due now and exit')
+        parser.add_argument('--concurrency', type=int, help='Number of sending threads')
+        parser.add_argument('--rate', type=float, help='Maximum emails sent per second')
+        parser.add_argument('--poll-interval', type=float, default=5,
+                            help='Seconds to wait between checks while the outbox is empty')
+
+    def handle(self, *args, **options):
+        worker = OutboxWorker(concurrency=options['concurrency'], rate_limit=options['rate'])
+        try:
+            if options['once']:
+                total = 0
+                while claimed := worker.run_once():
+                    total += claimed
+                self.stdout.write(self.style.SUCCESS(f'Processed {total} emails'))
+                return
+
+            stop = threading.Event()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: stop.set())
+            self.stdout.write('Processing email outbox...')
+            worker.run(stop, poll_interval=options['poll_interval'])
+        finally:
+            worker.close()
@@ -0,0 +1,44 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    """Validate a simplejwt access token and return its user, or AnonymousUser"""
+    authentication = JWTAuthentication()
+    try:
+        validated = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated)
+    except (InvalidToken, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Populate scope['user'] for WebSocket connections from a simplejwt access token.
+    Browsers can't set headers on a WebSocket handshake, so the token is read from
+    the `token` query parameter, falling back to an `Authorization: Bearer` header.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token = self.get_raw_token(scope)
+        scope['user'] = await get_user_for_token(raw_token) if raw_token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
+
+    @staticmethod
+    def get_raw_token(scope):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        if query.get('token'):
+            return query['token'][0]
+        for name, value in scope.get('headers', []):
+            if name == b'authorization':
+                parts = value.decode().split()
+                if len(parts) == 2 and parts[0] == 'Bearer':
+                    return parts[1]
+        return None
@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_alter_defenseschedule_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='defenseschedule',
+            index=models.Index(fields=['start_at', 'end_at'], name='schedule_start_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['status', 'created_at'], name='group_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thesis',
+            index=models.Index(fields=['status', 'created_at'], name='thesis_status_created_idx'),
+        ),
+    ]
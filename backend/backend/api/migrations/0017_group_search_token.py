@@ -0,0 +1,27 @@
+# Generated by Django 5.0 on 2026-10-18 02:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(max_length=32)),
+                ('token', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='api.group')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token', 'field'], name='group_search_token_idx')],
+            },
+        ),
+    ]
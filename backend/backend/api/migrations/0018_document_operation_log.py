@@ -0,0 +1,50 @@
+# Generated by Django 5.0 on 2026-10-18 03:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_group_search_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('ops', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='operations', to='api.document')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['document', 'version'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DocumentSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField()),
+                ('text', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='api.document')),
+            ],
+            options={
+                'ordering': ['document', 'version'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='documentoperation',
+            constraint=models.UniqueConstraint(fields=('document', 'version'), name='unique_document_operation_version'),
+        ),
+        migrations.AddConstraint(
+            model_name='documentsnapshot',
+            constraint=models.UniqueConstraint(fields=('document', 'version'), name='unique_document_snapshot_version'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-18 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_document_operation_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='READY', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='upload_error',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0 on 2026-10-18 03:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_document_upload_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThesisDriveFolder',
+            fields=[
+                ('thesis', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='drive_folder', serialize=False, to='api.thesis')),
+                ('folder_id', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
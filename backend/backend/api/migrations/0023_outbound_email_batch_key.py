@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_notification_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='batch_key',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
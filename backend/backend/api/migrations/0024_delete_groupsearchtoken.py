@@ -0,0 +1,16 @@
+# Generated by Django 5.0 on 2026-10-18 05:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_outbound_email_batch_key'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='GroupSearchToken',
+        ),
+    ]
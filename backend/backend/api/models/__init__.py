@@ -1,6 +1,7 @@
 from .user_models import User
 from .group_models import Group
 from .thesis_models import Thesis
-from .document_models import Document
+from .document_models import Document, DocumentOperation, DocumentSnapshot, ThesisDriveFolder
 from .schedule_models import DefenseSchedule
-from .notification_models import Notification
+from .notification_models import ArchivedNotification, Notification
+from .email_models import OutboundEmail
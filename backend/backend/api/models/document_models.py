@@ -3,6 +3,11 @@ from .thesis_models import Thesis
 from .user_models import User
 
 class Document(models.Model):
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),  # Drive upload queued or in progress
+        ('READY', 'Ready'),
+        ('FAILED', 'Failed'),    # Drive upload gave up; see upload_error
+    )
     thesis = models.ForeignKey(Thesis, on_delete=models.CASCADE, related_name='documents')
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     file = models.FileField(upload_to='documents/', blank=True, null=True)
@@ -12,6 +17,8 @@ class Document(models.Model):
     provider = models.CharField(max_length=32, blank=True)
     file_size = models.BigIntegerField(blank=True, null=True)
     mime_type = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='READY')
+    upload_error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def embed_url(self):
@@ -40,3 +47,39 @@ class Document(models.Model):
                 self.file_size /= 1024
             return f"{self.file_size:.1f} TB"
         return "Unknown"
+
+
+class DocumentOperation(models.Model):
+    """One operation of a document's collaborative edit history; `version` is the version it produced"""
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='operations')
+    version = models.PositiveIntegerField()
+    ops = models.JSONField()
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['document', 'version']
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'version'], name='unique_document_operation_version'),
+        ]
+
+
+class DocumentSnapshot(models.Model):
+    """Full text of a document at `version`, the starting point for replaying its operation log"""
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='snapshots')
+    version = models.PositiveIntegerField()
+    text = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['document', 'version']
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'version'], name='unique_document_snapshot_version'),
+        ]
+
+
+class ThesisDriveFolder(models.Model):
+    """The Google Drive folder a thesis's Drive uploads go into"""
+    thesis = models.OneToOneField(Thesis, on_delete=models.CASCADE, primary_key=True, related_name='drive_folder')
+    folder_id = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,36 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboundEmail(models.Model):
+    """
+    An email waiting in the outbox. Rows are written in the transaction of the
+    change that causes them and sent afterwards by `manage.py process_email_outbox`.
+    """
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),  # Claimed by a worker until next_attempt_at
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),    # Gave up after the last retry; see last_error
+    )
+    sender = models.CharField(max_length=255)
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    html = models.TextField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    provider_id = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Emails queued together with the same key go out in one batch request
+    batch_key = models.CharField(max_length=32, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.to_email} ({self.status})'
@@ -1,6 +1,8 @@
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.db.models import Q
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
 from .user_models import User
 
 class GroupManager(models.Manager):
@@ -46,6 +48,21 @@ class GroupManager(models.Manager):
             Q(abstract__icontains=query)
         )
 
+    def students_in_other_groups(self, members, exclude_id=None):
+        """
+        Return the emails of the students among `members` who already belong to a
+        group other than `exclude_id`, in a single query. `members` may be users,
+        user ids or a queryset of user ids.
+        """
+        if not isinstance(members, models.QuerySet):
+            members = [getattr(member, 'pk', member) for member in members]
+            if not members:
+                return []
+        taken = Group.members.through.objects.filter(user_id__in=members, user__role='STUDENT')
+        if exclude_id is not None:
+            taken = taken.exclude(group_id=exclude_id)
+        return list(taken.values_list('user__email', flat=True).distinct())
+
 class Group(models.Model):
     STATUS_CHOICES = (
         ('PENDING', 'Pending'),
@@ -67,21 +84,29 @@ class Group(models.Model):
     panels = models.ManyToManyField(User, related_name='panel_groups', blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='group_status_created_idx'),
+        ]
+
     def __str__(self):
         return self.name
     
+    # Set by the members m2m_changed receiver below; membership only changes through the M2M
+    _membership_changed = False
+
     def clean(self):
         # Check if any student members are already in another group
-        if self.pk:  # Only check during updates, not during initial creation
-            for member in self.members.all():
-                if member.role == 'STUDENT':
-                    existing_groups = Group.objects.filter(members=member).exclude(id=self.pk).exists()
-                    if existing_groups:
-                        raise ValidationError(f"Student {member.email} is already a member of another group")
+        if self.pk and self._membership_changed:  # Only check during updates that touched members
+            member_ids = Group.members.through.objects.filter(group_id=self.pk).values('user_id')
+            taken = Group.objects.students_in_other_groups(member_ids, exclude_id=self.pk)
+            if taken:
+                raise ValidationError(f"Student {taken[0]} is already a member of another group")
     
     def save(self, *args, **kwargs):
         self.full_clean()
         super().save(*args, **kwargs)
+        self._membership_changed = False
     
     def get_keywords_list(self):
         """Return keywords as a list"""
@@ -102,3 +127,10 @@ class Group(models.Model):
     def set_topics_from_list(self, topics_list):
         """Set proposed topic titles from a list"""
         self.proposed_topic_title = '\n'.join(topics_list)
+
+
+@receiver(m2m_changed, sender=Group.members.through)
+def track_membership_change(sender, instance, action, reverse, **kwargs):
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        instance._membership_changed = True
+
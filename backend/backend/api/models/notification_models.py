@@ -11,3 +11,28 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notif_user_read_created_idx'),
+            # For the retention job's scan of old read notifications
+            models.Index(fields=['is_read', 'created_at'], name='notif_read_created_idx'),
+        ]
+
+
+class ArchivedNotification(models.Model):
+    """
+    A read notification moved out of Notification by the retention job
+    (`manage.py archive_notifications`). It keeps its original id.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_notifications')
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    link = models.CharField(max_length=512, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='archived_notif_user_idx'),
+        ]
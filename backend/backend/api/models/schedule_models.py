@@ -1,3 +1,4 @@
+import heapq
 from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from .group_models import Group
@@ -24,6 +25,9 @@ class DefenseSchedule(models.Model):
 
     class Meta:
         ordering = ['start_at']
+        indexes = [
+            models.Index(fields=['start_at', 'end_at'], name='schedule_start_end_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(start_at__lt=models.F('end_at')),
@@ -54,23 +58,39 @@ class DefenseSchedule(models.Model):
 
     @staticmethod
     def check_conflicts(group, start_at, end_at, exclude_id=None):
-        from django.db.models import Q
-        adviser = group.adviser
-        panels = group.panels.all()
+        """Find overlapping schedules sharing the group's adviser or a panelist in one query"""
+        personnel = models.Q()
+        if group.adviser_id:
+            personnel |= models.Q(group__adviser_id=group.adviser_id)
+        if group.pk:
+            panel_ids = Group.panels.through.objects.filter(group_id=group.pk).values('user_id')
+            personnel |= models.Q(group__panels__in=panel_ids)
+
+        if not personnel:
+            return []
 
         overlapping = DefenseSchedule.objects.filter(
-            Q(start_at__lt=end_at) & Q(end_at__gt=start_at)
-        )
+            start_at__lt=end_at, end_at__gt=start_at
+        ).filter(personnel)
 
         if exclude_id:
             overlapping = overlapping.exclude(id=exclude_id)
 
-        conflicts = []
-        for schedule in overlapping:
-            if (schedule.group.adviser == adviser or
-                    schedule.group.panels.filter(id__in=panels.values_list('id', flat=True)).exists()):
-                conflicts.append(schedule)
-        return conflicts
+        return list(overlapping.select_related('group').distinct())
+
+    @staticmethod
+    def find_overlaps(schedules):
+        """Sweep schedules ordered by start_at and map each schedule id to the schedules overlapping it"""
+        overlaps = {schedule.id: [] for schedule in schedules}
+        active = []
+        for schedule in sorted(schedules, key=lambda s: (s.start_at, s.id)):
+            while active and active[0][0] <= schedule.start_at:
+                heapq.heappop(active)
+            for _, _, other in active:
+                overlaps[other.id].append(schedule)
+                overlaps[schedule.id].append(other)
+            heapq.heappush(active, (schedule.end_at, schedule.id, schedule))
+        return overlaps
 
     @staticmethod
     def validate_schedule_availability(group, start_at, end_at, exclude_id=None):
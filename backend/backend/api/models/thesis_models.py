@@ -40,6 +40,11 @@ class Thesis(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='thesis_status_created_idx'),
+        ]
+
     def submit(self):
         self.status = 'CONCEPT_SUBMITTED'
         self.save()
@@ -0,0 +1,26 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination. Each subclass orders by an indexed column
+    plus `id`, so fetching the next page is a range scan instead of an OFFSET.
+    Clients may ask for a smaller or larger page with `page_size`, up to
+    MAX_PAGE_SIZE.
+    """
+    ordering = ('id',)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'MAX_PAGE_SIZE', 500)
+
+
+class CreatedAtPagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+
+
+class NewestFirstPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class StartAtPagination(KeysetPagination):
+    ordering = ('start_at', 'id')
@@ -0,0 +1,47 @@
+from django.db.models import CharField, Value
+from api.models.group_models import Group
+
+
+class GroupMembership:
+    """The ids of the groups a user belongs to, split by how they belong"""
+
+    def __init__(self, member=(), advised=(), panel=()):
+        self.member = frozenset(member)
+        self.advised = frozenset(advised)
+        self.panel = frozenset(panel)
+        self.group_ids = self.member | self.advised | self.panel
+
+    def __contains__(self, group_id):
+        return group_id in self.group_ids
+
+    @classmethod
+    def for_user(cls, user):
+        """Load every group the user is a member, adviser or panelist of in one UNION query"""
+        if not user or not user.is_authenticated:
+            return cls()
+
+        def tagged(queryset, id_field, relation):
+            return queryset.annotate(
+                relation=Value(relation, output_field=CharField())
+            ).values_list(id_field, 'relation')
+
+        rows = tagged(Group.members.through.objects.filter(user_id=user.pk), 'group_id', 'member').union(
+            tagged(Group.panels.through.objects.filter(user_id=user.pk), 'group_id', 'panel'),
+            tagged(Group.objects.filter(adviser_id=user.pk), 'id', 'advised'),
+            all=True,
+        )
+
+        groups = {'member': set(), 'advised': set(), 'panel': set()}
+        for group_id, relation in rows:
+            groups[relation].add(group_id)
+        return cls(**groups)
+
+
+def get_group_membership(request):
+    """Resolve the user's group membership once per request and reuse it for every check"""
+    http_request = getattr(request, '_request', request)
+    membership = getattr(http_request, '_group_membership', None)
+    if membership is None:
+        membership = GroupMembership.for_user(request.user)
+        http_request._group_membership = membership
+    return membership
@@ -2,6 +2,7 @@ from rest_framework import permissions
 from api.models.group_models import Group
 from api.models.thesis_models import Thesis
 from api.models.schedule_models import DefenseSchedule
+from api.permissions.membership import get_group_membership
 
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -54,18 +55,14 @@ class IsGroupMemberOrAdmin(permissions.BasePermission):
             return True
             
         # Check if user is group member, adviser, or panel
-        if hasattr(obj, 'group'):
-            group = obj.group
+        if hasattr(obj, 'group_id'):
+            group_id = obj.group_id
         elif isinstance(obj, Group):
-            group = obj
+            group_id = obj.pk
         else:
             return False
             
-        return (
-            request.user in group.members.all() or
-            request.user == group.adviser or
-            request.user in group.panels.all()
-        )
+        return group_id in get_group_membership(request)
 
 class IsAdviserOrPanelForSchedule(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -82,15 +79,14 @@ class IsAdviserOrPanelForSchedule(permissions.BasePermission):
         if request.user.role == 'ADMIN':
             return True
             
+        membership = get_group_membership(request)
+
         # Students can view schedules for their own group
         if request.user.role == 'STUDENT':
-            return request.user in obj.group.members.all()
+            return obj.group_id in membership.member
             
         # Check if user is the adviser or panel member for this schedule
-        return (
-            request.user == obj.group.adviser or
-            request.user in obj.group.panels.all()
-        )
+        return obj.group_id in membership.advised or obj.group_id in membership.panel
 
 class IsStudentOrAdviserForThesis(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -115,11 +111,11 @@ class IsStudentOrAdviserForThesis(permissions.BasePermission):
             
             # Advisers can view theses of their groups
             if request.user.role == 'ADVISER':
-                return request.user == obj.group.adviser
+                return obj.group_id in get_group_membership(request).advised
             
             # Panel members can view theses of groups they're assigned to
             if request.user.role == 'PANEL':
-                return request.user in obj.group.panels.all()
+                return obj.group_id in get_group_membership(request).panel
             
         # For write operations, be more restrictive
         # Students can only modify their own theses
@@ -128,7 +124,7 @@ class IsStudentOrAdviserForThesis(permissions.BasePermission):
             
         # Advisers can modify theses of their groups
         if request.user.role == 'ADVISER':
-            return request.user == obj.group.adviser
+            return obj.group_id in get_group_membership(request).advised
             
         return False
 
@@ -145,19 +141,15 @@ class IsAdviserForGroup(permissions.BasePermission):
             return True
             
         # Check if user is the adviser for this group
-        if hasattr(obj, 'group'):
-            group = obj.group
+        if hasattr(obj, 'group_id'):
+            group_id = obj.group_id
         elif isinstance(obj, Group):
-            group = obj
+            group_id = obj.pk
         else:
             return False
             
         # Allow adviser, panel members, and student members
-        return (
-            request.user == group.adviser or
-            request.user in group.panels.all() or
-            request.user in group.members.all()
-        )
+        return group_id in get_group_membership(request)
 
 class CanManageNotifications(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -183,12 +175,7 @@ class IsDocumentOwnerOrGroupMember(permissions.BasePermission):
         # Group members can view documents
         thesis = obj.thesis
         if thesis:
-            group = thesis.group
-            return (
-                request.user in group.members.all() or
-                request.user == group.adviser or
-                request.user in group.panels.all()
-            )
+            return thesis.group_id in get_group_membership(request)
             
         return False
 
@@ -214,4 +201,4 @@ class IsAdviserOrReadOnly(permissions.BasePermission):
         if request.user.role == 'ADMIN':
             return True
             
-        return request.user == obj.group.adviser if hasattr(obj, 'group') else False
+        return obj.group_id in get_group_membership(request).advised if hasattr(obj, 'group_id') else False
@@ -11,12 +11,13 @@ class DocumentSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'thesis', 'uploaded_by', 'file', 'google_doc_url', 
             'google_drive_file_id', 'google_drive_embed_url', 'provider',
-            'file_size', 'mime_type', 'created_at', 'embed_url', 
-            'file_url', 'file_size_display'
+            'file_size', 'mime_type', 'status', 'upload_error', 'created_at',
+            'embed_url', 'file_url', 'file_size_display'
         )
         read_only_fields = (
             'uploaded_by', 'created_at', 'embed_url', 'file_url', 
-            'file_size_display', 'google_drive_file_id', 'google_drive_embed_url'
+            'file_size_display', 'google_drive_file_id', 'google_drive_embed_url',
+            'status', 'upload_error'
         )
     
     def get_embed_url(self, obj):
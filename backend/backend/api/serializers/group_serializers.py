@@ -1,3 +1,7 @@
+from collections import defaultdict, deque
+from collections.abc import Mapping
+from django.db import connection, transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 from api.models.group_models import Group
 from api.models.user_models import User
@@ -9,20 +13,126 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('id', 'email', 'first_name', 'last_name', 'role')
 
 
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves ids from the users its root serializer loaded up front, querying only on a miss"""
+
+    def to_internal_value(self, data):
+        name = self.parent.field_name if isinstance(self.parent, serializers.ManyRelatedField) else self.field_name
+        prefetched = getattr(self.root, 'prefetched_relations', {}).get(name, {})
+        if not isinstance(data, bool):
+            try:
+                return prefetched[int(data)]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return super().to_internal_value(data)
+
+
+def prefetch_relations(serializer, items):
+    """Load every user the payload items reference with one query per relation field"""
+    prefetched = {}
+    for name, field in serializer.fields.items():
+        relation = getattr(field, 'child_relation', field)
+        if not isinstance(relation, PrefetchedPrimaryKeyRelatedField):
+            continue
+        ids = set()
+        for item in items:
+            if not isinstance(item, Mapping):
+                continue
+            value = item.getlist(name) if hasattr(item, 'getlist') else item.get(name)
+            for pk in value if isinstance(value, list) else [value]:
+                if type(pk) is int or (isinstance(pk, str) and pk.isdigit()):
+                    ids.add(int(pk))
+        if ids:
+            prefetched[name] = relation.get_queryset().in_bulk(ids)
+    return prefetched
+
+
+class GroupListSerializer(serializers.ListSerializer):
+    """Validates and creates a batch of groups in a bounded number of queries"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.prefetched_relations = prefetch_relations(self.child, data)
+        return super().to_internal_value(data)
+
+    def validate(self, attrs):
+        seen = set()
+        proposed = []
+        for item in attrs:
+            for member in item.get('members', []):
+                if member.role != 'STUDENT':
+                    continue
+                if member.pk in seen:
+                    raise serializers.ValidationError(f"Student {member.email} is proposed for more than one group")
+                seen.add(member.pk)
+                proposed.append(member)
+
+        taken = Group.objects.students_in_other_groups(proposed)
+        if taken:
+            raise serializers.ValidationError(f"Student {taken[0]} is already a member of another group")
+        return attrs
+
+    def create(self, validated_data):
+        request = self.context.get('request')
+        groups, member_sets, panel_sets = [], [], []
+        for validated in validated_data:
+            validated = dict(validated)
+            if 'leader' not in validated:
+                validated['leader'] = request.user
+            members = list(validated.pop('members', []))
+            panels = list(validated.pop('panels', []))
+            leader = validated['leader']
+            if leader and leader not in members:
+                members.append(leader)
+            groups.append(Group(**validated))
+            member_sets.append(members)
+            panel_sets.append(panels)
+
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                Group.objects.bulk_create(groups)
+            else:
+                # Without RETURNING (MySQL) read the new ids back by name and leader. Rows past
+                # the highest id seen in this transaction are new, and an INSERT numbers its
+                # rows in order, so groups sharing a name and leader get theirs in turn
+                last_id = Group.objects.order_by('-id').values_list('id', flat=True).first() or 0
+                Group.objects.bulk_create(groups)
+                new_ids = defaultdict(deque)
+                created = Group.objects.filter(id__gt=last_id).order_by('id')
+                for pk, name, leader_id in created.values_list('id', 'name', 'leader_id'):
+                    new_ids[name, leader_id].append(pk)
+                for group in groups:
+                    group.pk = new_ids[group.name, group.leader_id].popleft()
+
+            Members = Group.members.through
+            Panels = Group.panels.through
+            Members.objects.bulk_create([
+                Members(group_id=group.pk, user_id=user.pk)
+                for group, users in zip(groups, member_sets) for user in users
+            ], batch_size=1000)
+            Panels.objects.bulk_create([
+                Panels(group_id=group.pk, user_id=user.pk)
+                for group, users in zip(groups, panel_sets) for user in users
+            ], batch_size=1000)
+
+        prefetch_related_objects(groups, *self.child.related_prefetches())
+        return groups
+
+
 class GroupSerializer(serializers.ModelSerializer):
     members = UserSerializer(many=True, read_only=True)
     adviser = UserSerializer(read_only=True, allow_null=True)
     panels = UserSerializer(many=True, read_only=True)
 
     # Write-only fields for updates
-    member_ids = serializers.PrimaryKeyRelatedField(
+    member_ids = PrefetchedPrimaryKeyRelatedField(
         many=True,
         queryset=User.objects.all(),
         write_only=True,
         required=False,
         source='members'
     )
-    adviser_id = serializers.PrimaryKeyRelatedField(
+    adviser_id = PrefetchedPrimaryKeyRelatedField(
         queryset=User.objects.filter(role='ADVISER'),
         write_only=True,
         allow_null=True,
@@ -30,7 +140,7 @@ class GroupSerializer(serializers.ModelSerializer):
         source='adviser'
     )
 
-    leader_id = serializers.PrimaryKeyRelatedField(
+    leader_id = PrefetchedPrimaryKeyRelatedField(
         queryset=User.objects.filter(role='STUDENT'),
         write_only=True,
         required=False,
@@ -38,7 +148,7 @@ class GroupSerializer(serializers.ModelSerializer):
         source='leader'
     )
 
-    panel_ids = serializers.PrimaryKeyRelatedField(
+    panel_ids = PrefetchedPrimaryKeyRelatedField(
         many=True,
         queryset=User.objects.filter(role='PANEL'),
         write_only=True,
@@ -46,11 +156,30 @@ class GroupSerializer(serializers.ModelSerializer):
         source='panels'
     )
 
+    @staticmethod
+    def related_prefetches():
+        """Prefetch members and panels, fetching only the columns UserSerializer renders"""
+        return [
+            Prefetch('members', queryset=User.objects.only(*UserSerializer.Meta.fields)),
+            Prefetch('panels', queryset=User.objects.only(*UserSerializer.Meta.fields)),
+        ]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Load everything the serializer reads in a fixed number of queries"""
+        return queryset.select_related('adviser', 'leader').prefetch_related(*cls.related_prefetches())
+
     class Meta:
         model = Group
         fields = ('id', 'name', 'leader_id', 'status', 'proposed_topic_title', 'abstract', 'keywords',
                   'rejection_reason', 'leader',
                   'members', 'adviser', 'panels', 'member_ids', 'adviser_id', 'panel_ids', 'created_at')
+        list_serializer_class = GroupListSerializer
+
+    def to_internal_value(self, data):
+        if not isinstance(self.parent, GroupListSerializer):
+            self.prefetched_relations = prefetch_relations(self, [data])
+        return super().to_internal_value(data)
 
     def validate(self, attrs):
         members = attrs.get('members', [])
@@ -60,15 +189,16 @@ class GroupSerializer(serializers.ModelSerializer):
         if self.partial and 'members' not in attrs and self.instance:
             members = list(self.instance.members.all())
 
-        # Check if any student members are already in another group
-        for member in members:
-            if member.role == 'STUDENT':
-                existing_groups = Group.objects.filter(members=member)
-                # Exclude current group if updating
-                if self.instance:
-                    existing_groups = existing_groups.exclude(id=self.instance.id)
-                if existing_groups.exists():
-                    raise serializers.ValidationError(f"Student {member.email} is already a member of another group")
+        # Check if any student members are already in another group. Unchanged
+        # membership needs no check, and a batch create checks every group's
+        # members at once in GroupListSerializer
+        if 'members' in attrs and not isinstance(self.parent, GroupListSerializer):
+            students = [member for member in members if member.role == 'STUDENT']
+            taken = Group.objects.students_in_other_groups(
+                students, exclude_id=self.instance.id if self.instance else None
+            )
+            if taken:
+                raise serializers.ValidationError(f"Student {taken[0]} is already a member of another group")
 
         if leader and leader not in members:
             members.append(leader)
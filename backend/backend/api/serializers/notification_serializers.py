@@ -1,8 +1,14 @@
 from rest_framework import serializers
-from api.models.notification_models import Notification
+from api.models.notification_models import ArchivedNotification, Notification
 
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ('id','user','title','body','link','is_read','created_at')
         read_only_fields = ('created_at',)
+
+class ArchivedNotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedNotification
+        fields = ('id','user','title','body','link','created_at','archived_at')
+        read_only_fields = fields
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import cache
+
+HITS_KEY = 'gdoc_content:hits'
+MISSES_KEY = 'gdoc_content:misses'
+
+
+def revision_key(document_id):
+    return f'gdoc_content:{document_id}:revision'
+
+
+def content_key(document_id, revision_id):
+    return f'gdoc_content:{document_id}:{revision_id}'
+
+
+class DocsContentCache:
+    """
+    Google Docs content keyed by document and revision id.
+
+    A document's latest known revision is stored under its own key, which points at
+    the content stored for that revision. Writes made through this app drop the
+    pointer, so the next read fetches the new revision; edits made directly in
+    Google Docs show up once the pointer expires after `timeout` seconds.
+    Hits and misses are counted in the default cache. That cache is shared by every
+    process only when REDIS_URL is set; without it each process keeps its own
+    content and its own ratio.
+    """
+
+    def __init__(self, timeout=None):
+        self._timeout = timeout
+
+    @property
+    def timeout(self):
+        return self._timeout if self._timeout is not None else settings.GOOGLE_DOCS_CONTENT_CACHE_TIMEOUT
+
+    def revision(self, document_id):
+        """The cached revision id of a document, or None"""
+        return cache.get(revision_key(document_id))
+
+    def get(self, document_id):
+        """The cached content of a document's latest known revision, or None"""
+        revision_id = self.revision(document_id)
+        content = cache.get(content_key(document_id, revision_id)) if revision_id else None
+        self.record(content is not None)
+        return content
+
+    def set(self, document_id, content):
+        revision_id = content.get('revisionId')
+        if not revision_id:
+            return
+        cache.set_many({
+            content_key(document_id, revision_id): content,
+            revision_key(document_id): revision_id,
+        }, self.timeout)
+
+    def invalidate(self, document_id):
+        cache.delete(revision_key(document_id))
+
+    def record(self, hit):
+        key = HITS_KEY if hit else MISSES_KEY
+        # add() then incr() so concurrent first counts don't overwrite each other
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+    def stats(self):
+        counts = cache.get_many([HITS_KEY, MISSES_KEY])
+        hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else None}
+
+    def reset_stats(self):
+        cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+docs_content_cache = DocsContentCache()
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+
+from api.utils.ot import transform_position
+
+logger = logging.getLogger(__name__)
+
+
+def send_batch_update(document_id, requests):
+    """Send one batchUpdate through the shared Google Docs service; raises HttpError on failure"""
+    from api.services.google_docs_service import google_docs_service
+    return google_docs_service.batch_update(document_id, requests)
+
+
+def is_retryable(error):
+    """Rate limiting, server errors and requests that never got a response are worth retrying"""
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status is None:
+        return True
+    status = int(status)
+    return status == 429 or status >= 500
+
+
+class FormatWriteBuffer:
+    """
+    Write-behind buffer for the updateTextStyle requests of one Google Doc.
+
+    Each style field is tracked as non-overlapping ranges where the latest change
+    wins, so overlapping and adjacent edits collapse before anything is sent. The
+    buffer flushes as a single batchUpdate `interval` seconds after the first
+    pending change, or sooner once `max_ops` changes are waiting. At `max_pending`
+    changes `add` flushes inline, which holds back the sending connection until
+    the API catches up. Batches failing with 429 or 5xx are retried with
+    exponential backoff; other errors would fail again and are dropped.
+
+    Ranges are positions in the editors' shared text. Text edits applied while
+    a change is buffered move it with `transform`, as they would a cursor.
+    """
+
+    def __init__(self, document_id, writer=None, interval=0.5, max_ops=50, max_pending=500,
+                 max_retries=3, retry_delay=0.5):
+        self.document_id = document_id
+        self.writer = writer or send_batch_update
+        self.interval = interval
+        self.max_ops = max_ops
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.pending_ops = 0
+        self.flushes = 0
+        self._styles = {}
+        self._timer = None
+        self._flush_requested = False
+        self._tasks = set()
+        self._lock = asyncio.Lock()
+
+    async def add(self, start, end, text_style):
+        """Queue a style change for [start, end)"""
+        if not text_style or end <= start:
+            return
+        for field, value in text_style.items():
+            self._set(field, start, end, value)
+        self.pending_ops += 1
+
+        if self.pending_ops >= self.max_pending:
+            await self.flush()
+        elif self.pending_ops >= self.max_ops:
+            if not self._flush_requested:
+                self._start_flush()
+        elif self._timer is None and not self._flush_requested:
+            self._timer = asyncio.get_running_loop().call_later(self.interval, self._start_flush)
+
+    def transform(self, operation):
+        """Move the buffered ranges past a text operation applied to the document"""
+        for field, spans in self._styles.items():
+            moved = []
+            for start, end, value in spans:
+                # Text typed at either edge stays outside the range; text typed inside joins it
+                start = transform_position(operation, start, after_inserts=True)
+                end = transform_position(operation, end)
+                if end > start:
+                    moved.append((start, end, value))
+            self._styles[field] = moved
+
+    def _set(self, field, start, end, value):
+        spans = []
+        for span_start, span_end, span_value in self._styles.get(field, []):
+            if span_end <= start or span_start >= end:
+                spans.append((span_start, span_end, span_value))
+                continue
+            if span_start < start:
+                spans.append((span_start, start, span_value))
+            if span_end > end:
+                spans.append((end, span_end, span_value))
+        spans.append((start, end, value))
+        spans.sort(key=lambda span: span[0])
+        self._styles[field] = spans
+
+    def build_requests(self):
+        """Collapse the buffered styles into disjoint updateTextStyle requests"""
+        points = sorted({point for spans in self._styles.values() for span in spans for point in span[:2]})
+        requests = []
+        for start, end in zip(points, points[1:]):
+            style = {}
+            for field, spans in self._styles.items():
+                for span_start, span_end, value in spans:
+                    if span_start <= start and end <= span_end:
+                        style[field] = value
+                        break
+            if not style:
+                continue
+            previous = requests[-1]['updateTextStyle'] if requests else None
+            if previous and previous['range']['endIndex'] == start and previous['textStyle'] == style:
+                previous['range']['endIndex'] = end
+                continue
+            requests.append({
+                'updateTextStyle': {
+                    'range': {'startIndex': start, 'endIndex': end},
+                    'textStyle': style,
+                    'fields': ','.join(style),
+                }
+            })
+        return requests
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._flush_requested = True
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self):
+        """Send everything buffered so far as one batchUpdate"""
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            requests = self.build_requests()
+            self._styles = {}
+            self.pending_ops = 0
+            self._flush_requested = False
+            if not requests:
+                return None
+
+            for attempt in range(self.max_retries + 1):
+                try:
+                    result = await sync_to_async(self.writer, thread_sensitive=False)(self.document_id, requests)
+                except Exception as e:
+                    if not is_retryable(e):
+                        logger.error(f"Dropping {len(requests)} formatting requests for {self.document_id}: {e}")
+                        return None
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(self.retry_delay * 2 ** attempt)
+                    continue
+                self.flushes += 1
+                return result
+            logger.error(f"Dropping {len(requests)} formatting requests for {self.document_id} after retries")
+            return None
+
+    async def close(self):
+        """Flush what is left and wait for in-flight flushes"""
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+# Write buffers for documents with editors connected to this process, keyed by document id
+_buffers = {}
+
+
+def acquire_format_buffer(document_id, google_doc_id):
+    """Get the shared buffer for a document, counting the caller as a user of it"""
+    entry = _buffers.get(document_id)
+    if entry is None:
+        entry = _buffers[document_id] = [FormatWriteBuffer(google_doc_id), 0]
+    entry[1] += 1
+    return entry[0]
+
+
+async def release_format_buffer(document_id):
+    """Drop a user of the document's buffer, flushing and discarding it after the last one"""
+    entry = _buffers.get(document_id)
+    if entry is None:
+        return
+    entry[1] -= 1
+    if entry[1] <= 0:
+        del _buffers[document_id]
+        await entry[0].close()
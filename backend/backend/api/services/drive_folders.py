@@ -0,0 +1,61 @@
+import logging
+import threading
+
+from django.core.cache import cache
+
+from api.models import Thesis, ThesisDriveFolder
+
+logger = logging.getLogger(__name__)
+
+CACHE_TIMEOUT = 24 * 60 * 60
+
+# Folder creation is serialized per thesis between threads of one process by these
+# striped locks. Between processes the ThesisDriveFolder row decides: it is keyed by
+# thesis, so only one process's folder is recorded and the others delete theirs
+_creation_locks = [threading.Lock() for _ in range(64)]
+
+
+def folder_cache_key(thesis_id):
+    return f'thesis_drive_folder:{thesis_id}'
+
+
+def folder_name(thesis):
+    return f"Thesis_{thesis.id}_{thesis.title[:30]}"
+
+
+def get_thesis_folder(thesis_id, uploader):
+    """
+    Drive folder id for a thesis's uploads. The cache and the ThesisDriveFolder row
+    answer every upload after the first; only the first one calls Drive.
+    """
+    key = folder_cache_key(thesis_id)
+    folder_id = cache.get(key)
+    if folder_id:
+        return folder_id
+
+    folder_id = ThesisDriveFolder.objects.filter(thesis_id=thesis_id).values_list('folder_id', flat=True).first()
+    if folder_id is None:
+        with _creation_locks[thesis_id % len(_creation_locks)]:
+            folder_id = _get_or_create_folder(thesis_id, uploader)
+    cache.set(key, folder_id, CACHE_TIMEOUT)
+    return folder_id
+
+
+def _get_or_create_folder(thesis_id, uploader):
+    # Another upload may have created it while this one waited for the lock
+    folder_id = ThesisDriveFolder.objects.filter(thesis_id=thesis_id).values_list('folder_id', flat=True).first()
+    if folder_id:
+        return folder_id
+
+    # Drive is called without holding any database lock
+    thesis = Thesis.objects.get(id=thesis_id)
+    created_id = uploader.create_folder(folder_name(thesis))
+    folder, created = ThesisDriveFolder.objects.get_or_create(thesis_id=thesis_id,
+                                                              defaults={'folder_id': created_id})
+    if not created:
+        # An upload on another process recorded its folder first
+        try:
+            uploader.delete(created_id)
+        except Exception as e:
+            logger.warning(f"Could not delete unused Drive folder {created_id}: {e}")
+    return folder.folder_id
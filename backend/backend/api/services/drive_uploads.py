@@ -0,0 +1,247 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.models import Document
+from api.services.drive_folders import get_thesis_folder
+
+logger = logging.getLogger(__name__)
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+FILE_FIELDS = 'id,name,webViewLink,size,mimeType'
+# Resumable upload chunks must be a multiple of this
+CHUNK_GRANULARITY = 256 * 1024
+
+
+class DriveUploadError(Exception):
+    """A Drive request failed and the upload couldn't be completed"""
+
+
+class UploadQueueFull(Exception):
+    """Every upload slot is taken; the client should retry later"""
+
+
+class ResumableDriveUploader:
+    """
+    Drive v3 client for the upload pipeline, speaking HTTP through a pooled session.
+
+    Files are sent to a resumable upload session in `chunk_size` pieces read from a
+    seekable stream, so only one chunk is held in memory at a time. After a dropped
+    connection or a 5xx the uploader asks the session how many bytes it committed
+    and carries on from there.
+    """
+
+    def __init__(self, session, api_root=None, chunk_size=None, max_retries=5, retry_delay=1.0, timeout=60):
+        self.session = session
+        self.api_root = (api_root or settings.GOOGLE_DRIVE_API_ROOT).rstrip('/')
+        self.chunk_size = chunk_size or settings.DRIVE_UPLOAD_CHUNK_SIZE
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        if self.chunk_size % CHUNK_GRANULARITY:
+            raise ValueError('chunk_size must be a multiple of 256 KiB')
+
+    def _check(self, response, action):
+        if not response.ok:
+            raise DriveUploadError(f'{action} failed with HTTP {response.status_code}: {response.text[:200]}')
+        return response
+
+    def create_folder(self, name, parent_id=None):
+        """Create a publicly readable folder and return its id"""
+        body = {'name': name, 'mimeType': FOLDER_MIME_TYPE}
+        if parent_id:
+            body['parents'] = [parent_id]
+        response = self.session.post(f'{self.api_root}/drive/v3/files', params={'fields': 'id'},
+                                     json=body, timeout=self.timeout)
+        folder_id = self._check(response, 'Creating folder').json()['id']
+        self.share_publicly(folder_id)
+        return folder_id
+
+    def share_publicly(self, file_id):
+        response = self.session.post(f'{self.api_root}/drive/v3/files/{file_id}/permissions',
+                                     json={'role': 'reader', 'type': 'anyone'}, timeout=self.timeout)
+        self._check(response, 'Sharing file')
+
+    def delete(self, file_id):
+        response = self.session.delete(f'{self.api_root}/drive/v3/files/{file_id}', timeout=self.timeout)
+        self._check(response, 'Deleting file')
+
+    def upload(self, stream, size, name, mime_type, folder_id=None):
+        """Upload `size` bytes from `stream` and return the Drive file resource"""
+        import requests
+        metadata = {'name': name}
+        if folder_id:
+            metadata['parents'] = [folder_id]
+        response = self.session.post(
+            f'{self.api_root}/upload/drive/v3/files',
+            params={'uploadType': 'resumable', 'fields': FILE_FIELDS},
+            json=metadata,
+            headers={'X-Upload-Content-Type': mime_type, 'X-Upload-Content-Length': str(size)},
+            timeout=self.timeout,
+        )
+        location = self._check(response, 'Starting upload session').headers['Location']
+
+        offset, failures, resuming = 0, 0, False
+        while True:
+            if resuming:
+                # Ask the session how much it has before sending anything else
+                chunk, content_range = b'', f'bytes */{size}'
+            else:
+                stream.seek(offset)
+                chunk = stream.read(self.chunk_size)
+                content_range = f'bytes {offset}-{offset + len(chunk) - 1}/{size}' if chunk else f'bytes */{size}'
+            try:
+                response = self.session.put(location, data=chunk, headers={'Content-Range': content_range},
+                                            timeout=self.timeout)
+            except requests.RequestException as e:
+                response, error = None, str(e)
+            else:
+                if response.status_code in (200, 201):
+                    return response.json()
+                if response.status_code == 308:
+                    offset, failures, resuming = committed_bytes(response), 0, False
+                    continue
+                error = f'HTTP {response.status_code}'
+                if response.status_code < 500 and response.status_code != 429:
+                    raise DriveUploadError(f'Upload of {name} rejected: {error}')
+
+            failures += 1
+            if failures > self.max_retries:
+                raise DriveUploadError(f'Upload of {name} failed after {self.max_retries} retries: {error}')
+            time.sleep(self.retry_delay * 2 ** (failures - 1))
+            resuming = True
+
+
+def committed_bytes(response):
+    """Bytes a resumable session has stored, from the Range header of its 308 reply"""
+    committed = response.headers.get('Range')
+    return int(committed.rsplit('-', 1)[1]) + 1 if committed else 0
+
+
+def spool_upload(uploaded_file):
+    """Copy an upload, chunk by chunk, to a temporary file the upload worker owns"""
+    with tempfile.NamedTemporaryFile(prefix='drive-upload-', delete=False) as spool:
+        try:
+            for chunk in uploaded_file.chunks():
+                spool.write(chunk)
+        except Exception:
+            os.remove(spool.name)
+            raise
+    return spool.name
+
+
+def default_uploader():
+    from api.services.google_drive_service import drive_service
+    session = drive_service.authorized_session(pool_size=settings.DRIVE_UPLOAD_WORKERS)
+    return ResumableDriveUploader(session) if session else None
+
+
+class DriveUploadPipeline:
+    """
+    Runs DocumentViewSet's Drive uploads off the request thread.
+
+    `submit` spools the upload to disk and queues it for a pool of `workers` threads,
+    which stream it to Drive and mark the document READY or FAILED. At most
+    `workers + queue` uploads are accepted at a time; beyond that `submit` raises
+    UploadQueueFull instead of letting the backlog grow.
+    """
+
+    def __init__(self, uploader_factory=default_uploader, workers=None, queue=None):
+        self.workers = workers or settings.DRIVE_UPLOAD_WORKERS
+        queue = settings.DRIVE_UPLOAD_QUEUE if queue is None else queue
+        self._uploader_factory = uploader_factory
+        self._uploader = None
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.workers + queue)
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='drive-upload')
+        return self._executor
+
+    def _get_uploader(self):
+        # Not cached until the factory returns one, so credentials added after the
+        # first upload are picked up without a restart
+        with self._lock:
+            if self._uploader is None:
+                self._uploader = self._uploader_factory()
+            return self._uploader
+
+    def submit(self, document, uploaded_file):
+        """Queue `uploaded_file` for upload into its thesis's folder on behalf of a PENDING `document`"""
+        if not self._slots.acquire(blocking=False):
+            raise UploadQueueFull('Too many uploads in progress')
+        path = None
+        try:
+            path = spool_upload(uploaded_file)
+            mime_type = uploaded_file.content_type or 'application/octet-stream'
+            future = self._start().submit(self._run, document.id, document.thesis_id, path, uploaded_file.name,
+                                          mime_type)
+        except Exception:
+            if path:
+                os.remove(path)
+            self._slots.release()
+            raise
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return future
+
+    def _run(self, document_id, thesis_id, path, name, mime_type):
+        try:
+            uploader = self._get_uploader()
+            if uploader is None:
+                raise DriveUploadError('Google Drive is not configured')
+            size = os.path.getsize(path)
+            folder_id = get_thesis_folder(thesis_id, uploader)
+            with open(path, 'rb') as stream:
+                file = uploader.upload(stream, size, name, mime_type, folder_id)
+            uploader.share_publicly(file['id'])
+            Document.objects.filter(id=document_id).update(
+                status='READY',
+                google_drive_file_id=file['id'],
+                google_drive_embed_url=f"https://drive.google.com/file/d/{file['id']}/preview",
+                file_size=int(file.get('size') or size),
+                mime_type=file.get('mimeType') or mime_type,
+                upload_error='',
+            )
+        except Exception as e:
+            logger.error(f"Drive upload for document {document_id} failed: {e}")
+            Document.objects.filter(id=document_id).update(status='FAILED', upload_error=str(e)[:500])
+        finally:
+            os.remove(path)
+            self._slots.release()
+            close_old_connections()
+
+    def wait(self, timeout=None):
+        """Block until every queued upload has finished"""
+        return wait(list(self._futures), timeout=timeout)
+
+
+upload_pipeline = DriveUploadPipeline()
+
+
+def fail_stale_uploads(minutes=None):
+    """
+    Mark Drive uploads still PENDING after `minutes` as FAILED and return how many.
+
+    An upload's spooled file and queue slot live only in the process that accepted
+    it, so a restart or crash leaves its document PENDING for good. The client is
+    told to upload the file again. `minutes` should comfortably exceed the longest
+    upload, or ones still in progress are failed too.
+    """
+    minutes = settings.DRIVE_UPLOAD_STALE_MINUTES if minutes is None else minutes
+    cutoff = timezone.now() - timedelta(minutes=minutes)
+    return Document.objects.filter(status='PENDING', created_at__lt=cutoff).update(
+        status='FAILED', upload_error='The upload was interrupted; please upload the file again',
+    )
@@ -0,0 +1,282 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from api.models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Most emails Resend accepts in one batch request
+BATCH_LIMIT = 100
+
+
+def enqueue_emails(messages, sender, batch=False):
+    """
+    Add (to_email, subject, html) messages to the outbox. Call this inside the
+    transaction of the change being announced, so the emails are only sent if
+    it commits. With `batch`, the worker sends them together, each run of
+    BATCH_LIMIT messages in one request.
+    """
+    emails, batch_key = [], ''
+    for index, (to_email, subject, html) in enumerate(messages):
+        if batch and index % BATCH_LIMIT == 0:
+            batch_key = uuid.uuid4().hex
+        emails.append(OutboundEmail(sender=sender, to_email=to_email, subject=subject, html=html,
+                                    batch_key=batch_key))
+    return OutboundEmail.objects.bulk_create(emails)
+
+
+class PooledHTTPClient:
+    """
+    HTTP client for the resend SDK that keeps connections to the API open between
+    sends; the SDK's default client opens a new one for every email.
+    """
+
+    def __init__(self, pool_size, timeout=30):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.timeout = timeout
+
+    def request(self, method, url, headers, json=None, files=None, data=None):
+        import requests
+        try:
+            response = self.session.request(method=method, url=url, headers=headers, files=files, data=data,
+                                            json=json if data is None else None, timeout=self.timeout)
+        except requests.RequestException as e:
+            # The SDK turns this into a ResendError, as it does for its own client
+            raise RuntimeError(f"Request failed: {e}") from e
+        return response.content, response.status_code, response.headers
+
+
+def resend_client(pool_size):
+    """resend.Emails, sending through connections pooled for `pool_size` threads"""
+    import resend
+    resend.api_key = settings.RESEND_API_KEY
+    resend.default_http_client = PooledHTTPClient(pool_size)
+    return resend.Emails
+
+
+class DjangoMailClient:
+    """
+    Sends outbox emails through EMAIL_BACKEND, with the interface of resend.Emails.
+    One connection is opened for the worker's lifetime and shared by its threads.
+    """
+
+    def __init__(self):
+        self.connection = get_connection()
+        self._lock = threading.Lock()
+        self._opened = False
+
+    def send(self, params, options=None):
+        message = EmailMultiAlternatives(params['subject'], strip_tags(params['html']), params['from'],
+                                         params['to'], connection=self.connection)
+        message.attach_alternative(params['html'], 'text/html')
+        with self._lock:
+            if not self._opened:
+                self.connection.open()
+                self._opened = True
+            message.send()
+        return {'id': ''}
+
+    def close(self):
+        with self._lock:
+            if self._opened:
+                self.connection.close()
+                self._opened = False
+
+
+def outbox_clients(pool_size):
+    """(client, batch_client) for EMAIL_OUTBOX_TRANSPORT; Django's backends have no batch send"""
+    if settings.EMAIL_OUTBOX_TRANSPORT == 'resend':
+        return resend_client(pool_size), resend_batch_client()
+    return DjangoMailClient(), None
+
+
+def resend_batch_client():
+    """resend.Batch; call resend_client first so it shares the pooled connections"""
+    import resend
+    return resend.Batch
+
+
+class RateLimiter:
+    """Token bucket shared by the sending threads: at most `rate` sends per second, bursting to `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Take the token now, even if that goes negative, and wait for it outside the lock
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class OutboxWorker:
+    """
+    Sends the emails in the outbox.
+
+    Each round claims up to `batch_size` due rows, marking them SENDING for `lease`
+    seconds so other workers skip them, and sends them from `concurrency` threads
+    at no more than `rate_limit` emails per second. Failed sends are retried with
+    exponential backoff until `max_attempts`, then marked FAILED. A row left
+    SENDING by a worker that died is picked up again once its lease runs out; the
+    idempotency key keeps the provider from delivering it twice.
+
+    Emails queued with the same batch key go out through `batch_client` in one
+    request, which counts once against the rate limit. They are claimed, succeed
+    or fail, and are retried together, so the batch key is the request's
+    idempotency key. Without a batch client they're sent one by one.
+    """
+
+    def __init__(self, client=None, concurrency=None, rate_limit=None, batch_size=None, max_attempts=None,
+                 retry_delay=None, lease=300, batch_client=None):
+        self.concurrency = concurrency or settings.EMAIL_OUTBOX_CONCURRENCY
+        if client is None:
+            client, default_batch_client = outbox_clients(self.concurrency)
+            batch_client = batch_client or default_batch_client
+        self.client = client
+        self.batch_client = batch_client
+        self.batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        self.retry_delay = settings.EMAIL_OUTBOX_RETRY_DELAY if retry_delay is None else retry_delay
+        self.lease = timedelta(seconds=lease)
+        self.limiter = RateLimiter(rate_limit or settings.EMAIL_OUTBOX_RATE_LIMIT)
+        self._executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix='email-outbox')
+
+    def claim(self):
+        """Lease the next batch of due emails to this worker"""
+        now = timezone.now()
+        with transaction.atomic():
+            due = (OutboundEmail.objects.select_for_update(skip_locked=True)
+                   .filter(status__in=['PENDING', 'SENDING'], next_attempt_at__lte=now))
+            claimed = list(due.order_by('next_attempt_at', 'id').values_list('id', 'batch_key')[:self.batch_size])
+            ids = self._whole_batches(due, claimed)
+            OutboundEmail.objects.filter(id__in=ids).update(
+                status='SENDING', next_attempt_at=now + self.lease, attempts=F('attempts') + 1
+            )
+        return list(OutboundEmail.objects.filter(id__in=ids))
+
+    @staticmethod
+    def _whole_batches(due, claimed):
+        """
+        Ids of the claimed (id, batch_key) rows with the rest of their batches added.
+        A batch that is partly locked by another worker is left to that worker, so
+        a batch key is only ever sent with the same emails.
+        """
+        ids = [pk for pk, batch_key in claimed if not batch_key]
+        keys = {batch_key for _, batch_key in claimed if batch_key}
+        if not keys:
+            return ids
+        batches = {}
+        for pk, batch_key in due.filter(batch_key__in=keys).values_list('id', 'batch_key'):
+            batches.setdefault(batch_key, []).append(pk)
+        unsent = (OutboundEmail.objects.filter(batch_key__in=keys, status__in=['PENDING', 'SENDING'])
+                  .values('batch_key').annotate(count=Count('id')).values_list('batch_key', 'count'))
+        for batch_key, count in unsent:
+            if len(batches.get(batch_key, ())) == count:
+                ids.extend(batches[batch_key])
+        return ids
+
+    @staticmethod
+    def _params(email):
+        return {'from': email.sender, 'to': [email.to_email], 'subject': email.subject, 'html': email.html}
+
+    def _send(self, email):
+        self.limiter.acquire()
+        try:
+            response = self.client.send(self._params(email), {'idempotency_key': f'outbox-{email.id}'})
+        except Exception as e:
+            return None, str(e)
+        return response['id'], None
+
+    def _send_batch(self, emails):
+        """Send `emails` in one request; returns a (provider_id, error) pair for each"""
+        if len(emails) == 1:
+            return [self._send(emails[0])]
+        self.limiter.acquire()
+        try:
+            response = self.batch_client.send([self._params(email) for email in emails],
+                                              {'idempotency_key': f'outbox-batch-{emails[0].batch_key}'})
+        except Exception as e:
+            return [(None, str(e))] * len(emails)
+        return [(item['id'], None) for item in response['data']]
+
+    def _group(self, emails):
+        """Split claimed emails into the lists sent by one request each"""
+        groups, batches = [], {}
+        for email in sorted(emails, key=lambda email: email.id):
+            if not email.batch_key or self.batch_client is None:
+                groups.append([email])
+                continue
+            batch = batches.get(email.batch_key)
+            if batch is None:
+                batch = batches[email.batch_key] = []
+                groups.append(batch)
+            batch.append(email)
+        return groups
+
+    def run_once(self):
+        """Send one round of claimed emails; returns how many were claimed"""
+        emails = self.claim()
+        if not emails:
+            return 0
+
+        groups = self._group(emails)
+        results = [result for group_results in self._executor.map(self._send_batch, groups)
+                   for result in group_results]
+        emails = [email for group in groups for email in group]
+        now = timezone.now()
+        for email, (provider_id, error) in zip(emails, results):
+            if error is None:
+                email.status, email.provider_id, email.sent_at, email.last_error = 'SENT', provider_id, now, ''
+            elif email.attempts >= self.max_attempts:
+                logger.error(f"Giving up on email {email.id} to {email.to_email}: {error}")
+                email.status, email.last_error = 'FAILED', error
+            else:
+                email.status, email.last_error = 'PENDING', error
+                email.next_attempt_at = now + timedelta(seconds=self.retry_delay * 2 ** (email.attempts - 1))
+        OutboundEmail.objects.bulk_update(
+            emails, ['status', 'provider_id', 'sent_at', 'last_error', 'next_attempt_at']
+        )
+        return len(emails)
+
+    def run(self, stop=None, poll_interval=5):
+        """Drain the outbox until `stop` is set, polling every `poll_interval` seconds once it's empty"""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                logger.error(f"Email outbox round failed: {e}")
+                claimed = 0
+            if not claimed:
+                stop.wait(poll_interval)
+
+    def close(self):
+        self._executor.shutdown()
+        if hasattr(self.client, 'close'):
+            self.client.close()
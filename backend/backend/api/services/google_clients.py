@@ -0,0 +1,112 @@
+"""
+Shared plumbing for the Google API services.
+
+The services are module-level singletons, but building one means loading
+credentials, maybe refreshing a token and parsing a discovery document, so they
+are created on first use rather than when the URLconf is imported.
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from django.utils.functional import LazyObject, empty
+
+logger = logging.getLogger(__name__)
+
+# Refresh access tokens this long before they expire
+REFRESH_MARGIN = timedelta(minutes=5)
+
+
+class LazyService(LazyObject):
+    """
+    A LazyObject for service singletons whose construction is guarded by a lock,
+    so concurrent first requests build the service exactly once.
+    """
+
+    def __init__(self, factory):
+        self.__dict__['_factory'] = factory
+        self.__dict__['_lock'] = threading.Lock()
+        super().__init__()
+
+    def _setup(self):
+        with self._lock:
+            if self._wrapped is empty:
+                self._wrapped = self._factory()
+
+    @property
+    def is_initialized(self):
+        return self._wrapped is not empty
+
+
+@lru_cache(maxsize=None)
+def discovery_document(api, version):
+    """The discovery document bundled with googleapiclient, parsed once per process"""
+    from googleapiclient.discovery_cache import get_static_doc
+    return json.loads(get_static_doc(api, version))
+
+
+def build_client(api, version, credentials):
+    """
+    A client for `api` from the cached discovery document. googleapiclient clients
+    are not thread-safe, so build one per thread rather than sharing it.
+    """
+    from googleapiclient.discovery import build_from_document
+    return build_from_document(discovery_document(api, version), credentials=credentials)
+
+
+class ThreadLocalClient(threading.local):
+    """Per-thread clients for one set of credentials, rebuilt when the credentials change"""
+
+    def get(self, api, version, credentials):
+        if getattr(self, 'credentials', None) is not credentials:
+            self.credentials, self.clients = credentials, {}
+        if (api, version) not in self.clients:
+            self.clients[(api, version)] = build_client(api, version, credentials)
+        return self.clients[(api, version)]
+
+
+class CredentialRefresher:
+    """
+    Refreshes OAuth credentials on a daemon timer shortly before they expire, so
+    requests don't pay for a token round trip. `on_refresh` is called with the
+    credentials after each successful refresh.
+    """
+
+    def __init__(self, credentials, on_refresh=None, retry_delay=60):
+        self.credentials = credentials
+        self.on_refresh = on_refresh
+        self.retry_delay = retry_delay
+        self._timer = None
+
+    def start(self):
+        """Begin refreshing; credentials that were never fetched are refreshed right away"""
+        self._schedule(self._delay() if self.credentials.expiry else 0)
+        return self
+
+    def stop(self):
+        if self._timer:
+            self._timer.cancel()
+
+    def _delay(self):
+        return max((self.credentials.expiry - REFRESH_MARGIN - datetime.utcnow()).total_seconds(), 0)
+
+    def _schedule(self, delay):
+        self._timer = threading.Timer(delay, self._refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh(self):
+        from google.auth.transport.requests import Request
+        try:
+            self.credentials.refresh(Request())
+        except Exception as e:
+            logger.error(f"Background Google token refresh failed: {e}")
+            self._schedule(self.retry_delay)
+            return
+        if self.on_refresh:
+            self.on_refresh(self.credentials)
+        # Credentials without an expiry don't need refreshing again
+        if self.credentials.expiry:
+            self._schedule(self._delay())
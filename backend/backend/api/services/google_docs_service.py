@@ -1,16 +1,18 @@
 import os
 import json
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from django.conf import settings
 from django.core.cache import cache
 import logging
 
+from api.services.docs_content_cache import docs_content_cache
+from api.services.google_clients import CredentialRefresher, LazyService, ThreadLocalClient
+
 logger = logging.getLogger(__name__)
 
+# Most calls Drive accepts in one batch request
+DRIVE_BATCH_LIMIT = 100
+
 class GoogleDocsService:
     """Service for interacting with Google Docs API"""
     
@@ -22,11 +24,36 @@ class GoogleDocsService:
     
     def __init__(self):
         self.credentials = None
-        self.service = None
+        self.refresher = None
+        self._clients = ThreadLocalClient()
         self._load_credentials()
     
+    @property
+    def service(self):
+        """This thread's Docs client, or None without credentials"""
+        if not self.credentials:
+            return None
+        return self._clients.get('docs', 'v1', self.credentials)
+    
+    @property
+    def drive(self):
+        """
+        This thread's Drive client for permission calls, or None without credentials.
+        It is built once per thread and keeps its HTTP connection alive between calls.
+        """
+        if not self.credentials:
+            return None
+        return self._clients.get('drive', 'v3', self.credentials)
+    
+    def _start_refresher(self):
+        if self.refresher:
+            self.refresher.stop()
+        self.refresher = CredentialRefresher(self.credentials, on_refresh=lambda _: self._cache_credentials()).start()
+    
     def _load_credentials(self):
         """Load Google API credentials from cache or file"""
+        from google.oauth2.credentials import Credentials
+        from google.auth.transport.requests import Request
         try:
             # Try to get credentials from cache first
             cached_creds = cache.get('google_credentials')
@@ -50,7 +77,7 @@ class GoogleDocsService:
                         )
             
             if self.credentials:
-                self.service = build('docs', 'v1', credentials=self.credentials)
+                self._start_refresher()
                 
         except Exception as e:
             logger.error(f"Error loading Google credentials: {e}")
@@ -63,6 +90,7 @@ class GoogleDocsService:
     def get_authorization_url(self, redirect_uri):
         """Get OAuth authorization URL for user consent"""
         try:
+            from google_auth_oauthlib.flow import Flow
             flow = Flow.from_client_config(
                 {
                     "web": {
@@ -98,6 +126,7 @@ class GoogleDocsService:
             if not cache.get(f'oauth_state_{state}'):
                 raise ValueError("Invalid state parameter")
             
+            from google_auth_oauthlib.flow import Flow
             flow = Flow.from_client_config(
                 {
                     "web": {
@@ -114,9 +143,8 @@ class GoogleDocsService:
             flow.fetch_token(code=code)
             self.credentials = flow.credentials
             self._cache_credentials()
-            
-            # Rebuild service with new credentials
-            self.service = build('docs', 'v1', credentials=self.credentials)
+            # Clients are rebuilt for the new credentials on next use
+            self._start_refresher()
             
             return True
             
@@ -167,9 +195,14 @@ class GoogleDocsService:
             logger.error(f"Error creating document: {e}")
             return None
     
-    def get_document_content(self, document_id):
-        """Get document content including structure and text"""
+    def get_document_content(self, document_id, use_cache=True):
+        """Get document content including structure and text, from the content cache when possible"""
         try:
+            if use_cache:
+                document = docs_content_cache.get(document_id)
+                if document is not None:
+                    return document
+            
             if not self.service:
                 raise Exception("Google Docs service not initialized")
             
@@ -177,6 +210,7 @@ class GoogleDocsService:
                 documentId=document_id,
                 includeContent=True
             ).execute()
+            docs_content_cache.set(document_id, document)
             
             return document
             
@@ -187,18 +221,34 @@ class GoogleDocsService:
             logger.error(f"Error getting document content: {e}")
             return None
     
-    def update_document(self, document_id, requests):
-        """Update document with batch requests"""
+    def get_document_text(self, document_id):
+        """Plain text of the document body, or None when it can't be read"""
+        document = self.get_document_content(document_id)
+        if document is None:
+            return None
+        return ''.join(
+            element.get('textRun', {}).get('content', '')
+            for block in document.get('body', {}).get('content', [])
+            for element in block.get('paragraph', {}).get('elements', [])
+        )
+
+    def batch_update(self, document_id, requests):
+        """Send batch requests, raising HttpError when the API refuses them"""
+        if not self.service:
+            raise Exception("Google Docs service not initialized")
         try:
-            if not self.service:
-                raise Exception("Google Docs service not initialized")
-            
-            result = self.service.documents().batchUpdate(
+            return self.service.documents().batchUpdate(
                 documentId=document_id,
                 body={'requests': requests}
             ).execute()
-            
-            return result
+        finally:
+            # Even a failed batch may have been partly applied
+            docs_content_cache.invalidate(document_id)
+
+    def update_document(self, document_id, requests):
+        """Update document with batch requests"""
+        try:
+            return self.batch_update(document_id, requests)
             
         except HttpError as e:
             logger.error(f"Google Docs API error: {e}")
@@ -267,8 +317,10 @@ class GoogleDocsService:
     def get_document_permissions(self, document_id):
         """Get document sharing permissions"""
         try:
-            drive_service = build('drive', 'v3', credentials=self.credentials)
-            permissions = drive_service.permissions().list(
+            if not self.drive:
+                raise Exception("Google Drive service not initialized")
+            
+            permissions = self.drive.permissions().list(
                 fileId=document_id,
                 fields='permissions(id,type,role,emailAddress,displayName)'
             ).execute()
@@ -285,9 +337,10 @@ class GoogleDocsService:
     def share_document(self, document_id, email, role='writer'):
         """Share document with specific user"""
         try:
-            drive_service = build('drive', 'v3', credentials=self.credentials)
+            if not self.drive:
+                raise Exception("Google Drive service not initialized")
             
-            permission = drive_service.permissions().create(
+            permission = self.drive.permissions().create(
                 fileId=document_id,
                 body={
                     'type': 'user',
@@ -306,6 +359,50 @@ class GoogleDocsService:
             logger.error(f"Error sharing document: {e}")
             return None
     
+    def share_document_with_many(self, document_id, recipients):
+        """
+        Share a document with several users at once. `recipients` is a list of
+        (email, role) pairs; their permissions are created in HTTP batch requests of
+        up to DRIVE_BATCH_LIMIT calls rather than one request per user.
+        
+        Returns a dict mapping each email to its new permission, or None when
+        sharing with that user failed.
+        """
+        results = {email: None for email, _ in recipients}
+        drive = self.drive
+        if not drive:
+            logger.error("Error sharing document: Google Drive service not initialized")
+            return results
+        
+        def collect(request_id, response, exception):
+            email = recipients[int(request_id)][0]
+            if exception:
+                logger.error(f"Google Drive API error sharing with {email}: {exception}")
+            else:
+                results[email] = response
+        
+        for start in range(0, len(recipients), DRIVE_BATCH_LIMIT):
+            batch = drive.new_batch_http_request(callback=collect)
+            for index, (email, role) in enumerate(recipients[start:start + DRIVE_BATCH_LIMIT], start):
+                batch.add(
+                    drive.permissions().create(
+                        fileId=document_id,
+                        body={
+                            'type': 'user',
+                            'role': role,
+                            'emailAddress': email
+                        },
+                        fields='id'
+                    ),
+                    request_id=str(index)
+                )
+            try:
+                batch.execute()
+            except Exception as e:
+                logger.error(f"Error sharing document in batch: {e}")
+        
+        return results
+    
     def extract_document_id_from_url(self, url):
         """Extract document ID from Google Docs URL"""
         try:
@@ -317,5 +414,5 @@ class GoogleDocsService:
         except Exception:
             return None
 
-# Global service instance
-google_docs_service = GoogleDocsService()
+# Global service instance, built on first use
+google_docs_service = LazyService(GoogleDocsService)
@@ -1,14 +1,13 @@
 import os
-import json
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from django.conf import settings
 import io
+import logging
 from typing import Dict, Optional, Tuple
 
+from api.services.google_clients import CredentialRefresher, LazyService, ThreadLocalClient
+
+logger = logging.getLogger(__name__)
+
 class GoogleDriveService:
     """Google Drive service for uploading and managing files"""
     
@@ -16,11 +15,24 @@ class GoogleDriveService:
     SERVICE_ACCOUNT_FILE = getattr(settings, 'GOOGLE_SERVICE_ACCOUNT_FILE', None)
     
     def __init__(self):
-        self.service = None
+        self.credentials = None
+        self.refresher = None
+        self._clients = ThreadLocalClient()
         self._authenticate()
     
+    @property
+    def token_path(self):
+        return os.path.join(settings.BASE_DIR, 'google_token.json')
+    
+    @property
+    def service(self):
+        """This thread's Drive client, or None when not authenticated"""
+        if not self.credentials:
+            return None
+        return self._clients.get('drive', 'v3', self.credentials)
+    
     def _authenticate(self):
-        """Authenticate with Google Drive API"""
+        """Load Drive credentials; never prompts, see `authorize_interactively`"""
         try:
             if self.SERVICE_ACCOUNT_FILE and os.path.exists(self.SERVICE_ACCOUNT_FILE):
                 # Service account authentication
@@ -28,30 +40,56 @@ class GoogleDriveService:
                 credentials = service_account.Credentials.from_service_account_file(
                     self.SERVICE_ACCOUNT_FILE, scopes=self.SCOPES
                 )
+                on_refresh = None
             else:
                 # OAuth2 authentication (for development)
-                credentials_path = os.path.join(settings.BASE_DIR, 'google_credentials.json')
-                token_path = os.path.join(settings.BASE_DIR, 'google_token.json')
-                
-                credentials = None
-                if os.path.exists(token_path):
-                    credentials = Credentials.from_authorized_user_file(token_path, self.SCOPES)
-                
-                if not credentials or not credentials.valid:
-                    if credentials and credentials.expired and credentials.refresh_token:
-                        credentials.refresh(Request())
-                    else:
-                        flow = InstalledAppFlow.from_client_secrets_file(
-                            credentials_path, self.SCOPES
-                        )
-                        credentials = flow.run_local_server(port=8081)                    
-                    with open(token_path, 'w') as token:
-                        token.write(credentials.to_json())
-            
-            self.service = build('drive', 'v3', credentials=credentials)
+                from google.oauth2.credentials import Credentials
+                if not os.path.exists(self.token_path):
+                    logger.warning("Google Drive is not authorized; run `manage.py authorize_google_drive`")
+                    return
+                credentials = Credentials.from_authorized_user_file(self.token_path, self.SCOPES)
+                if not credentials.refresh_token:
+                    logger.warning("Google Drive token cannot be refreshed; run `manage.py authorize_google_drive`")
+                    return
+                on_refresh = self._save_token
+            
+            self.credentials = credentials
+            # Fetches a token now if there is none, then keeps it fresh ahead of expiry
+            self.refresher = CredentialRefresher(credentials, on_refresh=on_refresh).start()
         except Exception as e:
-            print(f"Google Drive authentication error: {e}")
-            self.service = None
+            logger.error(f"Google Drive authentication error: {e}")
+            self.credentials = None
+    
+    def _save_token(self, credentials):
+        with open(self.token_path, 'w') as token:
+            token.write(credentials.to_json())
+    
+    @classmethod
+    def authorize_interactively(cls, port=8081):
+        """Run the installed-app OAuth flow in a browser and store the token (development only)"""
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        flow = InstalledAppFlow.from_client_secrets_file(
+            os.path.join(settings.BASE_DIR, 'google_credentials.json'), cls.SCOPES
+        )
+        credentials = flow.run_local_server(port=port)
+        with open(os.path.join(settings.BASE_DIR, 'google_token.json'), 'w') as token:
+            token.write(credentials.to_json())
+        return credentials
+    
+    def authorized_session(self, pool_size: int = 10):
+        """
+        A pooled HTTP session carrying the Drive credentials, safe to share between threads
+        (unlike the httplib2-backed `service`). Returns None when not authenticated.
+        """
+        if not self.credentials:
+            return None
+        from google.auth.transport.requests import AuthorizedSession
+        from requests.adapters import HTTPAdapter
+        session = AuthorizedSession(self.credentials)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
     
     def upload_file(self, file_content: bytes, filename: str, mime_type: str, 
                    folder_id: Optional[str] = None) -> Tuple[bool, Optional[Dict]]:
@@ -80,6 +118,7 @@ class GoogleDriveService:
                 file_metadata['parents'] = [folder_id]
             
             # Create media upload object
+            from googleapiclient.http import MediaIoBaseUpload
             media = MediaIoBaseUpload(
                 io.BytesIO(file_content),
                 mimetype=mime_type,
@@ -197,5 +236,5 @@ class GoogleDriveService:
             print(f"Error deleting file from Google Drive: {e}")
             return False
 
-# Singleton instance
-drive_service = GoogleDriveService()
+# Singleton instance, built on first use
+drive_service = LazyService(GoogleDriveService)
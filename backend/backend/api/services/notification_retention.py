@@ -0,0 +1,48 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import ArchivedNotification, Notification
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_FIELDS = ('id', 'user_id', 'title', 'body', 'link', 'created_at')
+
+
+def archivable(days, now=None):
+    """Read notifications created more than `days` days ago; unread ones are never archived"""
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+
+
+def archive_notifications(days=None, batch_size=None, now=None):
+    """
+    Move read notifications older than `days` into ArchivedNotification, `batch_size`
+    rows per transaction so no lock is held for long. Returns how many were moved.
+    """
+    days = settings.NOTIFICATION_RETENTION_DAYS if days is None else days
+    batch_size = batch_size or settings.NOTIFICATION_ARCHIVE_BATCH_SIZE
+    moved = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                archivable(days, now).select_for_update(skip_locked=True)
+                .order_by('created_at', 'id')
+                .values(*ARCHIVED_FIELDS)[:batch_size]
+            )
+            if not rows:
+                break
+            # ignore_conflicts: a batch retried after a crash may already be archived
+            ArchivedNotification.objects.bulk_create(
+                [ArchivedNotification(**row) for row in rows], ignore_conflicts=True
+            )
+            Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            break
+    if moved:
+        logger.info(f"Archived {moved} notifications older than {days} days")
+    return moved
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+
+from channels.db import database_sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+
+from api.models import DocumentOperation, DocumentSnapshot
+from api.utils.ot import TextOperation
+
+logger = logging.getLogger(__name__)
+
+# Longest replay served before a read stores a snapshot at the version it rebuilt
+REPLAY_LIMIT = 500
+
+
+class HistoryUnavailable(LookupError):
+    """The requested version isn't in a document's persisted history"""
+
+
+class OperationLog:
+    """
+    Write-behind buffer for the snapshots of every document edited in this process.
+
+    Operations are claimed one by one with claim_version, since the insert is what
+    decides a version across workers; snapshots only need to land eventually and are
+    written with one bulk insert every `interval` seconds, so a keystroke that
+    completes one never waits on writing the whole text. A failed write keeps its
+    rows for the next flush, up to `max_retries` attempts in a row.
+    """
+
+    def __init__(self, interval=0.25, max_retries=3):
+        self.interval = interval
+        self.max_retries = max_retries
+        self.snapshots = []
+        self.flushes = 0
+        self._failures = 0
+        self._timer = None
+        self._tasks = set()
+
+    def snapshot(self, document_id, version, text):
+        """Queue the full text at `version`"""
+        self.snapshots.append(DocumentSnapshot(document_id=document_id, version=version, text=text))
+        self._schedule()
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.interval, self._start_flush)
+
+    def _start_flush(self):
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self, document_id=None):
+        """Write everything queued so far, or only the snapshots of `document_id`"""
+        if document_id is None:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            snapshots, self.snapshots = self.snapshots, []
+        else:
+            snapshots = [row for row in self.snapshots if row.document_id == document_id]
+            self.snapshots = [row for row in self.snapshots if row.document_id != document_id]
+        if not snapshots:
+            return
+
+        try:
+            await database_sync_to_async(write_log)([], snapshots)
+        except Exception as e:
+            self._failures += 1
+            if self._failures > self.max_retries:
+                logger.error(f"Dropping {len(snapshots)} snapshots: {e}")
+                self._failures = 0
+                return
+            logger.warning(f"Operation log write failed, retrying: {e}")
+            self.snapshots[:0] = snapshots
+            self._schedule()
+        else:
+            self._failures = 0
+            self.flushes += 1
+
+    async def close(self):
+        """Flush what is queued and wait for in-flight writes"""
+        await self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def claim_version(document_id, version, ops, user_id=None):
+    """
+    Record `ops` as the operation producing `version`. The unique (document, version)
+    constraint makes this the check-and-increment shared by every worker: returns
+    False when another worker already took the version.
+    """
+    try:
+        with transaction.atomic():
+            DocumentOperation.objects.create(document_id=document_id, version=version, ops=ops, user_id=user_id)
+    except IntegrityError:
+        return False
+    return True
+
+
+def operations_after(document_id, version):
+    """(version, ops) of every logged operation after `version`, in order"""
+    return list(DocumentOperation.objects.filter(document_id=document_id, version__gt=version)
+                .order_by('version').values_list('version', 'ops'))
+
+
+def seed_document(document_id, load_text):
+    """
+    The text of version 0 of a document. A document without one is seeded with
+    `load_text()` and, when workers race, the first one to store it wins.
+    """
+    text = DocumentSnapshot.objects.filter(document_id=document_id, version=0).values_list('text', flat=True).first()
+    if text is not None:
+        return text
+    snapshot, _ = DocumentSnapshot.objects.get_or_create(document_id=document_id, version=0,
+                                                         defaults={'text': load_text()})
+    return snapshot.text
+
+
+def write_log(operations, snapshots):
+    """
+    Insert operations and snapshots in one transaction. Rows whose (document, version)
+    is already taken are logged and left out, and the rest are written; existing
+    history is never overwritten.
+    """
+    try:
+        with transaction.atomic():
+            _insert_log(operations, snapshots)
+    except IntegrityError:
+        with transaction.atomic():
+            _insert_log(_without_taken_versions(DocumentOperation, operations),
+                        _without_taken_versions(DocumentSnapshot, snapshots))
+
+
+def _insert_log(operations, snapshots):
+    DocumentOperation.objects.bulk_create(operations, batch_size=500)
+    DocumentSnapshot.objects.bulk_create(snapshots, batch_size=100)
+
+
+def _without_taken_versions(model, rows):
+    if not rows:
+        return rows
+    taken = set(model.objects.filter(
+        document_id__in={row.document_id for row in rows}, version__in={row.version for row in rows}
+    ).values_list('document_id', 'version'))
+    conflicts = sorted((row.document_id, row.version) for row in rows if (row.document_id, row.version) in taken)
+    if conflicts:
+        logger.error(f"Dropping {model.__name__} rows for (document, version) pairs another worker "
+                     f"already wrote: {conflicts}")
+    return [row for row in rows if (row.document_id, row.version) not in taken]
+
+
+def replay_document(document_id, version=None):
+    """
+    Rebuild a document's text at `version` (default: the latest persisted version)
+    from the nearest snapshot at or below it. Returns (text, version, snapshot_version).
+    Replay stops at the first missing version; an explicit `version` past it raises
+    HistoryUnavailable.
+    """
+    operations = DocumentOperation.objects.filter(document_id=document_id)
+    snapshots = DocumentSnapshot.objects.filter(document_id=document_id)
+    latest_requested = version is None
+    if latest_requested:
+        latest = [
+            operations.aggregate(version=Max('version'))['version'],
+            snapshots.aggregate(version=Max('version'))['version'],
+        ]
+        version = max((v for v in latest if v is not None), default=0)
+
+    snapshot = snapshots.filter(version__lte=version).order_by('-version').values('version', 'text').first()
+    snapshot_version, text = (snapshot['version'], snapshot['text']) if snapshot else (0, '')
+    replay = (operations.filter(version__gt=snapshot_version, version__lte=version)
+              .order_by('version').values_list('version', 'ops'))
+
+    current = snapshot_version
+    for op_version, ops in replay.iterator(chunk_size=REPLAY_LIMIT):
+        if op_version != current + 1:
+            break
+        text = TextOperation(ops).apply(text)
+        current = op_version
+    if current != version and latest_requested:
+        logger.error(f"History of document {document_id} breaks off after version {current}")
+        version = current
+    elif current != version:
+        raise HistoryUnavailable(f'Version {version} of document {document_id} is not in its history')
+
+    if version - snapshot_version > REPLAY_LIMIT:
+        # Snapshots were missed (e.g. a dropped write); keep the next read of this range short
+        DocumentSnapshot.objects.get_or_create(document_id=document_id, version=version, defaults={'text': text})
+    return text, version, snapshot_version
+
+
+# Shared by every DocumentEditConsumer in this process
+operation_log = OperationLog()
@@ -22,7 +22,7 @@ class GroupSearchTestCase(TestCase):
         # Create test groups
         self.group1 = Group.objects.create(
             name='Machine Learning Research',
-            possible_topics='Deep Learning\nNeural Networks\nComputer Vision',
+            proposed_topic_title='Deep Learning\nNeural Networks\nComputer Vision',
             keywords='AI, machine learning, deep learning, neural networks',
             adviser=self.adviser
         )
@@ -30,7 +30,7 @@ class GroupSearchTestCase(TestCase):
         
         self.group2 = Group.objects.create(
             name='Web Development Team',
-            possible_topics='React\nDjango\nFull Stack Development',
+            proposed_topic_title='React\nDjango\nFull Stack Development',
             keywords='web, react, django, fullstack',
             adviser=self.adviser
         )
@@ -88,3 +88,15 @@ class GroupSearchTestCase(TestCase):
         self.group1.save()
         
         self.assertEqual(self.group1.get_topics_list(), new_topics)
+    
+    def test_search_matches_inside_words(self):
+        """Test that text in the middle of a word still matches"""
+        results = Group.objects.search('earn')
+        self.assertEqual(list(results), [self.group1])
+    
+    def test_search_follows_updates(self):
+        """Test that edits to searchable fields are found after save"""
+        self.group2.keywords = 'blockchain, ledgers'
+        self.group2.save()
+        self.assertEqual(list(Group.objects.search_by_keywords('blockchain')), [self.group2])
+        self.assertFalse(Group.objects.search_by_keywords('react').exists())
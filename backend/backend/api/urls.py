@@ -9,6 +9,8 @@ router = DefaultRouter()
 router.register(r'users', user_views.UserViewSet)
 router.register(r'theses', thesis_views.ThesisViewSet)
 router.register(r'schedules', schedule_views.ScheduleViewSet)
+# Before 'notifications' so 'archive' isn't taken for a notification id
+router.register(r'notifications/archive', notification_views.ArchivedNotificationViewSet)
 router.register(r'notifications', notification_views.NotificationViewSet)
 router.register(r'groups', group_views.GroupViewSet)
 router.register(r'documents', document_views.DocumentViewSet)
@@ -31,7 +33,9 @@ def api_root(request):
             'create': '/api/google-docs/create/',
             'content': '/api/google-docs/<document_id>/content/',
             'update': '/api/google-docs/<document_id>/update/',
-            'share': '/api/google-docs/<document_id>/share/'
+            'share': '/api/google-docs/<document_id>/share/',
+            'share-thesis': '/api/google-docs/<document_id>/share-thesis/',
+            'cache-stats': '/api/google-docs/cache-stats/'
         }
     })
 
@@ -40,8 +44,10 @@ urlpatterns = [
     path('', include(router.urls)),
     path('google-docs/oauth-url/', google_docs_views.google_oauth_url, name='google_oauth_url'),
     path('google-docs/oauth-callback/', google_docs_views.google_oauth_callback, name='google_oauth_callback'),
+    path('google-docs/cache-stats/', google_docs_views.google_doc_cache_stats, name='google_doc_cache_stats'),
     path('google-docs/create/', google_docs_views.create_google_doc, name='create_google_doc'),
     path('google-docs/<str:document_id>/content/', google_docs_views.get_google_doc_content, name='get_google_doc_content'),
     path('google-docs/<str:document_id>/update/', google_docs_views.update_google_doc, name='update_google_doc'),
     path('google-docs/<str:document_id>/share/', google_docs_views.share_google_doc, name='share_google_doc'),
+    path('google-docs/<str:document_id>/share-thesis/', google_docs_views.share_google_doc_with_thesis, name='share_google_doc_with_thesis'),
 ]
@@ -1,9 +1,11 @@
-from django.core.mail import send_mail
-import resend
-from django.conf import settings
+from django.template.loader import get_template
+from django.utils.html import escape, linebreaks
 from zoneinfo import ZoneInfo
 
-resend.api_key = settings.RESEND_API_KEY
+from api.services.email_outbox import enqueue_emails
+
+DEFENSE_EMAIL_SENDER = "Defense System <no-reply@mails.enviscy.site>"
+NOTIFICATION_EMAIL_SENDER = "Thesis System <no-reply@mails.enviscy.site>"
 
 
 def format_duration(td):
@@ -26,93 +28,81 @@ def get_user_display_name(user):
     return getattr(user, 'email', getattr(user, 'username', 'Unknown User'))
 
 
-def send_notification_email(subject, body, to_email):
-    send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [to_email], fail_silently=False)
+def queue_notification_emails(users, subject, body):
+    """Queue a notification's email for each user with an address in the outbox"""
+    html = f"<html><body>{linebreaks(escape(body))}</body></html>"
+    return enqueue_emails(
+        [(user.email, subject, html) for user in users if user.email], NOTIFICATION_EMAIL_SENDER
+    )
+
+
+class RoleEmailTemplate:
+    """
+    An email template compiled on first use and rendered once per recipient role.
+    The recipient's name is the only per-recipient part, so it is filled into the
+    rendered HTML instead of rendering the template again for every recipient.
+    """
+    NAME_SLOT = '\x00recipient_name\x00'
+
+    def __init__(self, template_name):
+        self.template_name = template_name
+        self._template = None
+
+    @property
+    def template(self):
+        if self._template is None:
+            self._template = get_template(self.template_name)
+        return self._template
+
+    def render(self, context, recipients):
+        """(user, html) for each (user, role) in `recipients`"""
+        by_role = {}
+        rendered = []
+        for user, role in recipients:
+            if role not in by_role:
+                by_role[role] = self.template.render({**context, 'role': role, 'recipient_name': self.NAME_SLOT})
+            rendered.append((user, by_role[role].replace(self.NAME_SLOT, escape(get_user_display_name(user)))))
+        return rendered
+
 
+DEFENSE_SCHEDULED_TEMPLATE = RoleEmailTemplate('emails/defense_scheduled.html')
 
-def send_defense_scheduled_email(schedule_instance):
+
+def defense_schedule_recipients(group):
+    """(user, role) for the group's members, adviser and panels, one per email address"""
+    members = list(group.members.all())
+    staff = ([group.adviser] if group.adviser else []) + list(group.panels.all())
+    recipients, seen = [], set()
+    # Someone who is e.g. both adviser and panelist gets one email
+    for role, users in (('member', members), ('staff', staff)):
+        for user in users:
+            if user.email and user.email not in seen:
+                seen.add(user.email)
+                recipients.append((user, role))
+    return recipients
+
+
+def queue_defense_scheduled_email(schedule_instance):
+    """
+    Queue the "defense scheduled" email for the group's members, adviser and panels
+    in the outbox, to be sent in one batch request. Call inside the transaction
+    that saves the schedule.
+    """
     group = schedule_instance.group
     manila_tz = ZoneInfo("Asia/Manila")
-    # Convert start time
     start_time_manila = schedule_instance.start_at.astimezone(manila_tz)
-    defense_type = schedule_instance.type
-    start_time = start_time_manila.strftime("%B %d, %Y at %I:%M %p")
-
-    # Convert end time
     end_time_manila = schedule_instance.end_at.astimezone(manila_tz)
+    start_time = start_time_manila.strftime("%B %d, %Y at %I:%M %p")
 
-    # Calculate duration
-    duration_td = end_time_manila - start_time_manila
-    duration = format_duration(duration_td)
-
-    # Collect unique emails
-    recipients = list(set(
-        [m.email for m in group.members.all()] +
-        ([group.adviser.email] if group.adviser else []) +
-        [p.email for p in group.panels.all()]
-    ))
-    recipients = [email for email in recipients if email]
-    members = list(group.members.all())
-    adviser = group.adviser
-    panels = list(group.panels.all())
-
-    if not recipients:
-        print("No recipients found — skipping email.")
-        return
-
-    for user in members + ([adviser] if adviser else []) + panels:
-        if not user.email:
-            continue
-
-        # Determine role
-        if user in members:
-            role_message = """
-                <p>Please prepare your presentation and arrive 15 minutes early.</p>
-                <p>If you have questions, contact your adviser.</p>
-            """
-        else:
-            role_message = """
-                <p>You are invited to attend this defense as part of the panel/advisory team.</p>
-                <p>Please be on time and review the group’s topic if needed.</p>
-            """
-
-        html_body = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <h2 style="color: #2c3e50;">🛡️ Defense Schedule Confirmed!</h2>
-
-                <p>Hello {get_user_display_name(user)}!</p>
-
-
-                <div style="background: #f8f9fa; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    <h3><strong>Group:</strong> {group.name}</h3>
-                    <p><strong>Date & Time:</strong> {start_time}</p>
-                    <p><strong>Duration:</strong> {duration}</p>
-                    <p><strong>Type:</strong> {defense_type}</p>
-                    <p><strong>Topic:</strong> {getattr(group, 'proposed_topic_title', 'Thesis Defense')}</p>
-                    <p><strong>Venue:</strong> {getattr(schedule_instance, 'location', 'To be announced')}</p>
-                </div>
-
-                {role_message}
-
-                <hr style="border: none; border-top: 1px solid #eee;">
-                <p style="font-size: 12px; color: #666;">
-                    This is an automated message from the Thesis Defense System.<br>
-                    © 2025 USTP
-                </p>
-            </body>
-        </html>
-        """
-
-        params = {
-            "from": "Defense System <no-reply@mails.enviscy.site>",
-            "to": [user.email],
-            "subject": f"🚀 Defense Scheduled: {group.name} - {start_time}",
-            "html": html_body,
-        }
-
-        try:
-            email = resend.Emails.send(params)
-            print(f"✅ Email sent to {user.email}, ID: {email['id']}")
-        except Exception as e:
-            print(f"❌ Email failed for {user.email}: {e}")
+    context = {
+        'group_name': group.name,
+        'start_time': start_time,
+        'duration': format_duration(end_time_manila - start_time_manila),
+        'defense_type': schedule_instance.type,
+        'topic': getattr(group, 'proposed_topic_title', 'Thesis Defense'),
+        'location': getattr(schedule_instance, 'location', 'To be announced'),
+    }
+    subject = f"🚀 Defense Scheduled: {group.name} - {start_time}"
+    rendered = DEFENSE_SCHEDULED_TEMPLATE.render(context, defense_schedule_recipients(group))
+    return enqueue_emails([(user.email, subject, html) for user, html in rendered], DEFENSE_EMAIL_SENDER,
+                          batch=True)
@@ -1,10 +1,200 @@
+import asyncio
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import wait
+
+from asgiref.sync import SyncToAsync, async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+
 from api.models.notification_models import Notification
-from api.utils.email_utils import send_notification_email
+from api.serializers.notification_serializers import NotificationSerializer
+from api.utils.email_utils import queue_notification_emails
 
-def create_notification(user, title, body='', link=''):
-    n = Notification.objects.create(user=user, title=title, body=body, link=link)
+logger = logging.getLogger(__name__)
+
+# Counters are rebuilt from the table at least this often, bounding any drift
+UNREAD_COUNT_TIMEOUT = 60 * 60
+# Recipients whose group_sends run concurrently in one step of a fan-out
+FAN_OUT_CHUNK = 200
+# cache.incr(), without creating the key, as one Redis command that can be pipelined
+INCR_IF_EXISTS = "if redis.call('exists', KEYS[1]) == 1 then return redis.call('incrby', KEYS[1], ARGV[1]) end"
+
+
+def unread_count_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def notification_group_name(user_id):
+    """Channel layer group of a user's NotificationConsumer connections"""
+    return f'notifications_{user_id}'
+
+
+def get_unread_count(user_id):
+    """The user's unread notification count, from the counter cache or one COUNT query on a miss"""
+    key = unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        # add() so a counter another request already started isn't overwritten
+        cache.add(key, count, UNREAD_COUNT_TIMEOUT)
+    return max(count, 0)
+
+
+def _incr_unread_count(user_id, delta):
+    """Atomically adjust a cached counter; None if the user has none yet"""
+    try:
+        return max(cache.incr(unread_count_key(user_id), delta), 0)
+    except ValueError:
+        return None
+
+
+def _redis_client():
+    """The Redis connection behind `cache` when it is Django's RedisCache, else None"""
+    client = getattr(cache, '_cache', None)
+    return client.get_client(write=True) if hasattr(client, 'get_client') else None
+
+
+def _incr_unread_counts(deltas):
+    """
+    Apply {user_id: delta} to the cached counters and return {user_id: new count, or
+    None if the user has none yet}. On Redis this is one pipelined round trip.
+    """
+    client = _redis_client()
+    if client is None:
+        return {user_id: _incr_unread_count(user_id, delta) for user_id, delta in deltas.items()}
+    pipeline = client.pipeline(transaction=False)
+    for user_id, delta in deltas.items():
+        pipeline.eval(INCR_IF_EXISTS, 1, cache.make_and_validate_key(unread_count_key(user_id)), delta)
+    counts = pipeline.execute()
+    return {user_id: None if count is None else max(count, 0) for user_id, count in zip(deltas, counts)}
+
+
+class NotificationFanOut:
+    """
+    Pushes new notifications to their users' sockets in the background, so a
+    notification to many users doesn't hold up the request that created it.
+
+    Under the ASGI server the push runs as a task on the server's event loop (the
+    loop the in-memory channel layer lives on); elsewhere, such as management
+    commands, on an event loop thread of its own. Recipients are sent FAN_OUT_CHUNK
+    at a time, each chunk's group_sends running concurrently.
+    """
+
+    def __init__(self, chunk_size=FAN_OUT_CHUNK):
+        self.chunk_size = chunk_size
+        self._loop = None
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    def _event_loop(self):
+        # Set by asgiref in the threads it runs sync views and database calls in
+        loop = getattr(SyncToAsync.threadlocal, 'main_event_loop', None)
+        if loop is not None and loop.is_running():
+            return loop
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='notification-fanout', daemon=True).start()
+        return self._loop
+
+    def submit(self, notifications, counts):
+        """Queue `notifications` with the unread count each one's message should carry"""
+        future = asyncio.run_coroutine_threadsafe(self._send(notifications, counts), self._event_loop())
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return future
+
+    async def _send(self, notifications, counts):
+        layer = get_channel_layer()
+        payloads = NotificationSerializer(notifications, many=True).data
+        for start in range(0, len(notifications), self.chunk_size):
+            chunk = range(start, min(start + self.chunk_size, len(notifications)))
+            results = await asyncio.gather(*(
+                layer.group_send(notification_group_name(notifications[i].user_id), {
+                    'type': 'notification.created',
+                    'notification': dict(payloads[i]),
+                    'unread_count': counts[i],
+                })
+                for i in chunk
+            ), return_exceptions=True)
+            for i, result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error publishing notification event to user {notifications[i].user_id}: {result}")
+
+    def wait(self, timeout=None):
+        """Block until every queued fan-out has been sent"""
+        return wait(list(self._futures), timeout=timeout)
+
+
+fan_out = NotificationFanOut()
+
+
+def publish(user_id, message):
+    """Send a message to the user's open notification sockets; losing it only delays the client"""
     try:
-        send_notification_email(title, body, user.email)
-    except Exception:
-        pass
-    return n
+        async_to_sync(get_channel_layer().group_send)(notification_group_name(user_id), message)
+    except Exception as e:
+        logger.error(f"Error publishing notification event to user {user_id}: {e}")
+
+
+def publish_created(notifications):
+    """
+    Once the current transaction commits, count `notifications` as unread and hand
+    them to the fan-out to push to their users. The counters are updated here,
+    in one batch, so the user's next badge read already includes them. Users without
+    a counter are counted from the table on their next read.
+    """
+    def deliver():
+        per_user = Counter(notification.user_id for notification in notifications)
+        totals = _incr_unread_counts(per_user)
+        # A user notified several times sees the count climb to its total, one message at a time
+        remaining = dict(per_user)
+        counts = []
+        for notification in notifications:
+            user_id = notification.user_id
+            remaining[user_id] -= 1
+            counts.append(None if totals[user_id] is None else max(totals[user_id] - remaining[user_id], 0))
+        fan_out.submit(notifications, counts)
+    transaction.on_commit(deliver)
+
+
+def adjust_unread_counts(deltas):
+    """Apply {user_id: delta} to the cached counters once the current transaction commits, and push the new counts"""
+    def apply():
+        for user_id, delta in deltas.items():
+            count = _incr_unread_count(user_id, delta)
+            publish(user_id, {'type': 'unread.count', 'unread_count': get_unread_count(user_id) if count is None else count})
+    transaction.on_commit(apply)
+
+
+def reset_unread_count(user_id):
+    """Recount a user's unread notifications after a change that isn't a simple increment, once it commits"""
+    def apply():
+        cache.delete(unread_count_key(user_id))
+        publish(user_id, {'type': 'unread.count', 'unread_count': get_unread_count(user_id)})
+    transaction.on_commit(apply)
+
+
+def notify_users(users, title, body='', link=''):
+    """
+    Notify every user in `users` with one INSERT for the notifications and one for
+    their emails, which the outbox worker sends later. The cost doesn't grow with
+    the number of recipients beyond the size of those two statements.
+    """
+    users = [user for user in users if user]
+    if not users:
+        return []
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create([
+            Notification(user=user, title=title, body=body, link=link) for user in users
+        ])
+        queue_notification_emails(users, title, body)
+        publish_created(notifications)
+    return notifications
+
+
+def create_notification(user, title, body='', link=''):
+    return notify_users([user], title, body, link)[0]
@@ -0,0 +1,276 @@
+"""
+Operational transformation for plain-text documents.
+
+A TextOperation walks the whole document as a list of components: a positive int
+retains that many characters, a negative int deletes that many and a str inserts
+it. `transform` and `compose` follow the ot.js algorithms, so a client built on
+ot.js can talk to DocumentState directly.
+"""
+
+
+class OperationError(ValueError):
+    """An operation doesn't fit the document or revision it was applied to"""
+
+
+def is_count(component):
+    """An int component; bool is an int subclass but never a valid retain or delete"""
+    return isinstance(component, int) and not isinstance(component, bool)
+
+
+def is_retain(component):
+    return is_count(component) and component > 0
+
+
+def is_delete(component):
+    return is_count(component) and component < 0
+
+
+def is_insert(component):
+    return isinstance(component, str)
+
+
+class TextOperation:
+    __slots__ = ('ops', 'base_length', 'target_length')
+
+    def __init__(self, ops=()):
+        self.ops = []
+        self.base_length = 0
+        self.target_length = 0
+        for component in ops:
+            if is_insert(component):
+                self.insert(component)
+            elif is_retain(component):
+                self.retain(component)
+            elif is_delete(component):
+                self.delete(component)
+            else:
+                raise OperationError(f'Invalid operation component: {component!r}')
+
+    def __eq__(self, other):
+        return isinstance(other, TextOperation) and self.ops == other.ops
+
+    def __repr__(self):
+        return f'TextOperation({self.ops!r})'
+
+    @classmethod
+    def from_change(cls, operation, position, doc_length, content='', length=0):
+        """Build an operation from a positional insert/delete/replace change"""
+        try:
+            position, length = int(position), int(length or 0)
+        except (TypeError, ValueError):
+            raise OperationError('Position and length must be integers')
+        if operation == 'insert':
+            length = 0
+        elif operation == 'delete':
+            content = ''
+        elif operation != 'replace':
+            raise OperationError(f'Unknown operation: {operation!r}')
+        if position < 0 or length < 0 or position + length > doc_length:
+            raise OperationError('Change falls outside the document')
+        return cls().retain(position).insert(content or '').delete(length).retain(doc_length - position - length)
+
+    def retain(self, n):
+        if n <= 0:
+            return self
+        self.base_length += n
+        self.target_length += n
+        if self.ops and is_retain(self.ops[-1]):
+            self.ops[-1] += n
+        else:
+            self.ops.append(n)
+        return self
+
+    def insert(self, text):
+        if not text:
+            return self
+        self.target_length += len(text)
+        ops = self.ops
+        if ops and is_insert(ops[-1]):
+            ops[-1] += text
+        elif ops and is_delete(ops[-1]):
+            # Keep inserts ahead of deletes so equivalent operations compare equal
+            if len(ops) > 1 and is_insert(ops[-2]):
+                ops[-2] += text
+            else:
+                ops.append(ops[-1])
+                ops[-2] = text
+        else:
+            ops.append(text)
+        return self
+
+    def delete(self, n):
+        n = abs(n)
+        if n == 0:
+            return self
+        self.base_length += n
+        if self.ops and is_delete(self.ops[-1]):
+            self.ops[-1] -= n
+        else:
+            self.ops.append(-n)
+        return self
+
+    def is_noop(self):
+        return not self.ops or (len(self.ops) == 1 and is_retain(self.ops[0]))
+
+    def apply(self, text):
+        if len(text) != self.base_length:
+            raise OperationError('Operation base length does not match the document length')
+        parts = []
+        index = 0
+        for component in self.ops:
+            if is_retain(component):
+                parts.append(text[index:index + component])
+                index += component
+            elif is_insert(component):
+                parts.append(component)
+            else:
+                index -= component
+        return ''.join(parts)
+
+
+def _components(operation):
+    yield from operation.ops
+    while True:
+        yield None
+
+
+def compose(a, b):
+    """Return one operation with the effect of applying `a` then `b`"""
+    if a.target_length != b.base_length:
+        raise OperationError('Cannot compose operations: lengths do not line up')
+    result = TextOperation()
+    ops1, ops2 = _components(a), _components(b)
+    op1, op2 = next(ops1), next(ops2)
+    while op1 is not None or op2 is not None:
+        if is_delete(op1):
+            result.delete(op1)
+            op1 = next(ops1)
+            continue
+        if is_insert(op2):
+            result.insert(op2)
+            op2 = next(ops2)
+            continue
+        if op1 is None or op2 is None:
+            raise OperationError('Cannot compose operations: first operation is too short')
+
+        if is_retain(op1) and is_retain(op2):
+            if op1 > op2:
+                result.retain(op2)
+                op1, op2 = op1 - op2, next(ops2)
+            elif op1 == op2:
+                result.retain(op1)
+                op1, op2 = next(ops1), next(ops2)
+            else:
+                result.retain(op1)
+                op1, op2 = next(ops1), op2 - op1
+        elif is_insert(op1) and is_delete(op2):
+            if len(op1) > -op2:
+                op1, op2 = op1[-op2:], next(ops2)
+            elif len(op1) == -op2:
+                op1, op2 = next(ops1), next(ops2)
+            else:
+                op1, op2 = next(ops1), op2 + len(op1)
+        elif is_insert(op1) and is_retain(op2):
+            if len(op1) > op2:
+                result.insert(op1[:op2])
+                op1, op2 = op1[op2:], next(ops2)
+            elif len(op1) == op2:
+                result.insert(op1)
+                op1, op2 = next(ops1), next(ops2)
+            else:
+                result.insert(op1)
+                op1, op2 = next(ops1), op2 - len(op1)
+        else:  # retain then delete
+            if op1 > -op2:
+                result.delete(op2)
+                op1, op2 = op1 + op2, next(ops2)
+            elif op1 == -op2:
+                result.delete(op2)
+                op1, op2 = next(ops1), next(ops2)
+            else:
+                result.delete(op1)
+                op1, op2 = next(ops1), op2 + op1
+    return result
+
+
+def transform(a, b):
+    """
+    Transform two concurrent operations on the same document into (a', b') so
+    that applying a then b' gives the same text as b then a'. Inserts at the
+    same position from `a` land first.
+    """
+    if a.base_length != b.base_length:
+        raise OperationError('Cannot transform operations on different document lengths')
+    a_prime, b_prime = TextOperation(), TextOperation()
+    ops1, ops2 = _components(a), _components(b)
+    op1, op2 = next(ops1), next(ops2)
+    while op1 is not None or op2 is not None:
+        if is_insert(op1):
+            a_prime.insert(op1)
+            b_prime.retain(len(op1))
+            op1 = next(ops1)
+            continue
+        if is_insert(op2):
+            a_prime.retain(len(op2))
+            b_prime.insert(op2)
+            op2 = next(ops2)
+            continue
+        if op1 is None or op2 is None:
+            raise OperationError('Cannot transform operations: one is too short')
+
+        if is_retain(op1) and is_retain(op2):
+            if op1 > op2:
+                length, op1, op2 = op2, op1 - op2, next(ops2)
+            elif op1 == op2:
+                length, op1, op2 = op2, next(ops1), next(ops2)
+            else:
+                length, op1, op2 = op1, next(ops1), op2 - op1
+            a_prime.retain(length)
+            b_prime.retain(length)
+        elif is_delete(op1) and is_delete(op2):
+            # Both sides deleted the same text; neither needs to delete it again
+            if -op1 > -op2:
+                op1, op2 = op1 - op2, next(ops2)
+            elif op1 == op2:
+                op1, op2 = next(ops1), next(ops2)
+            else:
+                op1, op2 = next(ops1), op2 - op1
+        elif is_delete(op1) and is_retain(op2):
+            if -op1 > op2:
+                length, op1, op2 = op2, op1 + op2, next(ops2)
+            elif -op1 == op2:
+                length, op1, op2 = op2, next(ops1), next(ops2)
+            else:
+                length, op1, op2 = -op1, next(ops1), op2 + op1
+            a_prime.delete(length)
+        else:  # retain against delete
+            if op1 > -op2:
+                length, op1, op2 = -op2, op1 + op2, next(ops2)
+            elif op1 == -op2:
+                length, op1, op2 = op1, next(ops1), next(ops2)
+            else:
+                length, op1, op2 = op1, next(ops1), op2 + op1
+            b_prime.delete(length)
+    return a_prime, b_prime
+
+
+def transform_position(operation, position, after_inserts=False):
+    """
+    Where `position` in the text `operation` applies to ends up once it is applied.
+    Text inserted exactly at `position` lands before it if `after_inserts` is set,
+    otherwise after it; a deleted position moves to where the deletion was.
+    """
+    index = 0
+    new_position = position
+    for component in operation.ops:
+        if index > position:
+            break
+        if is_retain(component):
+            index += component
+        elif is_insert(component):
+            if index < position or after_inserts:
+                new_position += len(component)
+        else:
+            new_position -= min(-component, position - index)
+            index -= component
+    return new_position
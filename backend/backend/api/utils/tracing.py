@@ -0,0 +1,29 @@
+import logging
+
+
+class Tracer:
+    """
+    Level-gated structured logging for request tracing.
+
+    Calls are a single isEnabledFor() check when DEBUG is off for the logger.
+    Only pass values that are already loaded; never pass querysets or
+    anything that would hit the database to format.
+    """
+
+    def __init__(self, name):
+        self.logger = logging.getLogger(name)
+
+    @property
+    def enabled(self):
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def __call__(self, event, **fields):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                '%s %s', event, ' '.join(f'{key}={value!r}' for key, value in fields.items()),
+                extra={'trace_event': event, 'trace_fields': fields}
+            )
+
+
+def get_tracer(name):
+    return Tracer(name)
@@ -7,10 +7,15 @@ from api.models.thesis_models import Thesis
 from api.serializers.document_serializers import DocumentSerializer
 from api.permissions.role_permissions import IsStudent, IsDocumentOwnerOrGroupMember
 from api.services.google_drive_service import drive_service
+from api.services.drive_uploads import UploadQueueFull, upload_pipeline
+from api.services.operation_log import HistoryUnavailable, replay_document
+from api.utils.ot import OperationError
+from api.pagination import NewestFirstPagination
 
 class DocumentViewSet(viewsets.ModelViewSet):
     queryset = Document.objects.all().select_related('thesis','uploaded_by')
     serializer_class = DocumentSerializer
+    pagination_class = NewestFirstPagination
     permission_classes = [permissions.IsAuthenticated, IsDocumentOwnerOrGroupMember]
 
     def create(self, request, *args, **kwargs):
@@ -45,7 +50,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
             )
     
     def _handle_drive_upload(self, request):
-        """Handle Google Drive upload"""
+        """Accept a Google Drive upload and stream it to Drive in the background"""
         try:
             file_obj = request.FILES.get('file')
             thesis_id = request.data.get('thesis')
@@ -59,44 +64,31 @@ class DocumentViewSet(viewsets.ModelViewSet):
             # Get thesis
             thesis = get_object_or_404(Thesis, id=thesis_id)
             
-            # Create a folder for the thesis if it doesn't exist
-            folder_name = f"Thesis_{thesis.id}_{thesis.title[:30]}"
-            success, folder_id = drive_service.create_folder(folder_name)
-            
-            if not success:
-                return Response(
-                    {'error': 'Failed to create Google Drive folder'}, 
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            # Upload file to Google Drive
-            file_content = file_obj.read()
-            filename = file_obj.name
-            mime_type = file_obj.content_type or 'application/octet-stream'
-            
-            success, file_info = drive_service.upload_file(
-                file_content, filename, mime_type, folder_id
-            )
-            
-            if not success:
-                return Response(
-                    {'error': 'Failed to upload file to Google Drive'}, 
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-            
-            # Create document record
+            # The document stays PENDING until the upload worker marks it READY or FAILED
             document = Document.objects.create(
                 thesis=thesis,
                 uploaded_by=request.user,
                 provider='drive',
-                google_drive_file_id=file_info['id'],
-                google_drive_embed_url=file_info['embed_url'],
-                file_size=int(file_info.get('size', 0)),
-                mime_type=file_info.get('mime_type', mime_type)
+                status='PENDING',
+                file_size=file_obj.size,
+                mime_type=file_obj.content_type or 'application/octet-stream'
             )
             
+            try:
+                upload_pipeline.submit(document, file_obj)
+            except UploadQueueFull:
+                document.delete()
+                return Response(
+                    {'error': 'Too many uploads in progress, try again shortly'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={'Retry-After': '30'}
+                )
+            except Exception:
+                document.delete()
+                raise
+            
             serializer = self.get_serializer(document)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
             return Response(
@@ -144,6 +136,37 @@ class DocumentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Text of the live-edited document at ?version= (default: latest), replayed from the nearest snapshot"""
+        document = self.get_object()
+        version = request.query_params.get('version')
+        try:
+            version = int(version) if version is not None else None
+        except ValueError:
+            return Response(
+                {'error': 'version must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            text, version, snapshot_version = replay_document(document.id, version)
+        except HistoryUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+        except OperationError as e:
+            # A logged operation doesn't fit the text replayed before it
+            return Response(
+                {'error': f'History of document {document.id} cannot be replayed: {e}'},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return Response({
+            'document': document.id,
+            'version': version,
+            'snapshot_version': snapshot_version,
+            'text': text
+        })
+    
     @action(detail=True, methods=['delete'], url_path='delete-from-drive')
     def delete_from_drive(self, request, pk=None):
         """Delete file from Google Drive and database"""
@@ -2,6 +2,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from api.models.thesis_models import Thesis
+from api.permissions.membership import get_group_membership
+from api.permissions.role_permissions import IsAdmin
+from api.services.docs_content_cache import docs_content_cache
 from api.services.google_docs_service import google_docs_service
 from django.conf import settings
 import logging
@@ -91,15 +97,30 @@ def create_google_doc(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+def revision_etag(revision_id):
+    return f'"{revision_id}"'
+
+def revalidated(response, revision_id):
+    """Tag a content response with its revision; browsers must revalidate before reusing it"""
+    if revision_id:
+        response['ETag'] = revision_etag(revision_id)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_google_doc_content(request, document_id):
-    """Get Google Doc content"""
+    """Get Google Doc content; the revision id is the ETag, so clients can revalidate with If-None-Match"""
     try:
+        revision_id = docs_content_cache.revision(document_id)
+        if revision_id and request.headers.get('If-None-Match') == revision_etag(revision_id):
+            docs_content_cache.record(hit=True)
+            return revalidated(Response(status=status.HTTP_304_NOT_MODIFIED), revision_id)
+        
         document = google_docs_service.get_document_content(document_id)
         
         if document:
-            return Response(document)
+            return revalidated(Response(document), document.get('revisionId'))
         else:
             return Response(
                 {'error': 'Document not found or access denied'},
@@ -173,3 +194,61 @@ def share_google_doc(request, document_id):
             {'error': 'Internal server error'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+def thesis_share_recipients(thesis):
+    """(email, role) for everyone working on a thesis: its group's members edit, the adviser and panels comment"""
+    group = thesis.group
+    recipients = {}
+    for user in group.panels.all():
+        recipients[user.email] = 'commenter'
+    if group.adviser:
+        recipients[group.adviser.email] = 'commenter'
+    for user in group.members.all():
+        recipients[user.email] = 'writer'
+    return [(email, role) for email, role in recipients.items() if email]
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def share_google_doc_with_thesis(request, document_id):
+    """Share Google Doc with the group members, adviser and panels of a thesis in one batch"""
+    try:
+        thesis_id = request.data.get('thesis')
+        
+        if not thesis_id:
+            return Response(
+                {'error': 'Thesis ID is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        thesis = get_object_or_404(
+            Thesis.objects.select_related('group__adviser'), id=thesis_id
+        )
+        if request.user.role != 'ADMIN' and thesis.group_id not in get_group_membership(request):
+            return Response(
+                {'error': 'You are not part of this thesis'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        results = google_docs_service.share_document_with_many(document_id, thesis_share_recipients(thesis))
+        shared = [email for email, permission in results.items() if permission]
+        failed = [email for email, permission in results.items() if not permission]
+        
+        return Response(
+            {'shared': shared, 'failed': failed},
+            status=status.HTTP_200_OK if shared or not failed else status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+        
+    except Http404:
+        raise
+    except Exception as e:
+        logger.error(f"Error sharing Google Doc with thesis: {e}")
+        return Response(
+            {'error': 'Internal server error'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def google_doc_cache_stats(request):
+    """Hit ratio of the Google Docs content cache"""
+    return Response(docs_content_cache.stats())
@@ -3,71 +3,60 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db import models
+from django.db.models import prefetch_related_objects
 from api.models.group_models import Group
 from api.models.user_models import User
 from api.models.thesis_models import Thesis
 from api.serializers.group_serializers import GroupSerializer
 from api.permissions.role_permissions import IsAdviserForGroup, IsGroupMemberOrAdmin
+from api.permissions.membership import get_group_membership
+from api.pagination import CreatedAtPagination
+from api.utils.tracing import get_tracer
 
-print("DEBUG: group_views.py module loaded!")
+trace = get_tracer(__name__)
 
 
 class GroupViewSet(viewsets.ModelViewSet):
-    queryset = Group.objects.all().prefetch_related('members', 'panels')
+    queryset = Group.objects.all()
     serializer_class = GroupSerializer
+    pagination_class = CreatedAtPagination
     permission_classes = [permissions.IsAuthenticated, IsAdviserForGroup, IsGroupMemberOrAdmin]
 
-    def __init__(self, *args, **kwargs):
-        print("DEBUG: GroupViewSet initialized!")
-        super().__init__(*args, **kwargs)
+    def get_serializer(self, *args, **kwargs):
+        # A list payload on create proposes several groups in one request
+        if self.action == 'create' and isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
 
     def perform_create(self, serializer):
-        # Set status based on user role
-        user = self.request.user
-        # Only set default if frontend didn't send a value
-        if 'status' not in serializer.validated_data:
-            if user.role == 'STUDENT':
-                serializer.save(status='PENDING')
-            elif user.role in ['ADMIN', 'ADVISER']:
-                serializer.save(status='APPROVED')
-            else:
-                serializer.save(status='PENDING')
-        else:
-            # Use frontend-provided status
-            serializer.save()
+        # Default the status by role, only for groups the frontend didn't send one for
+        default_status = 'APPROVED' if self.request.user.role in ['ADMIN', 'ADVISER'] else 'PENDING'
+        validated = serializer.validated_data
+        for item in validated if isinstance(validated, list) else [validated]:
+            item.setdefault('status', default_status)
+        serializer.save()
 
     def get_object(self):
-        print(f"DEBUG: get_object called for pk={self.kwargs.get('pk')}, action: {self.action}")
+        trace('group.get_object', pk=self.kwargs.get('pk'), action=self.action)
 
         # For approve, reject, assign_adviser, assign_panel, and remove_panel actions, always use unfiltered queryset
         if self.action in ['approve', 'reject', 'assign_adviser', 'assign_panel', 'remove_panel']:
-            print(f"DEBUG: Using unfiltered queryset for {self.action}")
-            queryset = Group.objects.all()
-            obj = get_object_or_404(queryset, pk=self.kwargs.get('pk'))
-            print(f"DEBUG: Found object: {obj.name}, ID: {obj.id}, Status: {obj.status}")
+            obj = get_object_or_404(self.get_queryset(), pk=self.kwargs.get('pk'))
+            trace('group.found', id=obj.id, status=obj.status, unfiltered=True)
             return obj
 
         # For all other actions, use the parent's get_object
-        try:
-            obj = super().get_object()
-            print(f"DEBUG: Found object: {obj.name}, ID: {obj.id}")
-            return obj
-        except Exception as e:
-            print(f"DEBUG: get_object failed: {e}")
-            raise
+        obj = super().get_object()
+        trace('group.found', id=obj.id, status=obj.status)
+        return obj
 
     def get_queryset(self):
         # For approve, reject, assign_adviser, assign_panel, and remove_panel actions, don't filter at all
         if self.action in ['approve', 'reject', 'assign_adviser', 'assign_panel', 'remove_panel']:
-            print(f"DEBUG: {self.action} action - using unfiltered queryset")
-            return Group.objects.all()
+            return self.with_serializer_plan(Group.objects.all())
 
         queryset = super().get_queryset()
-
-        # Debug logging
-        print(f"get_queryset called for: {self.request.user.email}, Role: {self.request.user.role}")
-        print(f"Action: {self.action}")
-        print(f"Original queryset count: {queryset.count()}")
+        trace('group.get_queryset', user=self.request.user.email, role=self.request.user.role, action=self.action)
 
         # For detail views (retrieve, update, delete), apply special student logic
         if self.action in ['retrieve', 'update', 'partial_update', 'destroy']:
@@ -75,37 +64,24 @@ class GroupViewSet(viewsets.ModelViewSet):
                 if self.request.user.role == 'STUDENT':
                     # Students can see approved groups AND their own pending proposals
                     # First get all groups where user is member/adviser/panel
-                    user_groups = Group.objects.filter(
-                        models.Q(members=self.request.user) |
-                        models.Q(adviser=self.request.user) |
-                        models.Q(panels=self.request.user)
-                    )
-                    print(f"Groups where user is member/adviser/panel: {user_groups.count()}")
+                    user_groups = Group.objects.filter(id__in=get_group_membership(self.request).group_ids)
 
                     # Then filter those groups by status (APPROVED or PENDING)
                     filtered_groups = user_groups.filter(
                         models.Q(status='APPROVED') |
                         models.Q(status='PENDING')
                     )
-                    print(f"After status filtering: {filtered_groups.count()}")
-                    for group in filtered_groups:
-                        print(f"  - ID: {group.id}, Name: {group.name}, Status: {group.status}")
 
                     queryset = filtered_groups
                 else:
                     # Advisers and panels can only see approved groups
                     queryset = queryset.filter(status='APPROVED')
-                    print(f"Adviser/Panel filtered queryset count: {queryset.count()}")
         else:
             # For list views, only show approved groups to everyone except for special endpoints
             # The main groups list should only show approved groups for all users
             # Admins can see pending groups in the "Group Proposals" tab
-            print(f"Checking action: {self.action}")
-            print(
-                f"Is action in excluded list? {self.action not in ['pending_proposals', 'get_current_user_groups', 'approve', 'reject']}")
             if self.action not in ['pending_proposals', 'get_current_user_groups', 'approve', 'reject']:
                 queryset = queryset.filter(status='APPROVED')
-                print(f"List view filtered queryset count: {queryset.count()}")
 
         search_query = self.request.query_params.get('search', None)
         keywords = self.request.query_params.get('keywords', None)
@@ -118,20 +94,27 @@ class GroupViewSet(viewsets.ModelViewSet):
         elif topics:
             queryset = Group.objects.search_by_topics(topics)
 
-        return queryset
+        return self.with_serializer_plan(queryset)
+
+    def with_serializer_plan(self, queryset):
+        """Apply the serializer's select/prefetch plan so any page size costs the same queries"""
+        return self.get_serializer_class().setup_eager_loading(queryset)
+
+    def serialize_group(self, group):
+        """Serialize a group after a mutation, reloading only relations whose cache was cleared"""
+        prefetch_related_objects([group], *self.get_serializer_class().related_prefetches())
+        return self.get_serializer(group).data
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def approve(self, request, pk=None):
         """Approve a group proposal (Admin only)"""
-        print(f"DEBUG: approve action called for pk={pk}")
-        print(f"DEBUG: User role: {request.user.role}")
+        trace('group.approve', pk=pk, role=request.user.role)
 
         if request.user.role != 'ADMIN':
             return Response({'error': 'Only admins can approve groups'}, status=403)
 
         try:
             group = self.get_object()
-            print(f"DEBUG: Found group: {group.name}, Status: {group.status}")
             if group.status != 'PENDING':
                 return Response({'error': 'Only pending groups can be approved'}, status=400)
 
@@ -156,10 +139,9 @@ class GroupViewSet(viewsets.ModelViewSet):
 
             group.status = 'APPROVED'
             group.save()
-            serializer = self.get_serializer(group)
-            return Response(serializer.data)
+            return Response(self.serialize_group(group))
         except Exception as e:
-            print(f"DEBUG: approve failed: {e}")
+            trace('group.approve_failed', pk=pk, error=str(e))
             return Response({'error': str(e)}, status=404)
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
@@ -174,8 +156,7 @@ class GroupViewSet(viewsets.ModelViewSet):
 
         group.status = 'REJECTED'
         group.save()
-        serializer = self.get_serializer(group)
-        return Response(serializer.data)
+        return Response(self.serialize_group(group))
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def pending_proposals(self, request):
@@ -183,25 +164,17 @@ class GroupViewSet(viewsets.ModelViewSet):
         if request.user.role != 'ADMIN':
             return Response({'error': 'Only admins can view pending proposals'}, status=403)
 
-        pending_groups = Group.objects.filter(status='PENDING').prefetch_related('members', 'panels')
+        pending_groups = self.with_serializer_plan(Group.objects.filter(status='PENDING'))
         serializer = self.get_serializer(pending_groups, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def get_current_user_groups(self, request):
-        print("DEBUG: get_current_user_groups called!")
         user = request.user
-        print(f"get_current_user_groups called for: {user.email}, Role: {user.role}")
+        trace('group.current_user_groups', user=user.email, role=user.role)
 
         # Get groups where user is a member, adviser, or panel
-        groups = Group.objects.filter(
-            models.Q(members=user) |
-            models.Q(adviser=user) |
-            models.Q(panels=user)
-        )
-        print(f"Groups where user is member/adviser/panel: {groups.count()}")
-        for group in groups:
-            print(f"  - ID: {group.id}, Name: {group.name}, Status: {group.status}")
+        groups = Group.objects.filter(id__in=get_group_membership(request).group_ids)
 
         # Non-admin users can only see approved groups, 
         # but students can see their own pending proposals
@@ -214,14 +187,11 @@ class GroupViewSet(viewsets.ModelViewSet):
                     models.Q(status='APPROVED') |
                     models.Q(status='PENDING')
                 )
-                print(f"After status filtering: {groups.count()}")
-                for group in groups:
-                    print(f"  - ID: {group.id}, Name: {group.name}, Status: {group.status}")
             else:
                 # Advisers and panels can only see approved groups
                 groups = groups.filter(status='APPROVED')
 
-        groups = groups.prefetch_related('members', 'panels')
+        groups = self.with_serializer_plan(groups)
         serializer = self.get_serializer(groups, many=True)
         return Response(serializer.data)
 
@@ -235,7 +205,7 @@ class GroupViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
         group.members.add(user)
         group.save()
-        return Response(self.get_serializer(group).data)
+        return Response(self.serialize_group(group))
 
     @action(detail=True, methods=['post'])
     def remove_member(self, request, pk=None):
@@ -247,42 +217,33 @@ class GroupViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
         group.members.remove(user)
         group.save()
-        return Response(self.get_serializer(group).data)
+        return Response(self.serialize_group(group))
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def assign_adviser(self, request, pk=None):
         """Assign an adviser to a group (Admin only)"""
-        print(f"DEBUG: assign_adviser called for pk={pk}")
-        print(f"DEBUG: User: {request.user.email}, Role: {request.user.role}")
+        trace('group.assign_adviser', pk=pk, user=request.user.email, role=request.user.role)
 
         if request.user.role != 'ADMIN':
-            print(f"DEBUG: User is not admin, returning 403")
             return Response({'error': 'Only admins can assign advisers'}, status=status.HTTP_403_FORBIDDEN)
 
-        print(f"DEBUG: About to call get_object()")
         group = self.get_object()
-        print(f"DEBUG: Found group: {group.name if group else 'None'}")
         adviser_id = request.data.get('adviser_id')
-        print(f"DEBUG: adviser_id from request: {adviser_id}")
 
         if not adviser_id:
-            print(f"DEBUG: adviser_id is required, returning 400")
             return Response({'error': 'adviser_id is required'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             adviser = User.objects.get(pk=adviser_id, role='ADVISER')
-            print(f"DEBUG: Found adviser: {adviser.email}")
         except User.DoesNotExist:
-            print(f"DEBUG: Adviser not found, returning 404")
+            trace('group.assign_adviser_missing', adviser_id=adviser_id)
             return Response({'error': 'Adviser not found or user is not an adviser'}, status=status.HTTP_404_NOT_FOUND)
 
-        print(f"DEBUG: About to assign adviser to group")
         group.adviser = adviser
         group.save()
-        print(f"DEBUG: Adviser assigned successfully")
+        trace('group.adviser_assigned', id=group.id, adviser_id=adviser.id)
 
-        serializer = self.get_serializer(group)
-        return Response(serializer.data)
+        return Response(self.serialize_group(group))
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def assign_panel(self, request, pk=None):
@@ -311,8 +272,7 @@ class GroupViewSet(viewsets.ModelViewSet):
         group.panels.set(panel_users)
         group.save()
 
-        serializer = self.get_serializer(group)
-        return Response(serializer.data)
+        return Response(self.serialize_group(group))
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def remove_panel(self, request, pk=None):
@@ -340,5 +300,4 @@ class GroupViewSet(viewsets.ModelViewSet):
         group.panels.remove(panel_user)
         group.save()
 
-        serializer = self.get_serializer(group)
-        return Response(serializer.data)
+        return Response(self.serialize_group(group))
@@ -1,13 +1,16 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from api.models.notification_models import Notification
-from api.serializers.notification_serializers import NotificationSerializer
+from api.models.notification_models import ArchivedNotification, Notification
+from api.serializers.notification_serializers import ArchivedNotificationSerializer, NotificationSerializer
 from api.permissions.role_permissions import CanManageNotifications
+from api.pagination import NewestFirstPagination
+from api.utils.notifications import adjust_unread_counts, get_unread_count, publish_created, reset_unread_count
 
 class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all().select_related('user')
     serializer_class = NotificationSerializer
+    pagination_class = NewestFirstPagination
     permission_classes = [permissions.IsAuthenticated, CanManageNotifications]
 
     def get_queryset(self):
@@ -16,9 +19,59 @@ class NotificationViewSet(viewsets.ModelViewSet):
             return Notification.objects.all()
         return Notification.objects.filter(user=self.request.user)
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # ?is_read=false lists only unread notifications, served by notif_user_read_created_idx
+        is_read = self.request.query_params.get('is_read')
+        if self.action == 'list' and is_read in ('true', 'false'):
+            queryset = queryset.filter(is_read=is_read == 'true')
+        return queryset
+
+    def perform_create(self, serializer):
+        n = serializer.save()
+        if not n.is_read:
+            publish_created([n])
+
+    def perform_update(self, serializer):
+        serializer.save()
+        reset_unread_count(serializer.instance.user_id)
+
+    def perform_destroy(self, instance):
+        user_id = instance.user_id
+        instance.delete()
+        reset_unread_count(user_id)
+
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         n = self.get_object()
+        # Only the request that actually flips the row decrements the counter
+        if Notification.objects.filter(pk=n.pk, is_read=False).update(is_read=True):
+            adjust_unread_counts({n.user_id: -1})
         n.is_read = True
-        n.save()
         return Response(self.get_serializer(n).data)
+
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """Mark all of the user's notifications read in one UPDATE"""
+        updated = Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        if updated:
+            reset_unread_count(request.user.pk)
+        return Response({'updated': updated})
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """The user's unread count for badges, without listing notifications"""
+        return Response({'unread_count': get_unread_count(request.user.pk)})
+
+
+class ArchivedNotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """Read notifications past NOTIFICATION_RETENTION_DAYS, kept out of the hot table"""
+    queryset = ArchivedNotification.objects.all()
+    serializer_class = ArchivedNotificationSerializer
+    pagination_class = NewestFirstPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.role == 'ADMIN':
+            return ArchivedNotification.objects.all()
+        return ArchivedNotification.objects.filter(user=self.request.user)
@@ -6,7 +6,8 @@ from django.db import transaction, models
 from api.models.schedule_models import DefenseSchedule
 from api.serializers.schedule_serializers import ScheduleSerializer, ScheduleAvailabilitySerializer
 from api.permissions.role_permissions import IsAdviser, IsAdviserOrPanelForSchedule
-from api.utils.email_utils import send_defense_scheduled_email
+from api.utils.email_utils import queue_defense_scheduled_email
+from api.pagination import StartAtPagination
 
 def get_user_display_name(user):
     if hasattr(user, 'get_full_name') and callable(user.get_full_name):
@@ -25,6 +26,7 @@ def get_user_display_name(user):
 class ScheduleViewSet(viewsets.ModelViewSet):
     queryset = DefenseSchedule.objects.all().select_related('group', 'created_by')
     serializer_class = ScheduleSerializer
+    pagination_class = StartAtPagination
     permission_classes = [permissions.IsAuthenticated, IsAdviserOrPanelForSchedule]
 
     def get_queryset(self):
@@ -43,27 +45,10 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         return queryset
 
     def perform_create(self, serializer):
-        group = serializer.validated_data['group']
-
-        members = group.members.all()
-        member_emails = []
-        adviser_email = ''
-        panel_emails = []
-        for member in members:
-            member_emails.append(member.email)
-
-        if group.adviser:
-            adviser_email = group.adviser.email
-
-        for panel in group.panels.all():
-            panel_emails.append(panel.email)
-
-        print('member emails: ', member_emails)
-        print('panel emails: ', panel_emails)
-        print('adviser email: ', adviser_email)
+        # The emails are sent by the outbox worker once this commits
         with transaction.atomic():
             instance = serializer.save(created_by=self.request.user)
-            send_defense_scheduled_email(instance)
+            queue_defense_scheduled_email(instance)
 
     def perform_update(self, serializer):
         with transaction.atomic():
@@ -93,30 +78,42 @@ class ScheduleViewSet(viewsets.ModelViewSet):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
 
-        conflicts = []
+        # One fetch covers the requested range plus anything that can still
+        # overlap its edges; conflicts are then paired up in memory.
         user_schedules = DefenseSchedule.objects.filter(
             models.Q(group__adviser=user) |
             models.Q(group__panels=user)
-        ).distinct()
+        ).select_related('group').distinct()
 
+        in_range = models.Q()
         if start_date:
-            user_schedules = user_schedules.filter(start_at__gte=start_date)
+            user_schedules = user_schedules.filter(end_at__gt=start_date)
+            in_range &= models.Q(start_at__gte=start_date)
         if end_date:
-            user_schedules = user_schedules.filter(end_at__lte=end_date)
+            user_schedules = user_schedules.filter(start_at__lt=end_date)
+            in_range &= models.Q(end_at__lte=end_date)
 
+        if in_range:
+            user_schedules = user_schedules.annotate(
+                in_range=models.ExpressionWrapper(in_range, output_field=models.BooleanField())
+            )
+
+        user_schedules = list(user_schedules)
+        overlaps = DefenseSchedule.find_overlaps(user_schedules)
+        serialized = dict(zip(
+            (s.id for s in user_schedules),
+            ScheduleSerializer(user_schedules, many=True).data
+        ))
+
+        conflicts = []
         for schedule in user_schedules:
-            conflicting_schedules = DefenseSchedule.objects.filter(
-                models.Q(start_at__lt=schedule.end_at) &
-                models.Q(end_at__gt=schedule.start_at)
-            ).exclude(id=schedule.id).filter(
-                models.Q(group__adviser=user) |
-                models.Q(group__panels=user)
-            ).distinct()
-
-            if conflicting_schedules.exists():
+            if not getattr(schedule, 'in_range', True):
+                continue
+            conflicting = sorted(overlaps[schedule.id], key=lambda s: (s.start_at, s.id))
+            if conflicting:
                 conflicts.append({
-                    'schedule': ScheduleSerializer(schedule).data,
-                    'conflicts': ScheduleSerializer(conflicting_schedules, many=True).data
+                    'schedule': serialized[schedule.id],
+                    'conflicts': [serialized[s.id] for s in conflicting]
                 })
 
         return Response({
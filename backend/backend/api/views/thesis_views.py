@@ -7,10 +7,12 @@ from api.models.thesis_models import Thesis
 from api.models.group_models import Group
 from api.serializers.thesis_serializers import ThesisSerializer
 from api.permissions.role_permissions import IsStudent, IsStudentOrAdviserForThesis
-from api.utils.notifications import create_notification
+from api.utils.notifications import create_notification, notify_users
+from api.pagination import CreatedAtPagination
 
 class ThesisViewSet(viewsets.ModelViewSet):
     serializer_class = ThesisSerializer
+    pagination_class = CreatedAtPagination
     permission_classes = [permissions.IsAuthenticated, IsStudentOrAdviserForThesis]
     queryset = Thesis.objects.all()  # Required for router basename
     
@@ -29,6 +31,14 @@ class ThesisViewSet(viewsets.ModelViewSet):
             # Students can see all theses (for learning/reference) but can only modify their own
             return Thesis.objects.all().select_related('group','proposer','group__adviser')
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # ?status= narrows the list to one stage, served by thesis_status_created_idx
+        thesis_status = self.request.query_params.get('status')
+        if self.action == 'list' and thesis_status:
+            queryset = queryset.filter(status=thesis_status)
+        return queryset
+
     @action(detail=True, methods=['post'])
     def submit(self, request, pk=None):
         thesis = self.get_object()
@@ -69,8 +79,7 @@ class ThesisViewSet(viewsets.ModelViewSet):
             thesis.status = 'PROPOSAL_APPROVED'
             thesis.adviser_feedback = feedback
             thesis.save()
-            for p in thesis.group.panels.all():
-                create_notification(p, f'Thesis ready for panel review: {thesis.title}', link=f'/thesis/{thesis.id}')
+            notify_users(thesis.group.panels.all(), f'Thesis ready for panel review: {thesis.title}', link=f'/thesis/{thesis.id}')
             return Response(self.get_serializer(thesis).data)
             
         return Response({'detail':'invalid action'}, status=status.HTTP_400_BAD_REQUEST)
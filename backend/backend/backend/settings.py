@@ -56,6 +56,41 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# Channel layer shared by every Daphne worker. Without REDIS_URL fall back to the
+# in-process layer, which only reaches consumers in the same worker (tests, local dev).
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [REDIS_URL],
+                'capacity': int(os.getenv('CHANNEL_LAYER_CAPACITY', 1500)),
+                'expiry': 10,
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+    }
+
+# Cache shared by every worker and process: unread-notification counters, Docs content
+# and its hit/miss stats. Without REDIS_URL each process keeps its own (tests, local dev).
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'thesis',
+        },
+    }
+else:
+    CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }
 
 DATABASES = {
     'default': {
@@ -85,6 +120,19 @@ GOOGLE_CREDENTIALS_FILE = os.path.join(BASE_DIR, 'google_credentials.json')
 # For Service Account (alternative)
 # GOOGLE_SERVICE_ACCOUNT_FILE = os.path.join(BASE_DIR, 'service-account-key.json')
 
+# Drive uploads are streamed to resumable upload sessions by a bounded pool of
+# background threads; the document stays PENDING until its upload finishes.
+GOOGLE_DRIVE_API_ROOT = os.getenv('GOOGLE_DRIVE_API_ROOT', 'https://www.googleapis.com')
+DRIVE_UPLOAD_WORKERS = int(os.getenv('DRIVE_UPLOAD_WORKERS', 4))
+DRIVE_UPLOAD_QUEUE = int(os.getenv('DRIVE_UPLOAD_QUEUE', 16))
+DRIVE_UPLOAD_CHUNK_SIZE = int(os.getenv('DRIVE_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+# PENDING uploads older than this are assumed lost to a restart (manage.py fail_stale_uploads)
+DRIVE_UPLOAD_STALE_MINUTES = int(os.getenv('DRIVE_UPLOAD_STALE_MINUTES', 120))
+
+# Google Docs content is cached per revision; writes made through the app invalidate
+# it, edits made in Google Docs itself are picked up after this many seconds.
+GOOGLE_DOCS_CONTENT_CACHE_TIMEOUT = int(os.getenv('GOOGLE_DOCS_CONTENT_CACHE_TIMEOUT', 300))
+
 STATIC_URL = '/static/'
 STATIC_ROOT = '/app/backend/staticfiles'
 MEDIA_URL = '/media/'
@@ -103,10 +151,13 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        ('rest_framework.renderers.JSONRenderer', 'rest_framework.renderers.BrowsableAPIRenderer')
+        if DEBUG else ('rest_framework.renderers.JSONRenderer',)
     ),
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', 100)),
 }
+MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 500))
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -121,4 +172,34 @@ CORS_ALLOW_ALL_ORIGINS = True
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'noreply@example.com'
 
-
+# Transactional emails go through an outbox table drained by `manage.py process_email_outbox`.
+# The worker sends them through Resend when an API key is configured, otherwise through
+# EMAIL_BACKEND, so environments that don't send mail (console, locmem) still don't.
+# Resend allows 2 requests per second per team by default.
+EMAIL_OUTBOX_TRANSPORT = os.getenv('EMAIL_OUTBOX_TRANSPORT', 'resend' if RESEND_API_KEY else 'django')
+EMAIL_OUTBOX_CONCURRENCY = int(os.getenv('EMAIL_OUTBOX_CONCURRENCY', 4))
+EMAIL_OUTBOX_RATE_LIMIT = float(os.getenv('EMAIL_OUTBOX_RATE_LIMIT', 2))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', 30))
+
+# Read notifications older than this move to the archive table (`manage.py archive_notifications`)
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 90))
+NOTIFICATION_ARCHIVE_BATCH_SIZE = int(os.getenv('NOTIFICATION_ARCHIVE_BATCH_SIZE', 1000))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        # Set API_LOG_LEVEL=DEBUG to turn on request tracing (api.utils.tracing)
+        'api': {
+            'handlers': ['console'],
+            'level': os.getenv('API_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
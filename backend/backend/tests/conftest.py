@@ -134,3 +134,11 @@ def media_storage(settings, tmpdir):
     """Configure media storage for tests"""
     settings.MEDIA_ROOT = tmpdir.mkdir('media')
     return settings.MEDIA_ROOT
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Keep cached lookups (e.g. Drive folder ids) from leaking between tests"""
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
@@ -0,0 +1,113 @@
+"""A local HTTP stand-in for the Drive v3 endpoints used by the upload pipeline"""
+import json
+import re
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeDriveServer:
+    def __init__(self):
+        self.folders = {}
+        self.files = {}
+        self.sessions = {}
+        self.requests = Counter()
+        self.chunk_sizes = []
+        self.fail_chunks = 0
+        self.reject_uploads = False
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.url = f'http://127.0.0.1:{self._server.server_port}'
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        drive = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, code, body=None, headers=()):
+                payload = json.dumps(body).encode() if body is not None else b''
+                self.send_response(code)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def body(self):
+                return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                data = self.body()
+                with drive.lock:
+                    if url.path == '/drive/v3/files':
+                        drive.requests['create_folder'] += 1
+                        folder_id = f'folder-{drive.requests["create_folder"]}'
+                        drive.folders[folder_id] = json.loads(data)
+                        return self.reply(200, {'id': folder_id})
+                    if re.fullmatch(r'/drive/v3/files/[^/]+/permissions', url.path):
+                        drive.requests['share'] += 1
+                        return self.reply(200, {'id': 'anyoneWithLink'})
+                    if url.path == '/upload/drive/v3/files' and parse_qs(url.query)['uploadType'] == ['resumable']:
+                        drive.requests['start_upload'] += 1
+                        if drive.reject_uploads:
+                            return self.reply(403, {'error': 'storageQuotaExceeded'})
+                        session_id = str(len(drive.sessions) + 1)
+                        drive.sessions[session_id] = {
+                            'metadata': json.loads(data),
+                            'mime_type': self.headers['X-Upload-Content-Type'],
+                            'data': bytearray(),
+                        }
+                        return self.reply(200, headers=[('Location', f'{drive.url}/upload/session/{session_id}')])
+                self.reply(404, {'error': 'not found'})
+
+            def do_DELETE(self):
+                file_id = self.path.rsplit('/', 1)[1]
+                with drive.lock:
+                    drive.requests['delete'] += 1
+                    if drive.folders.pop(file_id, None) is None and drive.files.pop(file_id, None) is None:
+                        return self.reply(404, {'error': 'not found'})
+                self.reply(204)
+
+            def do_PUT(self):
+                session_id = self.path.rsplit('/', 1)[1]
+                data = self.body()
+                with drive.lock:
+                    session = drive.sessions[session_id]
+                    received = session['data']
+                    span, total = self.headers['Content-Range'].split(' ')[1].split('/')
+                    if span == '*':
+                        drive.requests['status'] += 1
+                    else:
+                        drive.requests['chunk'] += 1
+                        if drive.fail_chunks:
+                            # Keep half the chunk, as if the connection dropped mid-transfer
+                            drive.fail_chunks -= 1
+                            received.extend(data[:len(data) // 2])
+                            return self.reply(503, {'error': 'backendError'})
+                        start = int(span.split('-')[0])
+                        if start != len(received):
+                            return self.reply(400, {'error': 'offset mismatch'})
+                        drive.chunk_sizes.append(len(data))
+                        received.extend(data)
+                    if len(received) < int(total):
+                        headers = [('Range', f'bytes=0-{len(received) - 1}')] if received else []
+                        return self.reply(308, headers=headers)
+                    file_id = f'file-{session_id}'
+                    drive.files[file_id] = {**session, 'data': bytes(received)}
+                    self.reply(200, {'id': file_id, 'name': session['metadata']['name'],
+                                     'size': str(len(received)), 'mimeType': session['mime_type']})
+
+        return Handler
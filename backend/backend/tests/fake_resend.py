@@ -0,0 +1,51 @@
+"""In-process stand-ins for resend.Emails and resend.Batch"""
+import threading
+import time
+
+import resend
+
+
+def provider_error():
+    return resend.exceptions.ResendError(code=500, error_type='application_error',
+                                         message='Provider unavailable', suggested_action='')
+
+
+class FakeResend:
+    """Records sends like resend.Emails; addresses in `failing` fail that many times before succeeding"""
+
+    def __init__(self, latency=0, failing=None):
+        self.latency = latency
+        self.failing = dict(failing or {})
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, params, options=None):
+        time.sleep(self.latency)
+        with self._lock:
+            to_email = params['to'][0]
+            if self.failing.get(to_email):
+                self.failing[to_email] -= 1
+                raise provider_error()
+            self.sent.append((params, options))
+            return {'id': f'email-{len(self.sent)}'}
+
+
+class FakeResendBatch:
+    """Records batch requests like resend.Batch; the first `failing` requests fail"""
+
+    def __init__(self, latency=0, failing=0):
+        self.latency = latency
+        self.failing = failing
+        self.requests = []
+        self.attempts = []
+        self._lock = threading.Lock()
+
+    def send(self, params, options=None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.attempts.append((params, options))
+            if self.failing:
+                self.failing -= 1
+                raise provider_error()
+            self.requests.append((params, options))
+            return {'data': [{'id': f'batch-{len(self.requests)}-{i}'} for i in range(len(params))]}
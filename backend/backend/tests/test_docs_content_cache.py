@@ -0,0 +1,95 @@
+import pytest
+
+from api.services.docs_content_cache import docs_content_cache
+from api.services.docs_write_buffer import send_batch_update
+from api.services.google_docs_service import GoogleDocsService
+
+
+class FakeDocsApi:
+    """Stands in for the Docs v1 client; each batchUpdate produces a new revision"""
+
+    def __init__(self):
+        self.revision = 1
+        self.fetches = 0
+
+    def documents(self):
+        return self
+
+    def get(self, documentId, **kwargs):
+        self.fetches += 1
+        return Call({'documentId': documentId, 'revisionId': f'rev-{self.revision}', 'body': {}})
+
+    def batchUpdate(self, documentId, body):
+        self.revision += 1
+        return Call({'documentId': documentId, 'replies': [{} for _ in body['requests']]})
+
+
+class Call:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+@pytest.fixture
+def docs_api(monkeypatch):
+    api = FakeDocsApi()
+    monkeypatch.setattr(GoogleDocsService, 'service', property(lambda self: api))
+    return api
+
+
+def get_content(client, **headers):
+    return client.get('/api/google-docs/doc-1/content/', **headers)
+
+
+@pytest.mark.django_db
+class TestContentCache:
+    def test_repeated_reads_are_served_from_cache(self, authenticated_client, docs_api):
+        first = get_content(authenticated_client)
+        second = get_content(authenticated_client)
+
+        assert docs_api.fetches == 1
+        assert second.data == first.data
+        assert first['ETag'] == second['ETag'] == '"rev-1"'
+        assert docs_content_cache.stats() == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+    def test_matching_etag_is_not_modified(self, authenticated_client, docs_api):
+        etag = get_content(authenticated_client)['ETag']
+
+        response = get_content(authenticated_client, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert response['Cache-Control'] == 'private, no-cache'
+        assert docs_api.fetches == 1
+
+    def test_update_invalidates(self, authenticated_client, docs_api):
+        etag = get_content(authenticated_client)['ETag']
+
+        authenticated_client.post('/api/google-docs/doc-1/update/',
+                                  {'requests': [{'insertText': {'location': {'index': 1}, 'text': 'x'}}]},
+                                  format='json')
+        response = get_content(authenticated_client, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response['ETag'] == '"rev-2"'
+        assert docs_api.fetches == 2
+
+    def test_format_write_back_invalidates(self, authenticated_client, docs_api):
+        get_content(authenticated_client)
+
+        send_batch_update('doc-1', [{'updateTextStyle': {}}])
+        get_content(authenticated_client)
+
+        assert docs_api.fetches == 2
+
+    def test_stats_are_admin_only(self, authenticated_client, docs_api):
+        get_content(authenticated_client)
+
+        assert authenticated_client.get('/api/google-docs/cache-stats/').status_code == 403
+
+    def test_admin_reads_stats(self, admin_client, docs_api):
+        get_content(admin_client)
+
+        assert admin_client.get('/api/google-docs/cache-stats/').data == {'hits': 0, 'misses': 1, 'hit_ratio': 0.0}
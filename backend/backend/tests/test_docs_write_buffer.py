@@ -0,0 +1,231 @@
+import asyncio
+import random
+import threading
+
+import httplib2
+import pytest
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from googleapiclient.errors import HttpError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import Document, Group, Thesis
+from api.services import docs_write_buffer
+from api.services.docs_write_buffer import FormatWriteBuffer
+from api.utils.ot import TextOperation
+
+
+class FakeDocsApi:
+    """Stands in for documents().batchUpdate: counts calls and applies styles per character"""
+
+    def __init__(self, length=200, failures=0, status=503):
+        self.calls = []
+        self.failures = failures
+        self.status = status
+        self.styles = [{} for _ in range(length)]
+        self.lock = threading.Lock()
+
+    def __call__(self, document_id, requests):
+        with self.lock:
+            self.calls.append((document_id, requests))
+            if self.failures:
+                self.failures -= 1
+                raise HttpError(httplib2.Response({'status': self.status}), b'')
+            for request in requests:
+                apply_style(self.styles, request['updateTextStyle'])
+            return {'documentId': document_id, 'replies': [{} for _ in requests]}
+
+
+def apply_style(styles, update):
+    fields = update['fields'].split(',')
+    for index in range(update['range']['startIndex'], update['range']['endIndex']):
+        for field in fields:
+            styles[index][field] = update['textStyle'][field]
+
+
+def run(coroutine_function):
+    return async_to_sync(coroutine_function)()
+
+
+class TestFormatWriteBuffer:
+    def test_adjacent_changes_become_one_request(self):
+        api = FakeDocsApi()
+        buffer = FormatWriteBuffer('doc', writer=api, max_ops=1000)
+
+        async def scenario():
+            for index in range(40):
+                await buffer.add(index, index + 1, {'bold': True})
+            await buffer.flush()
+
+        run(scenario)
+
+        assert len(api.calls) == 1
+        assert api.calls[0][1] == [{'updateTextStyle': {
+            'range': {'startIndex': 0, 'endIndex': 40}, 'textStyle': {'bold': True}, 'fields': 'bold',
+        }}]
+
+    def test_overlapping_changes_match_sequential_application(self):
+        rng = random.Random(3)
+        api = FakeDocsApi()
+        expected = [{} for _ in range(200)]
+        buffer = FormatWriteBuffer('doc', writer=api, max_ops=1000)
+
+        async def scenario():
+            for _ in range(300):
+                start = rng.randrange(190)
+                style = {rng.choice(['bold', 'italic', 'underline']): rng.random() < 0.5}
+                if rng.random() < 0.3:
+                    style['fontSize'] = {'magnitude': rng.choice([10, 12, 14]), 'unit': 'PT'}
+                update = {'range': {'startIndex': start, 'endIndex': start + rng.randint(1, 10)},
+                          'textStyle': style, 'fields': ','.join(style)}
+                apply_style(expected, update)
+                await buffer.add(update['range']['startIndex'], update['range']['endIndex'], style)
+            await buffer.flush()
+
+        run(scenario)
+
+        assert len(api.calls) == 1
+        assert api.styles == expected
+
+    def test_flushes_after_interval(self):
+        api = FakeDocsApi()
+        buffer = FormatWriteBuffer('doc', writer=api, interval=0.05)
+
+        async def scenario():
+            await buffer.add(0, 5, {'italic': True})
+            await buffer.add(3, 9, {'italic': True})
+            assert not api.calls
+            await asyncio.sleep(0.2)
+
+        run(scenario)
+
+        assert len(api.calls) == 1
+        assert api.calls[0][1][0]['updateTextStyle']['range'] == {'startIndex': 0, 'endIndex': 9}
+
+    def test_flushes_at_max_ops_without_waiting_for_interval(self):
+        api = FakeDocsApi()
+        buffer = FormatWriteBuffer('doc', writer=api, interval=60, max_ops=10)
+
+        async def scenario():
+            for index in range(0, 20, 2):
+                await buffer.add(index, index + 1, {'bold': True})
+            await asyncio.sleep(0.1)
+            flushed = len(api.calls)
+            await buffer.close()
+            return flushed
+
+        assert run(scenario) == 1
+        assert len(api.calls[0][1]) == 10
+
+    def test_backpressure_flushes_inline(self):
+        api = FakeDocsApi()
+        buffer = FormatWriteBuffer('doc', writer=api, interval=60, max_ops=1000, max_pending=5)
+
+        async def scenario():
+            for index in range(5):
+                await buffer.add(index * 2, index * 2 + 1, {'bold': True})
+            return buffer.pending_ops
+
+        assert run(scenario) == 0
+        assert len(api.calls) == 1
+
+    def test_retries_failed_batches(self):
+        api = FakeDocsApi(failures=2)
+        buffer = FormatWriteBuffer('doc', writer=api, retry_delay=0.001)
+
+        async def scenario():
+            await buffer.add(0, 4, {'bold': True})
+            return await buffer.flush()
+
+        assert run(scenario) is not None
+        assert len(api.calls) == 3
+        assert api.styles[3] == {'bold': True}
+
+    def test_client_errors_are_not_retried(self):
+        api = FakeDocsApi(failures=1, status=400)
+        buffer = FormatWriteBuffer('doc', writer=api, retry_delay=0.001)
+
+        async def scenario():
+            await buffer.add(0, 4, {'bold': True})
+            return await buffer.flush()
+
+        assert run(scenario) is None
+        assert len(api.calls) == 1
+
+    def test_ranges_follow_text_edits(self):
+        api = FakeDocsApi()
+        buffer = FormatWriteBuffer('doc', writer=api, max_ops=1000)
+
+        async def scenario():
+            await buffer.add(10, 20, {'bold': True})
+            await buffer.add(30, 35, {'italic': True})
+            # Three characters typed at 5, then everything from 30 to 39 deleted
+            buffer.transform(TextOperation([5, 'abc', 195]))
+            buffer.transform(TextOperation([30, -9, 164]))
+            await buffer.flush()
+
+        run(scenario)
+
+        ranges = {tuple(request['updateTextStyle']['textStyle']): request['updateTextStyle']['range']
+                  for request in api.calls[0][1]}
+        assert ranges == {('bold',): {'startIndex': 13, 'endIndex': 23}}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_consumer_batches_format_changes(student_user, monkeypatch):
+    from backend.asgi import application
+
+    api = FakeDocsApi()
+    monkeypatch.setattr(docs_write_buffer, 'send_batch_update', api)
+    group = Group.objects.create(name='Formatters', status='APPROVED', leader=student_user)
+    group.members.add(student_user)
+    thesis = Thesis.objects.create(title='Styled Draft', group=group, proposer=student_user)
+    document = Document.objects.create(thesis=thesis, provider='google',
+                                       google_doc_url='https://docs.google.com/document/d/doc-123/edit')
+    token = str(AccessToken.for_user(student_user))
+
+    async def scenario():
+        socket = WebsocketCommunicator(application, f'/ws/document/{document.id}/?token={token}',
+                                       headers=[(b'origin', b'http://localhost')])
+        await socket.connect()
+        for index in range(20):
+            await socket.send_json_to({'type': 'format_change', 'start': index, 'end': index + 1,
+                                       'format': {'bold': True}})
+        await socket.receive_nothing(timeout=0.1)
+        await socket.disconnect()
+
+    run(scenario)
+
+    assert len(api.calls) == 1
+    document_id, requests = api.calls[0]
+    assert document_id == 'doc-123'
+    assert requests[0]['updateTextStyle']['range'] == {'startIndex': 0, 'endIndex': 20}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_consumer_shifts_buffered_formatting_past_text_changes(student_user, monkeypatch):
+    from backend.asgi import application
+
+    api = FakeDocsApi()
+    monkeypatch.setattr(docs_write_buffer, 'send_batch_update', api)
+    group = Group.objects.create(name='Typists', status='APPROVED', leader=student_user)
+    group.members.add(student_user)
+    thesis = Thesis.objects.create(title='Moving Draft', group=group, proposer=student_user)
+    document = Document.objects.create(thesis=thesis, provider='google',
+                                       google_doc_url='https://docs.google.com/document/d/doc-456/edit')
+    token = str(AccessToken.for_user(student_user))
+
+    async def scenario():
+        socket = WebsocketCommunicator(application, f'/ws/document/{document.id}/?token={token}',
+                                       headers=[(b'origin', b'http://localhost')])
+        await socket.connect()
+        await socket.send_json_to({'type': 'format_change', 'start': 0, 'end': 4, 'format': {'bold': True}})
+        await socket.send_json_to({'type': 'text_change', 'operation': 'insert', 'position': 0,
+                                   'content': 'Title ', 'version': 0, 'timestamp': 1})
+        await socket.receive_nothing(timeout=0.1)
+        await socket.disconnect()
+
+    run(scenario)
+
+    assert len(api.calls) == 1
+    assert api.calls[0][1][0]['updateTextStyle']['range'] == {'startIndex': 6, 'endIndex': 10}
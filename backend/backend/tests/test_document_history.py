@@ -0,0 +1,287 @@
+import json
+import random
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.consumers import DocumentState
+from api.models import Document, DocumentOperation, DocumentSnapshot, Group, Thesis
+from api.services import operation_log as operation_log_module
+from api.services.google_docs_service import GoogleDocsService
+from api.services.operation_log import OperationLog, replay_document, write_log
+from api.utils.ot import TextOperation
+from tests.test_document_ot import random_operation
+
+
+@pytest.fixture
+def document(student_user):
+    group = Group.objects.create(name='Historians', status='APPROVED', leader=student_user)
+    group.members.add(student_user)
+    thesis = Thesis.objects.create(title='Versioned Draft', group=group, proposer=student_user)
+    return Document.objects.create(thesis=thesis, uploaded_by=student_user, provider='google')
+
+
+def record_history(document, count, snapshot_interval, seed=5):
+    """Apply `count` random operations, persisting them like the consumer; returns the text at every version"""
+    rng = random.Random(seed)
+    state = DocumentState()
+    texts = ['']
+    operations, snapshots = [], []
+    for _ in range(count):
+        operation, version = state.apply(random_operation(state.text, rng), state.version)
+        texts.append(state.text)
+        operations.append(DocumentOperation(document=document, version=version, ops=operation.ops))
+        if version % snapshot_interval == 0:
+            snapshots.append(DocumentSnapshot(document=document, version=version, text=state.text))
+    write_log(operations, snapshots)
+    return texts
+
+
+@pytest.mark.django_db
+class TestOperationLog:
+    def test_batch_is_written_in_bulk(self, document, django_assert_max_num_queries):
+        operations = [DocumentOperation(document=document, version=v, ops=['x']) for v in range(1, 301)]
+
+        # savepoint pair plus the inserts; SQLite's variable limit may split the 300 rows in two
+        with django_assert_max_num_queries(6):
+            write_log(operations, [DocumentSnapshot(document=document, version=300, text='x' * 300)])
+
+        assert DocumentOperation.objects.filter(document=document).count() == 300
+
+    def test_taken_versions_are_logged_not_overwritten(self, document, caplog):
+        write_log([DocumentOperation(document=document, version=v, ops=['x']) for v in range(1, 3)], [])
+
+        # A second worker assigned versions 1 and 2 to its own edits
+        write_log([DocumentOperation(document=document, version=v, ops=['y']) for v in range(1, 4)],
+                  [DocumentSnapshot(document=document, version=2, text='yy')])
+
+        assert list(DocumentOperation.objects.filter(document=document).order_by('version')
+                    .values_list('version', 'ops')) == [(1, ['x']), (2, ['x']), (3, ['y'])]
+        assert DocumentSnapshot.objects.get(document=document).text == 'yy'
+        assert f'already wrote: [({document.id}, 1), ({document.id}, 2)]' in caplog.text
+
+
+@pytest.mark.django_db(transaction=True)
+def test_queued_snapshots_flush_together(document):
+    log = OperationLog(interval=0.01)
+
+    async def scenario():
+        for version in range(1, 51):
+            log.snapshot(document.id, version, 'y' * version)
+        await log.close()
+
+    async_to_sync(scenario)()
+
+    assert log.flushes == 1
+    assert replay_document(document.id)[:2] == ('y' * 50, 50)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_flush_writes_only_that_document(document, student_user):
+    other = Document.objects.create(thesis=document.thesis, uploaded_by=student_user, provider='google')
+    log = OperationLog(interval=60)
+
+    async def scenario():
+        log.snapshot(document.id, 500, 'mine')
+        log.snapshot(other.id, 500, 'theirs')
+        await log.flush(document.id)
+        log._timer.cancel()
+
+    async_to_sync(scenario)()
+
+    assert list(DocumentSnapshot.objects.values_list('document_id', 'text')) == [(document.id, 'mine')]
+    assert [(row.document_id, row.text) for row in log.snapshots] == [(other.id, 'theirs')]
+
+
+@pytest.mark.django_db
+class TestReplay:
+    def test_every_version_matches(self, document):
+        texts = record_history(document, 120, snapshot_interval=25)
+
+        for version in range(len(texts)):
+            text, replayed_version, snapshot_version = replay_document(document.id, version)
+            assert text == texts[version]
+            assert snapshot_version == version // 25 * 25
+
+    def test_latest_by_default(self, document):
+        texts = record_history(document, 40, snapshot_interval=25)
+
+        assert replay_document(document.id) == (texts[-1], 40, 25)
+
+    def test_long_replay_stores_a_snapshot(self, document, monkeypatch):
+        monkeypatch.setattr(operation_log_module, 'REPLAY_LIMIT', 10)
+        texts = record_history(document, 30, snapshot_interval=1000)
+
+        assert replay_document(document.id, 30) == (texts[30], 30, 0)
+        assert replay_document(document.id, 30) == (texts[30], 30, 30)
+
+
+@pytest.mark.django_db
+class TestHistoryEndpoint:
+    def test_serves_historical_version(self, authenticated_client, document):
+        texts = record_history(document, 60, snapshot_interval=25)
+
+        response = authenticated_client.get(f'/api/documents/{document.id}/history/?version=37')
+
+        assert response.status_code == 200
+        assert response.data == {'document': document.id, 'version': 37, 'snapshot_version': 25,
+                                 'text': texts[37]}
+
+    def test_unknown_version(self, authenticated_client, document):
+        record_history(document, 10, snapshot_interval=25)
+
+        response = authenticated_client.get(f'/api/documents/{document.id}/history/?version=11')
+
+        assert response.status_code == 404
+
+    def test_unreplayable_history_conflicts(self, authenticated_client, document):
+        # Version 2 retains more text than version 1 left
+        write_log([DocumentOperation(document=document, version=1, ops=['ab']),
+                   DocumentOperation(document=document, version=2, ops=[5, 'c'])], [])
+
+        response = authenticated_client.get(f'/api/documents/{document.id}/history/')
+
+        assert response.status_code == 409
+
+    def test_invalid_version(self, authenticated_client, document):
+        response = authenticated_client.get(f'/api/documents/{document.id}/history/?version=latest')
+
+        assert response.status_code == 400
+
+    def test_outsiders_are_refused(self, adviser_client, document):
+        response = adviser_client.get(f'/api/documents/{document.id}/history/')
+
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db(transaction=True)
+def test_consumer_persists_and_resumes(document, student_user):
+    from backend.asgi import application
+
+    token = str(AccessToken.for_user(student_user))
+    path = f'/ws/document/{document.id}/?token={token}'
+    headers = [(b'origin', b'http://localhost')]
+
+    async def edit(contents):
+        socket = WebsocketCommunicator(application, path, headers=headers)
+        await socket.connect()
+        messages = {}
+        for _ in range(2):
+            message = await socket.receive_json_from()
+            messages[message['type']] = message
+        version = messages['document_state']['version']
+        for content in contents:
+            await socket.send_json_to({'type': 'text_change', 'operation': 'insert', 'position': 0,
+                                       'content': content, 'version': version})
+            version = (await socket.receive_json_from())['version']
+        await socket.disconnect()
+        return messages['document_state']
+
+    async_to_sync(edit)(['a', 'b', 'c'])
+    resumed = async_to_sync(edit)(['d'])
+
+    assert resumed['version'] == 3
+    assert resumed['snapshot'] == {'version': 3, 'text': 'cba'}
+    assert replay_document(document.id) == ('dcba', 4, 0)
+    assert DocumentOperation.objects.get(document=document, version=4).user == student_user
+
+
+def editor(document, state, channel_layer=None, user_id=None):
+    """A DocumentEditConsumer on `state` that records what it sends; one state per simulated worker"""
+    from api import consumers
+
+    consumer = consumers.DocumentEditConsumer()
+    consumer.document_id, consumer.document_group_name = document.id, f'doc_{document.id}'
+    consumer.channel_name = f'editor-{id(consumer)}'
+    consumer.user = type('User', (), {'id': user_id})()
+    consumer.document_state = state
+    consumer.sent = []
+
+    async def send(text_data):
+        consumer.sent.append(json.loads(text_data))
+
+    class ChannelLayer:
+        async def group_send(self, group, message):
+            pass
+
+    consumer.send, consumer.channel_layer = send, channel_layer or ChannelLayer()
+    return consumer
+
+
+@pytest.mark.django_db(transaction=True)
+def test_snapshot_is_taken_before_the_broadcast(document, monkeypatch):
+    from api import consumers
+
+    log = OperationLog()
+    monkeypatch.setattr(consumers, 'operation_log', log)
+    monkeypatch.setattr(DocumentState, 'SNAPSHOT_INTERVAL', 2)
+    state = DocumentState()
+    other = editor(document, state)
+
+    class ChannelLayer:
+        async def group_send(self, group, message):
+            # Another editor in this process gets an operation in while this one is broadcast
+            if message['version'] == 2:
+                await other.handle_text_change({'operation': 'insert', 'position': 0, 'content': 'z'})
+
+    consumer = editor(document, state, ChannelLayer())
+
+    async def run():
+        for content in 'ab':
+            await consumer.handle_text_change({'operation': 'insert', 'position': 0, 'content': content})
+        log._timer.cancel()
+
+    async_to_sync(run)()
+
+    assert state.text == 'zba'
+    assert [(snapshot.version, snapshot.text) for snapshot in log.snapshots] == [(2, 'ba')]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_workers_share_one_version_sequence(document):
+    # Two workers, each with its own state and no broadcast between them: only the log is shared
+    first, second = editor(document, DocumentState()), editor(document, DocumentState())
+
+    async def run():
+        await first.handle_text_change({'operation': 'insert', 'position': 0, 'content': 'a', 'version': 0})
+        await second.handle_text_change({'operation': 'insert', 'position': 0, 'content': 'b', 'version': 0})
+        await first.handle_text_change({'operation': 'insert', 'position': 1, 'content': 'x', 'version': 1})
+        await second.sync_document_state()
+
+    async_to_sync(run)()
+
+    assert [message['version'] for message in first.sent] == [1, 3]
+    assert [message['version'] for message in second.sent] == [2]
+    assert replay_document(document.id) == ('bax', 3, 0)
+    assert first.document_state.text == second.document_state.text == 'bax'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_new_document_starts_from_its_google_doc(document, student_user, monkeypatch):
+    from backend.asgi import application
+
+    monkeypatch.setattr(GoogleDocsService, 'get_document_text', lambda self, google_doc_id: 'Chapter 1\n')
+    document.google_doc_url = 'https://docs.google.com/document/d/doc-1/edit'
+    document.save()
+    token = str(AccessToken.for_user(student_user))
+
+    async def join():
+        socket = WebsocketCommunicator(application, f'/ws/document/{document.id}/?token={token}',
+                                       headers=[(b'origin', b'http://localhost')])
+        await socket.connect()
+        messages = {}
+        for _ in range(2):
+            message = await socket.receive_json_from()
+            messages[message['type']] = message
+        await socket.send_json_to({'type': 'text_change', 'ops': ['Draft: ', 10], 'version': 0})
+        ack = await socket.receive_json_from()
+        await socket.disconnect()
+        return messages['document_state'], ack
+
+    state, ack = async_to_sync(join)()
+
+    assert state['snapshot'] == {'version': 0, 'text': 'Chapter 1\n'}
+    assert ack == {'type': 'ack', 'version': 1}
+    assert replay_document(document.id) == ('Draft: Chapter 1\n', 1, 0)
@@ -0,0 +1,220 @@
+import os
+import random
+import sys
+import time
+from collections import deque
+
+import pytest
+
+from api.consumers import DocumentState
+from api.utils.ot import OperationError, TextOperation, compose, transform
+
+ALPHABET = 'abcdefghij '
+
+
+def random_operation(text, rng):
+    """A random edit touching up to three spots of `text`"""
+    operation = TextOperation()
+    index = 0
+    for _ in range(rng.randint(1, 3)):
+        if index > len(text):
+            break
+        skip = rng.randint(0, len(text) - index)
+        operation.retain(skip)
+        index += skip
+        if rng.random() < 0.5 or index == len(text):
+            operation.insert(''.join(rng.choices(ALPHABET, k=rng.randint(1, 4))))
+        else:
+            length = rng.randint(1, min(4, len(text) - index))
+            operation.delete(length)
+            index += length
+    return operation.retain(len(text) - index)
+
+
+class SimulatedClient:
+    """The ot.js client state machine: at most one operation in flight, later edits buffered"""
+
+    def __init__(self, text='', version=0):
+        self.text = text
+        self.version = version
+        self.outstanding = None
+        self.buffer = None
+
+    def edit(self, rng):
+        operation = random_operation(self.text, rng)
+        self.text = operation.apply(self.text)
+        if self.outstanding is None:
+            self.outstanding = operation
+            return operation, self.version
+        self.buffer = operation if self.buffer is None else compose(self.buffer, operation)
+        return None
+
+    def ack(self):
+        self.version += 1
+        self.outstanding, self.buffer = self.buffer, None
+        return (self.outstanding, self.version) if self.outstanding else None
+
+    def receive(self, operation):
+        self.version += 1
+        if self.outstanding is not None:
+            self.outstanding, operation = transform(self.outstanding, operation)
+        if self.buffer is not None:
+            self.buffer, operation = transform(self.buffer, operation)
+        self.text = operation.apply(self.text)
+
+
+def simulate(client_count, op_count, seed):
+    """
+    Interleave random edits from `client_count` clients through one DocumentState,
+    delivering messages in order per connection but at random relative speeds.
+    Returns the server state and clients once every message has been delivered.
+    """
+    rng = random.Random(seed)
+    state = DocumentState()
+    state.apply_seconds = 0.0
+    clients = [SimulatedClient() for _ in range(client_count)]
+    to_server = deque()
+    to_client = [deque() for _ in clients]
+    generated = 0
+
+    def process_one():
+        sender, operation, version = to_server.popleft()
+        started = time.perf_counter()
+        operation, _ = state.apply(operation, version)
+        state.apply_seconds += time.perf_counter() - started
+        for index, inbox in enumerate(to_client):
+            inbox.append(None if index == sender else operation)
+
+    def deliver(index):
+        message = to_client[index].popleft()
+        if message is None:
+            outgoing = clients[index].ack()
+            if outgoing:
+                to_server.append((index, *outgoing))
+        else:
+            clients[index].receive(message)
+
+    while generated < op_count:
+        # A client catches up on at least half of what is waiting for it, then types
+        index = rng.randrange(client_count)
+        pending = len(to_client[index])
+        for _ in range(rng.randint((pending + 1) // 2, pending)):
+            deliver(index)
+        outgoing = clients[index].edit(rng)
+        generated += 1
+        if outgoing:
+            to_server.append((index, *outgoing))
+        if rng.random() < 0.5:
+            while to_server:
+                process_one()
+
+    while to_server or any(to_client):
+        while to_server:
+            process_one()
+        for index, inbox in enumerate(to_client):
+            while inbox:
+                deliver(index)
+    return state, clients
+
+
+class TestTextOperation:
+    def test_from_change(self):
+        assert TextOperation.from_change('insert', 2, 5, content='xy').apply('hello') == 'hexyllo'
+        assert TextOperation.from_change('delete', 1, 5, length=3).apply('hello') == 'ho'
+        assert TextOperation.from_change('replace', 0, 5, content='J', length=1).apply('hello') == 'Jello'
+
+    def test_from_change_rejects_out_of_range(self):
+        with pytest.raises(OperationError):
+            TextOperation.from_change('delete', 4, 5, length=3)
+
+    @pytest.mark.parametrize('component', [True, False, 1.5, None])
+    def test_rejects_non_int_counts(self, component):
+        with pytest.raises(OperationError):
+            TextOperation(['a', component])
+
+    def test_transform_converges(self):
+        rng = random.Random(1)
+        for _ in range(500):
+            text = ''.join(rng.choices(ALPHABET, k=rng.randint(0, 20)))
+            a, b = random_operation(text, rng), random_operation(text, rng)
+
+            a_prime, b_prime = transform(a, b)
+
+            assert b_prime.apply(a.apply(text)) == a_prime.apply(b.apply(text))
+
+    def test_compose_matches_sequential_apply(self):
+        rng = random.Random(2)
+        for _ in range(500):
+            text = ''.join(rng.choices(ALPHABET, k=rng.randint(0, 20)))
+            a = random_operation(text, rng)
+            b = random_operation(a.apply(text), rng)
+
+            assert compose(a, b).apply(text) == b.apply(a.apply(text))
+
+
+class TestDocumentState:
+    def test_concurrent_inserts_are_transformed(self):
+        state = DocumentState('hello')
+
+        state.apply(TextOperation.from_change('insert', 0, 5, content='A'), 0)
+        operation, version = state.apply(TextOperation.from_change('insert', 5, 5, content='!'), 0)
+
+        assert state.text == 'Ahello!'
+        assert version == 2
+        assert operation.ops == [6, '!']
+
+    def test_late_joiner_gets_snapshot_and_tail(self, monkeypatch):
+        monkeypatch.setattr(DocumentState, 'SNAPSHOT_INTERVAL', 3)
+        state = DocumentState()
+        for i in range(5):
+            state.apply(TextOperation.from_change('insert', i, i, content=str(i)), i)
+
+        catch_up = state.catch_up()
+        text = catch_up['snapshot']['text']
+        for ops in catch_up['operations']:
+            text = TextOperation(ops).apply(text)
+
+        assert catch_up['snapshot']['version'] == 3
+        assert len(catch_up['operations']) == 2
+        assert text == state.text == '01234'
+
+    def test_trimmed_history_requires_resync(self, monkeypatch):
+        monkeypatch.setattr(DocumentState, 'HISTORY_LIMIT', 2)
+        state = DocumentState()
+        for i in range(4):
+            state.apply(TextOperation().insert('x').retain(i), i)
+
+        with pytest.raises(OperationError):
+            state.apply(TextOperation().insert('y').retain(1), 1)
+
+    def test_clients_converge(self):
+        state, clients = simulate(client_count=5, op_count=1000, seed=7)
+
+        assert state.version > 0
+        assert all(client.text == state.text for client in clients)
+        assert all(client.version == state.version for client in clients)
+
+
+def state_size(state):
+    """Approximate bytes held by a DocumentState's text, snapshot and history"""
+    size = sys.getsizeof(state.text) + sys.getsizeof(state.snapshot_text) + sys.getsizeof(state.history)
+    for operation in state.history:
+        size += sys.getsizeof(operation) + sys.getsizeof(operation.ops)
+        size += sum(sys.getsizeof(component) for component in operation.ops)
+    return size
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not os.environ.get('DOCUMENT_OT_BENCHMARK'), reason='set DOCUMENT_OT_BENCHMARK=1 to run')
+def test_convergence_benchmark():
+    """Replay 100k synthetic operations from 50 clients and report convergence time and memory"""
+    started = time.perf_counter()
+    state, clients = simulate(client_count=50, op_count=100_000, seed=2024)
+    elapsed = time.perf_counter() - started
+
+    assert all(client.text == state.text for client in clients)
+    # elapsed includes simulating all 50 clients; apply_seconds is the server's share
+    print(f'\n100k ops / 50 clients: converged in {elapsed:.1f}s, '
+          f'{state.version} server versions applied in {state.apply_seconds:.1f}s '
+          f'({state.version / state.apply_seconds:,.0f} ops/s), '
+          f'document {len(state.text):,} chars, state ~{state_size(state) / 1024:,.0f} KiB')
@@ -204,7 +204,7 @@ class TestDocumentUpload:
         response = authenticated_client.get('/api/documents/')
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) >= 1
+        assert len(response.data['results']) >= 1
 
     def test_retrieve_document(self, authenticated_client, student_user):
         """Test retrieving a specific document"""
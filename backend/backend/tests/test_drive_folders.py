@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+
+from api.models import Group, Thesis, ThesisDriveFolder
+from api.services.drive_folders import folder_cache_key, get_thesis_folder
+from tests.fake_drive import FakeDriveServer
+from tests.test_drive_uploads import make_uploader
+
+
+@pytest.fixture
+def fake_drive():
+    with FakeDriveServer() as drive:
+        yield drive
+
+
+@pytest.fixture
+def thesis(student_user):
+    group = Group.objects.create(name='Folder Owners', status='APPROVED', leader=student_user)
+    return Thesis.objects.create(title='A Thesis With A Rather Long Title Indeed', abstract='', group=group,
+                                 proposer=student_user)
+
+
+@pytest.mark.django_db
+class TestThesisFolder:
+    def test_created_once_and_reused(self, thesis, fake_drive):
+        uploader = make_uploader(fake_drive)
+
+        first = get_thesis_folder(thesis.id, uploader)
+        again = [get_thesis_folder(thesis.id, uploader) for _ in range(3)]
+
+        assert again == [first] * 3
+        assert fake_drive.requests['create_folder'] == 1
+        assert fake_drive.folders[first]['name'] == f'Thesis_{thesis.id}_A Thesis With A Rather Long Ti'
+        assert ThesisDriveFolder.objects.get(thesis=thesis).folder_id == first
+
+    def test_cached_lookup_skips_the_database(self, thesis, fake_drive, django_assert_num_queries):
+        uploader = make_uploader(fake_drive)
+        folder_id = get_thesis_folder(thesis.id, uploader)
+
+        with django_assert_num_queries(0):
+            assert get_thesis_folder(thesis.id, uploader) == folder_id
+
+    def test_persisted_mapping_survives_cache_loss(self, thesis, fake_drive):
+        uploader = make_uploader(fake_drive)
+        folder_id = get_thesis_folder(thesis.id, uploader)
+        cache.delete(folder_cache_key(thesis.id))
+
+        assert get_thesis_folder(thesis.id, uploader) == folder_id
+        assert fake_drive.requests['create_folder'] == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_first_uploads_share_one_folder(thesis, fake_drive):
+    uploader = make_uploader(fake_drive)
+    results, barrier = [], threading.Barrier(8)
+
+    def upload():
+        barrier.wait()
+        try:
+            results.append(get_thesis_folder(thesis.id, uploader))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=upload) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8 and len(set(results)) == 1
+    assert fake_drive.requests['create_folder'] == 1
+
+
+@pytest.mark.django_db
+def test_folder_recorded_by_another_process_wins(thesis, fake_drive):
+    uploader = make_uploader(fake_drive)
+    create_folder = uploader.create_folder
+
+    def create_while_another_process_does(name):
+        # The other process records its folder while this one is still talking to Drive
+        ThesisDriveFolder.objects.create(thesis=thesis, folder_id=create_folder(name))
+        return create_folder(name)
+
+    uploader.create_folder = create_while_another_process_does
+
+    folder_id = get_thesis_folder(thesis.id, uploader)
+
+    assert folder_id == 'folder-1'
+    assert list(fake_drive.folders) == ['folder-1']
+    assert fake_drive.requests['delete'] == 1
@@ -0,0 +1,160 @@
+import io
+import os
+from datetime import timedelta
+
+import pytest
+import requests
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.models import Document, Group, Thesis
+from api.services.drive_uploads import (
+    CHUNK_GRANULARITY, DriveUploadError, DriveUploadPipeline, ResumableDriveUploader,
+)
+from api.views import document_views
+from tests.fake_drive import FakeDriveServer
+
+
+@pytest.fixture
+def fake_drive():
+    with FakeDriveServer() as drive:
+        yield drive
+
+
+def make_uploader(drive):
+    return ResumableDriveUploader(requests.Session(), api_root=drive.url, chunk_size=CHUNK_GRANULARITY,
+                                  retry_delay=0.01)
+
+
+@pytest.fixture
+def pipeline(fake_drive, monkeypatch):
+    pipeline = DriveUploadPipeline(uploader_factory=lambda: make_uploader(fake_drive), workers=2, queue=0)
+    monkeypatch.setattr(document_views, 'upload_pipeline', pipeline)
+    return pipeline
+
+
+@pytest.fixture
+def thesis(student_user):
+    group = Group.objects.create(name='Uploaders', status='APPROVED', leader=student_user)
+    group.members.add(student_user)
+    return Thesis.objects.create(title='Large Manuscript', abstract='', group=group, proposer=student_user)
+
+
+class TestResumableDriveUploader:
+    def test_streams_in_chunks(self, fake_drive):
+        content = os.urandom(4 * CHUNK_GRANULARITY + 100)
+
+        file = make_uploader(fake_drive).upload(io.BytesIO(content), len(content), 'thesis.pdf',
+                                                'application/pdf', folder_id='folder-1')
+
+        assert fake_drive.files[file['id']]['data'] == content
+        assert fake_drive.files[file['id']]['metadata'] == {'name': 'thesis.pdf', 'parents': ['folder-1']}
+        assert fake_drive.chunk_sizes == [CHUNK_GRANULARITY] * 4 + [100]
+
+    def test_resumes_after_failed_chunks(self, fake_drive):
+        content = os.urandom(3 * CHUNK_GRANULARITY)
+        fake_drive.fail_chunks = 2
+
+        file = make_uploader(fake_drive).upload(io.BytesIO(content), len(content), 'thesis.pdf', 'application/pdf')
+
+        assert fake_drive.files[file['id']]['data'] == content
+        assert fake_drive.requests['status'] == 2
+
+    def test_gives_up_on_rejection(self, fake_drive):
+        fake_drive.reject_uploads = True
+
+        with pytest.raises(DriveUploadError):
+            make_uploader(fake_drive).upload(io.BytesIO(b'data'), 4, 'thesis.pdf', 'application/pdf')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDriveUploadView:
+    def upload(self, client, thesis, content):
+        upload = SimpleUploadedFile('manuscript.pdf', content, content_type='application/pdf')
+        return client.post('/api/documents/', {'upload_type': 'drive', 'thesis': thesis.id, 'file': upload},
+                           format='multipart')
+
+    def test_returns_pending_document_then_completes(self, authenticated_client, thesis, pipeline, fake_drive):
+        content = os.urandom(2 * CHUNK_GRANULARITY + 7)
+
+        response = self.upload(authenticated_client, thesis, content)
+
+        assert response.status_code == 202
+        assert response.data['status'] == 'PENDING'
+        pipeline.wait(timeout=10)
+        polled = authenticated_client.get(f"/api/documents/{response.data['id']}/")
+        assert polled.data['status'] == 'READY'
+        assert fake_drive.files[polled.data['google_drive_file_id']]['data'] == content
+        assert polled.data['file_size'] == len(content)
+        assert fake_drive.requests['share'] == 2  # folder and file
+
+    def test_failed_upload_is_reported(self, authenticated_client, thesis, pipeline, fake_drive):
+        fake_drive.reject_uploads = True
+
+        response = self.upload(authenticated_client, thesis, b'%PDF-1.4')
+        pipeline.wait(timeout=10)
+
+        document = Document.objects.get(id=response.data['id'])
+        assert document.status == 'FAILED'
+        assert 'HTTP 403' in document.upload_error
+
+    def test_full_queue_is_refused(self, authenticated_client, thesis, pipeline):
+        for _ in range(pipeline.workers):
+            pipeline._slots.acquire()
+
+        response = self.upload(authenticated_client, thesis, b'%PDF-1.4')
+
+        assert response.status_code == 503
+        assert response['Retry-After'] == '30'
+        assert not Document.objects.exists()
+
+    def test_later_uploads_reuse_the_thesis_folder(self, authenticated_client, thesis, pipeline, fake_drive):
+        for _ in range(3):
+            assert self.upload(authenticated_client, thesis, b'%PDF-1.4').status_code == 202
+            pipeline.wait(timeout=10)
+
+        assert fake_drive.requests['create_folder'] == 1
+        assert fake_drive.requests['start_upload'] == 3
+        assert {file['metadata']['parents'][0] for file in fake_drive.files.values()} == {'folder-1'}
+
+
+class TestDriveUploadPipeline:
+    def test_failed_submit_removes_the_spool_file(self, monkeypatch, tmp_path):
+        spool = tmp_path / 'spool'
+        spool.mkdir()
+        monkeypatch.setattr('tempfile.tempdir', str(spool))
+        pipeline = DriveUploadPipeline(uploader_factory=lambda: None, workers=1, queue=0)
+        pipeline._start().shutdown()
+        # The executor refuses new work, as it does while the server shuts down
+        document = Document(id=1, thesis_id=1, provider='drive', status='PENDING')
+
+        with pytest.raises(RuntimeError):
+            pipeline.submit(document, SimpleUploadedFile('manuscript.pdf', b'%PDF-1.4'))
+
+        assert list(spool.iterdir()) == []
+        assert pipeline._slots.acquire(blocking=False)
+
+    def test_uploader_is_retried_until_configured(self, fake_drive):
+        uploaders = iter([None, make_uploader(fake_drive)])
+        pipeline = DriveUploadPipeline(uploader_factory=lambda: next(uploaders), workers=1, queue=0)
+
+        assert pipeline._get_uploader() is None
+        assert pipeline._get_uploader() is not None
+        assert pipeline._get_uploader() is pipeline._get_uploader()
+
+
+@pytest.mark.django_db
+class TestFailStaleUploads:
+    def test_fails_only_old_pending_uploads(self, thesis, settings):
+        settings.DRIVE_UPLOAD_STALE_MINUTES = 60
+        stale, recent, ready = (Document.objects.create(thesis=thesis, provider='drive', status=status)
+                                for status in ('PENDING', 'PENDING', 'READY'))
+        Document.objects.filter(id__in=[stale.id, ready.id]).update(created_at=timezone.now() - timedelta(hours=2))
+
+        call_command('fail_stale_uploads')
+
+        assert Document.objects.get(id=stale.id).status == 'FAILED'
+        assert 'upload the file again' in Document.objects.get(id=stale.id).upload_error
+        assert Document.objects.get(id=recent.id).status == 'PENDING'
+        assert Document.objects.get(id=ready.id).status == 'READY'
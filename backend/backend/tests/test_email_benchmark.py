@@ -0,0 +1,83 @@
+"""
+Render plus dispatch time of the "defense scheduled" emails for groups of 5 to 50
+recipients, sent through a fake Resend transport one request per email and as one
+batch request.
+
+Opt in with EMAIL_BENCHMARK=1.
+"""
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from api.models import DefenseSchedule, Group, OutboundEmail
+from api.services.email_outbox import OutboxWorker
+from api.utils.email_utils import queue_defense_scheduled_email
+from tests.fake_resend import FakeResend, FakeResendBatch
+
+pytestmark = pytest.mark.skipif(not os.environ.get('EMAIL_BENCHMARK'),
+                                reason='set EMAIL_BENCHMARK=1 to run')
+
+User = get_user_model()
+
+SIZES = (5, 10, 25, 50)
+PANELS = 3
+LATENCY = 0.05  # simulated round trip to the provider
+ROUNDS = 5
+
+
+def make_schedule(size, adviser):
+    users = User.objects.bulk_create([
+        User(email=f'g{size}-user{i}@test.com', first_name='User', last_name=str(i), role='STUDENT')
+        for i in range(size - 1)
+    ])
+    group = Group.objects.create(name=f'Group of {size}', status='APPROVED', adviser=adviser, leader=users[0])
+    group.panels.add(*users[:PANELS])
+    group.members.add(*users[PANELS:])
+    # A day per size keeps the shared adviser's schedules from conflicting
+    start = timezone.now() + timedelta(days=size)
+    return DefenseSchedule.objects.create(group=group, start_at=start, end_at=start + timedelta(hours=2),
+                                          location='Room 101', created_by=adviser)
+
+
+def render_and_dispatch(schedule, batched):
+    client = FakeResend(latency=LATENCY)
+    batch_client = FakeResendBatch(latency=LATENCY) if batched else None
+    worker = OutboxWorker(client=client, batch_client=batch_client, rate_limit=1000, retry_delay=0)
+    try:
+        OutboundEmail.objects.all().delete()
+        started = time.perf_counter()
+        queue_defense_scheduled_email(schedule)
+        rendered = time.perf_counter()
+        while worker.run_once():
+            pass
+        dispatched = time.perf_counter()
+    finally:
+        worker.close()
+    requests = len(client.sent) + len(batch_client.requests if batch_client else ())
+    return rendered - started, dispatched - rendered, requests
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+def test_render_and_dispatch(adviser_user):
+    rate = settings.EMAIL_OUTBOX_RATE_LIMIT
+    print(f'\n{"recipients":>10} {"render+queue":>13} | {"one request per email":>32} | {"batch request":>32}')
+    for size in SIZES:
+        schedule = make_schedule(size, adviser_user)
+        results = {}
+        for mode, batched in (('single', False), ('batch', True)):
+            runs = [render_and_dispatch(schedule, batched) for _ in range(ROUNDS)]
+            results[mode] = [sum(run[i] for run in runs) / ROUNDS for i in range(2)] + [runs[-1][2]]
+
+        assert OutboundEmail.objects.filter(status='SENT').count() == size
+        assert results['batch'][2] == 1
+        assert results['single'][2] == size
+        render = results['batch'][0]
+        print(f'{size:>10} {render * 1000:>11.2f}ms | ' + ' | '.join(
+            f'{requests:>3} req {dispatch * 1000:>7.1f}ms, {requests / rate:>5.1f}s at {rate}/s'
+            for _, dispatch, requests in (results['single'], results['batch'])))
@@ -0,0 +1,326 @@
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import resend
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import DefenseSchedule, Group, OutboundEmail
+from api.services import email_outbox
+from api.services.email_outbox import OutboxWorker, PooledHTTPClient, enqueue_emails
+from api.utils import email_utils
+from api.utils.email_utils import queue_defense_scheduled_email
+from tests.fake_resend import FakeResend, FakeResendBatch
+
+
+def queue(count):
+    return enqueue_emails([(f'user{i}@test.com', 'Subject', '<p>Hi</p>') for i in range(count)], 'System <s@test.com>')
+
+
+def make_worker(client, **kwargs):
+    options = {'concurrency': 4, 'rate_limit': 1000, 'retry_delay': 0, 'max_attempts': 3, **kwargs}
+    return OutboxWorker(client=client, **options)
+
+
+@pytest.fixture
+def group(adviser_user, student_user, user_factory):
+    group = Group.objects.create(name='Outbox Group', status='APPROVED', adviser=adviser_user, leader=student_user)
+    group.members.add(student_user, user_factory(email='member@test.com'))
+    group.panels.add(user_factory(email='panel@test.com', role='PANEL'), adviser_user)
+    return group
+
+
+@pytest.mark.django_db
+class TestScheduleEmails:
+    def test_creating_a_schedule_only_queues_emails(self, adviser_client, group, monkeypatch):
+        def fail(*args, **kwargs):
+            raise AssertionError('Resend must not be called during the request')
+        monkeypatch.setattr(resend.Emails, 'send', fail)
+        start = timezone.now() + timedelta(days=7)
+
+        response = adviser_client.post('/api/schedules/', {
+            'group': group.id, 'start_at': start.isoformat(),
+            'end_at': (start + timedelta(hours=2)).isoformat(), 'location': 'Room 101'
+        })
+
+        assert response.status_code == 201
+        assert sorted(OutboundEmail.objects.values_list('to_email', flat=True)) == [
+            'adviser@test.com', 'member@test.com', 'panel@test.com', 'student@test.com']
+        assert set(OutboundEmail.objects.values_list('status', flat=True)) == {'PENDING'}
+
+    def test_rolled_back_schedule_queues_nothing(self, adviser_user, group):
+        start = timezone.now() + timedelta(days=7)
+
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                schedule = DefenseSchedule.objects.create(group=group, start_at=start, end_at=start + timedelta(hours=1),
+                                                          created_by=adviser_user)
+                queue_defense_scheduled_email(schedule)
+                raise RuntimeError('save failed')
+
+        assert not OutboundEmail.objects.exists()
+
+    def test_renders_once_per_role(self, adviser_user, group, monkeypatch):
+        group.name = 'R&D <Group>'
+        group.save()
+        for user, name in ((adviser_user, 'Ada'), (group.members.get(email='member@test.com'), 'Max')):
+            user.first_name = name
+            user.save()
+        start = timezone.now() + timedelta(days=7)
+        schedule = DefenseSchedule.objects.create(group=group, start_at=start, end_at=start + timedelta(minutes=90),
+                                                  location='Room 101', created_by=adviser_user)
+        template = email_utils.DEFENSE_SCHEDULED_TEMPLATE.template
+        renders = []
+        monkeypatch.setattr(template, 'render', lambda context: renders.append(context['role']) or
+                            type(template).render(template, context))
+
+        with CaptureQueriesContext(connection) as queries:
+            queue_defense_scheduled_email(schedule)
+
+        assert sorted(renders) == ['member', 'staff']
+        assert len(queries) == 3  # members, panels, one INSERT
+        html = dict(OutboundEmail.objects.values_list('to_email', 'html'))
+        assert 'Hello Max User!' in html['member@test.com'] and 'arrive 15 minutes early' in html['member@test.com']
+        assert 'Hello Ada User!' in html['adviser@test.com'] and 'panel/advisory team' in html['adviser@test.com']
+        assert 'R&amp;D &lt;Group&gt;' in html['panel@test.com']
+        assert '1 hour 30 minutes' in html['panel@test.com']
+        assert len(set(OutboundEmail.objects.values_list('batch_key', flat=True))) == 1
+
+
+@pytest.mark.django_db
+class TestOutboxWorker:
+    def test_sends_concurrently(self):
+        queue(8)
+        client = FakeResend(latency=0.1)
+
+        started = time.perf_counter()
+        assert make_worker(client).run_once() == 8
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.6  # 8 sequential sends would take 0.8s
+        assert OutboundEmail.objects.filter(status='SENT').exclude(provider_id='').count() == 8
+        assert len({options['idempotency_key'] for _, options in client.sent}) == 8
+
+    def test_rate_limit(self):
+        queue(6)
+
+        started = time.perf_counter()
+        make_worker(FakeResend(), rate_limit=20).run_once()
+
+        assert time.perf_counter() - started >= 0.25
+
+    def test_retries_failed_sends(self):
+        queue(2)
+        worker = make_worker(FakeResend(failing={'user1@test.com': 1}))
+
+        worker.run_once()
+        retry = OutboundEmail.objects.get(to_email='user1@test.com')
+        assert (retry.status, retry.attempts) == ('PENDING', 1)
+        assert 'Provider unavailable' in retry.last_error
+
+        worker.run_once()
+        retry.refresh_from_db()
+        assert (retry.status, retry.attempts) == ('SENT', 2)
+
+    def test_backs_off_between_attempts(self):
+        queue(1)
+        worker = make_worker(FakeResend(failing={'user0@test.com': 1}), retry_delay=60)
+
+        worker.run_once()
+
+        assert worker.run_once() == 0
+        assert OutboundEmail.objects.get().next_attempt_at > timezone.now() + timedelta(seconds=50)
+
+    def test_gives_up_after_max_attempts(self):
+        queue(1)
+        worker = make_worker(FakeResend(failing={'user0@test.com': 10}), max_attempts=2)
+
+        worker.run_once()
+        worker.run_once()
+
+        assert OutboundEmail.objects.get().status == 'FAILED'
+        assert worker.run_once() == 0
+
+    def test_reclaims_expired_leases(self):
+        queue(1)
+        worker = make_worker(FakeResend())
+        worker.claim()  # a worker that died mid-send
+
+        assert worker.run_once() == 0
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        assert worker.run_once() == 1
+        assert OutboundEmail.objects.get().status == 'SENT'
+
+
+def queue_batch(count):
+    return enqueue_emails([(f'member{i}@test.com', 'Scheduled', '<p>Hi</p>') for i in range(count)],
+                          'System <s@test.com>', batch=True)
+
+
+@pytest.mark.django_db
+class TestBatchSending:
+    def test_sends_a_batch_in_one_request(self):
+        queue_batch(5)
+        queue(2)
+        client, batch_client = FakeResend(), FakeResendBatch()
+
+        assert make_worker(client, batch_client=batch_client).run_once() == 7
+
+        assert len(batch_client.requests) == 1 and len(client.sent) == 2
+        params, options = batch_client.requests[0]
+        assert [p['to'] for p in params] == [[f'member{i}@test.com'] for i in range(5)]
+        assert options['idempotency_key'].startswith('outbox-batch-')
+        assert sorted(OutboundEmail.objects.filter(batch_key__gt='').values_list('provider_id', flat=True)) == [
+            f'batch-1-{i}' for i in range(5)]
+
+    def test_batches_count_once_against_the_rate_limit(self):
+        queue_batch(20)
+
+        started = time.perf_counter()
+        make_worker(FakeResend(), batch_client=FakeResendBatch(), rate_limit=5).run_once()
+
+        assert time.perf_counter() - started < 0.5
+        assert not OutboundEmail.objects.exclude(status='SENT').exists()
+
+    def test_failed_batch_is_retried_together(self):
+        queue_batch(3)
+        batch_client = FakeResendBatch(failing=1)
+        worker = make_worker(FakeResend(), batch_client=batch_client)
+
+        worker.run_once()
+        assert set(OutboundEmail.objects.values_list('status', 'attempts')) == {('PENDING', 1)}
+
+        worker.run_once()
+        assert set(OutboundEmail.objects.values_list('status', 'attempts')) == {('SENT', 2)}
+        assert len(batch_client.requests) == 1
+
+    def test_large_batches_are_split(self, monkeypatch):
+        monkeypatch.setattr(email_outbox, 'BATCH_LIMIT', 4)
+        queue_batch(10)
+        batch_client = FakeResendBatch()
+
+        make_worker(FakeResend(), batch_client=batch_client).run_once()
+
+        assert [len(params) for params, _ in batch_client.requests] == [4, 4, 2]
+
+    def test_batches_are_claimed_whole(self):
+        queue_batch(6)
+        batch_client = FakeResendBatch(failing=1)
+        worker = make_worker(FakeResend(), batch_client=batch_client, batch_size=4)
+
+        assert worker.run_once() == 6
+        assert worker.run_once() == 6
+
+        assert [len(params) for params, _ in batch_client.attempts] == [6, 6]
+        assert len({options['idempotency_key'] for _, options in batch_client.attempts}) == 1
+
+    def test_batch_partly_held_by_another_worker_is_left_alone(self):
+        queue_batch(3)
+        queue(1)
+        held = OutboundEmail.objects.filter(batch_key__gt='').first()
+        OutboundEmail.objects.filter(id=held.id).update(status='SENDING',
+                                                         next_attempt_at=timezone.now() + timedelta(minutes=5))
+
+        claimed = make_worker(FakeResend(), batch_client=FakeResendBatch()).claim()
+
+        assert [email.to_email for email in claimed] == ['user0@test.com']
+
+    def test_without_a_batch_client_sends_one_by_one(self):
+        queue_batch(3)
+        client = FakeResend()
+
+        make_worker(client).run_once()
+
+        assert len(client.sent) == 3
+        assert OutboundEmail.objects.filter(status='SENT').count() == 3
+
+
+@pytest.mark.django_db
+def test_command_drains_outbox(monkeypatch, settings):
+    settings.EMAIL_OUTBOX_TRANSPORT = 'resend'
+    queue(3)
+    client = FakeResend()
+    monkeypatch.setattr(email_outbox, 'resend_client', lambda pool_size: client)
+
+    call_command('process_email_outbox', '--once', '--rate', '1000')
+
+    assert len(client.sent) == 3
+    assert not OutboundEmail.objects.exclude(status='SENT').exists()
+
+
+class CountingBackend(locmem.EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+@pytest.mark.django_db
+def test_without_resend_sends_through_email_backend(settings, monkeypatch):
+    settings.EMAIL_OUTBOX_TRANSPORT = 'django'
+    settings.EMAIL_BACKEND = 'tests.test_email_outbox.CountingBackend'
+    monkeypatch.setattr(CountingBackend, 'opened', 0)
+    monkeypatch.setattr(email_outbox, 'resend_client', lambda pool_size: pytest.fail('Resend must not be used'))
+    queue(5)
+    queue_batch(3)
+
+    worker = OutboxWorker(rate_limit=1000)
+    try:
+        assert worker.run_once() == 8
+    finally:
+        worker.close()
+
+    assert len(mail.outbox) == 8
+    assert mail.outbox[0].alternatives == [('<p>Hi</p>', 'text/html')]
+    assert mail.outbox[0].body == 'Hi'
+    assert CountingBackend.opened == 1
+    assert not OutboundEmail.objects.exclude(status='SENT').exists()
+
+
+class ResendApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = json.dumps({'id': 'email-1'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.mark.django_db
+def test_sends_reuse_one_connection(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ResendApiHandler)
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(resend, 'api_url', f'http://127.0.0.1:{server.server_port}')
+    monkeypatch.setattr(resend, 'api_key', 're_test')
+    monkeypatch.setattr(resend, 'default_http_client', PooledHTTPClient(pool_size=1))
+    queue(5)
+
+    try:
+        make_worker(resend.Emails, concurrency=1).run_once()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert OutboundEmail.objects.filter(status='SENT').count() == 5
+    assert server.connections == 1
@@ -0,0 +1,123 @@
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from api.services.google_clients import (
+    REFRESH_MARGIN, CredentialRefresher, LazyService, ThreadLocalClient, discovery_document,
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_PROBE = """
+import sys, django
+django.setup()
+import api.urls
+from api.services.google_drive_service import drive_service
+from api.services.google_docs_service import google_docs_service
+print(drive_service.is_initialized, google_docs_service.is_initialized, 'googleapiclient.discovery' in sys.modules)
+"""
+
+
+def run_python(code='', args=()):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'),
+           'PYTHONPATH': os.pathsep.join(map(str, sys.path))}
+    command = [sys.executable, *args] if args else [sys.executable, '-c', code]
+    return subprocess.run(command, cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+
+
+def test_url_import_builds_no_google_clients():
+    assert run_python(STARTUP_PROBE).stdout.split() == ['False', 'False', 'False']
+
+
+class TestLazyService:
+    def test_concurrent_first_use_builds_once(self):
+        built = []
+
+        class Slow:
+            def __init__(self):
+                time.sleep(0.05)
+                built.append(self)
+                self.name = 'slow'
+
+        service = LazyService(Slow)
+        threads = [threading.Thread(target=lambda: service.name) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(built) == 1
+        assert service.is_initialized
+
+
+def test_discovery_document_is_parsed_once():
+    assert discovery_document('drive', 'v3') is discovery_document('drive', 'v3')
+    assert discovery_document('drive', 'v3')['name'] == 'drive'
+
+
+def test_clients_are_per_thread():
+    clients, credentials = ThreadLocalClient(), AnonymousCredentials()
+    here = clients.get('drive', 'v3', credentials)
+    elsewhere = []
+    thread = threading.Thread(target=lambda: elsewhere.append(clients.get('drive', 'v3', credentials)))
+    thread.start()
+    thread.join()
+
+    assert clients.get('drive', 'v3', credentials) is here
+    assert elsewhere[0] is not here
+    assert clients.get('drive', 'v3', AnonymousCredentials()) is not here
+
+
+class FakeCredentials:
+    def __init__(self, expiry):
+        self.expiry = expiry
+        self.refreshed = threading.Event()
+
+    def refresh(self, request):
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+        self.refreshed.set()
+
+
+def test_refreshes_before_expiry():
+    credentials = FakeCredentials(datetime.utcnow() + REFRESH_MARGIN - timedelta(seconds=1))
+    saved = []
+
+    refresher = CredentialRefresher(credentials, on_refresh=saved.append).start()
+    try:
+        assert credentials.refreshed.wait(5)
+    finally:
+        refresher.stop()
+
+    assert saved == [credentials]
+    assert credentials.expiry > datetime.utcnow() + timedelta(minutes=55)
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not os.environ.get('STARTUP_BENCHMARK'), reason='set STARTUP_BENCHMARK=1 to run')
+def test_startup_benchmark():
+    """`manage.py check` wall time with lazy services vs. building them at import as before"""
+    eager = ("import django; django.setup(); from django.core.management import call_command\n"
+             "from api.services.google_drive_service import drive_service\n"
+             "from api.services.google_docs_service import google_docs_service\n"
+             "import googleapiclient.discovery, google_auth_oauthlib.flow, google.auth.transport.requests\n"
+             "drive_service._setup(); google_docs_service._setup(); call_command('check')")
+
+    def timed(**kwargs):
+        samples = []
+        for _ in range(5):
+            started = time.perf_counter()
+            run_python(**kwargs)
+            samples.append(time.perf_counter() - started)
+        return statistics.median(samples)
+
+    lazy_seconds = timed(args=('manage.py', 'check'))
+    eager_seconds = timed(code=eager)
+    print(f'\nmanage.py check: lazy {lazy_seconds * 1000:.0f}ms, '
+          f'eager Google clients {eager_seconds * 1000:.0f}ms')
@@ -0,0 +1,116 @@
+import json
+import re
+
+import httplib2
+import pytest
+from googleapiclient.discovery import build_from_document
+
+from api.models import Group, Thesis
+from api.services import google_docs_service as docs_module
+from api.services.google_clients import discovery_document
+from api.services.google_docs_service import GoogleDocsService
+from api.views import google_docs_views
+
+
+class FakeBatchHttp:
+    """Answers Drive batch requests, creating a permission per part unless its email is in `rejected`"""
+
+    def __init__(self, rejected=()):
+        self.rejected = set(rejected)
+        self.requests = []
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        self.requests.append(uri)
+        body = body.decode() if isinstance(body, bytes) else body
+        parts = []
+        for content_id, email in re.findall(r'Content-ID: <(.+?)>.*?"emailAddress": "([^"]+)"', body, re.S):
+            if email in self.rejected:
+                status, payload = '400 Bad Request', {'error': {'code': 400, 'message': 'Invalid email'}}
+            else:
+                status, payload = '200 OK', {'id': f'permission-{email}'}
+            parts.append(
+                f'--batch\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n\r\n{json.dumps(payload)}\r\n'
+            )
+        response = httplib2.Response({'status': '200', 'content-type': 'multipart/mixed; boundary=batch'})
+        return response, (''.join(parts) + '--batch--').encode()
+
+
+@pytest.fixture
+def fake_http():
+    return FakeBatchHttp()
+
+
+@pytest.fixture
+def docs_service(fake_http, monkeypatch):
+    drive = build_from_document(discovery_document('drive', 'v3'), http=fake_http)
+    monkeypatch.setattr(GoogleDocsService, 'drive', property(lambda self: drive))
+    return GoogleDocsService()
+
+
+class TestShareDocumentWithMany:
+    def test_shares_in_one_request(self, docs_service, fake_http):
+        recipients = [(f'user{i}@test.com', 'writer') for i in range(20)]
+
+        results = docs_service.share_document_with_many('doc-1', recipients)
+
+        assert len(fake_http.requests) == 1
+        assert fake_http.requests[0].endswith('/batch/drive/v3')
+        assert results == {email: {'id': f'permission-{email}'} for email, _ in recipients}
+
+    def test_splits_at_the_batch_limit(self, docs_service, fake_http, monkeypatch):
+        monkeypatch.setattr(docs_module, 'DRIVE_BATCH_LIMIT', 8)
+
+        results = docs_service.share_document_with_many('doc-1', [(f'user{i}@test.com', 'reader') for i in range(20)])
+
+        assert len(fake_http.requests) == 3
+        assert all(results.values())
+
+    def test_reports_failed_recipients(self, docs_service, fake_http):
+        fake_http.rejected = {'bad@test.com'}
+
+        results = docs_service.share_document_with_many('doc-1', [('good@test.com', 'writer'),
+                                                                   ('bad@test.com', 'writer')])
+
+        assert results == {'good@test.com': {'id': 'permission-good@test.com'}, 'bad@test.com': None}
+
+
+@pytest.mark.django_db
+class TestShareWithThesisView:
+    @pytest.fixture
+    def thesis(self, student_user, adviser_user, user_factory):
+        group = Group.objects.create(name='Sharers', status='APPROVED', leader=student_user, adviser=adviser_user)
+        group.members.add(student_user, user_factory(email='member@test.com'))
+        group.panels.add(user_factory(email='panel@test.com', role='PANEL'))
+        return Thesis.objects.create(title='Shared Draft', abstract='', group=group, proposer=student_user)
+
+    @pytest.fixture
+    def shared(self, monkeypatch):
+        calls = []
+
+        class FakeDocsService:
+            def share_document_with_many(self, document_id, recipients):
+                calls.append((document_id, recipients))
+                return {email: {'id': 'p'} for email, _ in recipients}
+
+        monkeypatch.setattr(google_docs_views, 'google_docs_service', FakeDocsService())
+        return calls
+
+    def test_shares_with_everyone_on_the_thesis(self, authenticated_client, thesis, shared):
+        response = authenticated_client.post('/api/google-docs/doc-1/share-thesis/', {'thesis': thesis.id},
+                                             format='json')
+
+        assert response.status_code == 200
+        document_id, recipients = shared[0]
+        assert document_id == 'doc-1'
+        assert sorted(recipients) == [('adviser@test.com', 'commenter'), ('member@test.com', 'writer'),
+                                      ('panel@test.com', 'commenter'), ('student@test.com', 'writer')]
+        assert sorted(response.data['shared']) == sorted(email for email, _ in recipients)
+
+    def test_outsiders_cannot_share(self, api_client, thesis, shared, user_factory):
+        api_client.force_authenticate(user_factory(email='outsider@test.com'))
+
+        response = api_client.post('/api/google-docs/doc-1/share-thesis/', {'thesis': thesis.id}, format='json')
+
+        assert response.status_code == 403
+        assert shared == []
@@ -0,0 +1,158 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from api.models import Group
+from api.serializers.group_serializers import GroupSerializer
+
+User = get_user_model()
+
+
+def make_students(count, prefix='student'):
+    return User.objects.bulk_create([
+        User(email=f'{prefix}{i}@test.com', role='STUDENT') for i in range(count)
+    ])
+
+
+@pytest.mark.django_db
+class TestMembershipValidation:
+    """Students may only belong to one group, checked with a single query"""
+
+    def test_serializer_rejects_student_in_other_group(self, student_user):
+        taken = Group.objects.create(name='Taken', leader=student_user)
+        taken.members.add(student_user)
+        free = make_students(3)
+
+        serializer = GroupSerializer(data={
+            'name': 'New Group',
+            'member_ids': [free[0].id, student_user.id, free[1].id],
+        })
+
+        assert not serializer.is_valid()
+        assert student_user.email in str(serializer.errors)
+
+    def test_serializer_check_is_one_query(self, django_assert_num_queries):
+        students = make_students(50)
+        serializer = GroupSerializer(data={'name': 'Big Group', 'member_ids': [s.id for s in students]})
+
+        # one to resolve the member ids, one for the membership check
+        with django_assert_num_queries(2):
+            assert serializer.is_valid(), serializer.errors
+
+    def test_update_excludes_own_group(self, student_user):
+        group = Group.objects.create(name='Mine', leader=student_user)
+        group.members.add(student_user)
+
+        serializer = GroupSerializer(group, data={'member_ids': [student_user.id]}, partial=True)
+
+        assert serializer.is_valid(), serializer.errors
+
+    def test_save_skips_check_when_membership_unchanged(self, student_user):
+        group = Group.objects.create(name='Stable', leader=student_user)
+        group.members.add(student_user)
+        group.save()
+        group.status = 'APPROVED'
+
+        with CaptureQueriesContext(connection) as ctx:
+            group.save()
+
+        assert not [q for q in ctx.captured_queries if 'api_group_members' in q['sql']]
+
+    def test_save_checks_after_member_added(self, student_user):
+        other = Group.objects.create(name='Other', leader=student_user)
+        other.members.add(student_user)
+        group = Group.objects.create(name='Joining')
+
+        group.members.add(student_user)
+
+        with pytest.raises(ValidationError, match=student_user.email):
+            group.save()
+
+
+@pytest.mark.django_db
+class TestBulkGroupCreate:
+    """A list payload creates every group in a bounded number of queries"""
+
+    def payload(self, students):
+        return [
+            {'name': f'Batch Group {i}', 'leader_id': students[i * 2].id,
+             'member_ids': [students[i * 2].id, students[i * 2 + 1].id]}
+            for i in range(len(students) // 2)
+        ]
+
+    @pytest.mark.slow
+    def test_create_500_groups(self, admin_client, django_assert_max_num_queries):
+        students = make_students(1000)
+
+        # SQLite splits the bulk inserts into several statements by its variable limit
+        with django_assert_max_num_queries(30):
+            response = admin_client.post('/api/groups/', self.payload(students), format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(response.data) == 500
+        assert len(response.data[0]['members']) == 2
+        assert Group.objects.filter(status='APPROVED').count() == 500
+        assert Group.objects.search('batch').count() == 500
+
+    def test_query_count_without_returning(self, admin_client, monkeypatch):
+        few, many = make_students(4, 'few'), make_students(40, 'many')
+        # MySQL can't return the ids of bulk-inserted rows; make SQLite behave the same
+        monkeypatch.setattr(connection.features, 'can_return_columns_from_insert', False)
+
+        with CaptureQueriesContext(connection) as few_queries:
+            assert admin_client.post('/api/groups/', self.payload(few), format='json').status_code == 201
+        with CaptureQueriesContext(connection) as many_queries:
+            response = admin_client.post('/api/groups/', self.payload(many), format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert len(many_queries) == len(few_queries)
+        created = Group.objects.filter(name__startswith='Batch Group').order_by('id')
+        assert [group.id for group in created[2:]] == [group['id'] for group in response.data]
+        group = Group.objects.get(id=response.data[7]['id'])
+        assert group.name == 'Batch Group 7'
+        assert set(group.members.values_list('email', flat=True)) == {'many14@test.com', 'many15@test.com'}
+        assert Group.objects.search('batch').count() == 22
+
+    def test_same_name_and_leader_without_returning(self, admin_client, monkeypatch):
+        students = make_students(4)
+        monkeypatch.setattr(connection.features, 'can_return_columns_from_insert', False)
+        payload = [{'name': 'Twin', 'member_ids': [students[0].id, students[1].id]},
+                   {'name': 'Twin', 'member_ids': [students[2].id, students[3].id]}]
+
+        response = admin_client.post('/api/groups/', payload, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        for group, pair in zip(response.data, (students[:2], students[2:])):
+            members = Group.objects.get(id=group['id']).members.values_list('id', flat=True)
+            assert set(members) >= {student.id for student in pair}
+
+    def test_keeps_each_groups_status(self, admin_client):
+        payload = self.payload(make_students(4))
+        payload[0]['status'] = 'PENDING'
+
+        response = admin_client.post('/api/groups/', payload, format='json')
+
+        assert [group['status'] for group in response.data] == ['PENDING', 'APPROVED']
+
+    def test_rejects_student_in_two_proposed_groups(self, admin_client):
+        students = make_students(4)
+        payload = self.payload(students)
+        payload[1]['member_ids'].append(students[0].id)
+
+        response = admin_client.post('/api/groups/', payload, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Group.objects.exists()
+
+    def test_rejects_student_already_in_group(self, admin_client):
+        students = make_students(4)
+        taken = Group.objects.create(name='Taken')
+        taken.members.add(students[3])
+
+        response = admin_client.post('/api/groups/', self.payload(students), format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert students[3].email in str(response.data)
@@ -0,0 +1,150 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+@pytest.fixture
+def group_setup(admin_user, adviser_user, panel_user, student_user):
+    """Three approved groups sharing an adviser and panelist, plus one pending proposal"""
+    from api.models import Group
+
+    approved = []
+    for i in range(3):
+        student = User.objects.create_user(email=f'member{i}@test.com', password=None, role='STUDENT')
+        group = Group.objects.create(name=f'Approved Group {i}', status='APPROVED',
+                                     adviser=adviser_user, leader=student)
+        group.members.add(student)
+        group.panels.add(panel_user)
+        approved.append(group)
+
+    pending = Group.objects.create(name='Pending Group', status='PENDING', leader=student_user)
+    pending.members.add(student_user)
+
+    return {
+        'admin': client_for(admin_user),
+        'student': client_for(student_user),
+        'approved': approved,
+        'pending': pending,
+        'adviser': adviser_user,
+        'panel': panel_user,
+    }
+
+
+# (client, method, url, data, expected queries)
+GROUP_ENDPOINTS = {
+    'list': ('admin', 'get', lambda s: '/api/groups/', None, 4),
+    'search': ('admin', 'get', lambda s: '/api/groups/?search=approved', None, 4),
+    'retrieve': ('admin', 'get', lambda s: f"/api/groups/{s['approved'][0].id}/", None, 4),
+    # student lookups resolve the user's groups once, then reuse them for filtering and permissions
+    'retrieve_own_pending': ('student', 'get', lambda s: f"/api/groups/{s['pending'].id}/", None, 5),
+    'current_user_groups': ('student', 'get', lambda s: '/api/groups/get_current_user_groups/', None, 5),
+    'pending_proposals': ('admin', 'get', lambda s: '/api/groups/pending_proposals/', None, 4),
+    # group with its members and panels, the thesis check and insert, full_clean's leader lookup, update
+    'approve': ('admin', 'post', lambda s: f"/api/groups/{s['pending'].id}/approve/", {}, 8),
+    'reject': ('admin', 'post', lambda s: f"/api/groups/{s['pending'].id}/reject/", {}, 6),
+    'assign_adviser': ('admin', 'post', lambda s: f"/api/groups/{s['approved'][0].id}/assign_adviser/",
+                       lambda s: {'adviser_id': s['adviser'].id}, 8),
+    'assign_panel': ('admin', 'post', lambda s: f"/api/groups/{s['approved'][0].id}/assign_panel/",
+                     lambda s: {'panel_ids': [s['panel'].id]}, 11),
+    'remove_panel': ('admin', 'post', lambda s: f"/api/groups/{s['approved'][0].id}/remove_panel/",
+                     lambda s: {'panel_id': s['panel'].id}, 11),
+}
+
+
+@pytest.mark.django_db
+class TestGroupEndpointQueries:
+    """Pin the exact number of SQL queries issued by each group endpoint"""
+
+    @pytest.mark.parametrize('endpoint', list(GROUP_ENDPOINTS))
+    def test_query_count(self, endpoint, group_setup, django_assert_num_queries):
+        client_name, method, url, data, expected = GROUP_ENDPOINTS[endpoint]
+        client = group_setup[client_name]
+        payload = data(group_setup) if callable(data) else data
+
+        with django_assert_num_queries(expected):
+            response = getattr(client, method)(url(group_setup), payload, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_tracing_adds_no_queries(self, group_setup, django_assert_num_queries, caplog):
+        """Turning tracing on logs events without issuing extra SQL"""
+        import logging
+
+        with caplog.at_level(logging.DEBUG, logger='api.views.group_views'):
+            with django_assert_num_queries(GROUP_ENDPOINTS['list'][4]):
+                group_setup['admin'].get('/api/groups/')
+
+        assert any(getattr(r, 'trace_event', None) == 'group.get_queryset' for r in caplog.records)
+
+
+def seed_groups(count, adviser, panel):
+    """Bulk-create `count` approved groups, each with two members and a shared panelist"""
+    from api.models import Group
+
+    students = User.objects.bulk_create([
+        User(email=f'bulk{i}@test.com', role='STUDENT') for i in range(count * 2)
+    ])
+    groups = Group.objects.bulk_create([
+        Group(name=f'Bulk Group {i}', status='APPROVED', adviser=adviser, leader=students[i * 2])
+        for i in range(count)
+    ])
+    Group.members.through.objects.bulk_create([
+        Group.members.through(group_id=group.id, user_id=students[i * 2 + offset].id)
+        for i, group in enumerate(groups) for offset in (0, 1)
+    ])
+    Group.panels.through.objects.bulk_create([
+        Group.panels.through(group_id=group.id, user_id=panel.id) for group in groups
+    ])
+    return groups
+
+
+@pytest.mark.django_db
+class TestGroupSerializerQueryBound:
+    """Serializing groups costs the same number of queries regardless of how many there are"""
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize('group_count', [1, 100, 1000])
+    def test_list(self, group_count, admin_client, adviser_user, panel_user, django_assert_num_queries):
+        seed_groups(group_count, adviser_user, panel_user)
+
+        # auth + page of groups (adviser/leader joined) + members + panels
+        with django_assert_num_queries(4):
+            response = admin_client.get('/api/groups/?page_size=500')
+
+        assert len(response.data['results']) == min(group_count, 500)
+        assert response.data['results'][0]['adviser']['email'] == adviser_user.email
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize('group_count', [1, 100, 1000])
+    def test_current_user_groups(self, group_count, adviser_client, adviser_user, panel_user,
+                                 django_assert_num_queries):
+        seed_groups(group_count, adviser_user, panel_user)
+
+        # auth + membership + groups + members + panels
+        with django_assert_num_queries(5):
+            response = adviser_client.get('/api/groups/get_current_user_groups/')
+
+        assert len(response.data) == group_count
+        assert len(response.data[-1]['members']) == 2
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize('group_count', [1, 100, 1000])
+    def test_search(self, group_count, admin_client, adviser_user, panel_user, django_assert_num_queries):
+        from api.models import Group
+
+        seed_groups(group_count, adviser_user, panel_user)
+
+        with django_assert_num_queries(4):
+            response = admin_client.get('/api/groups/?search=bulk&page_size=500')
+
+        assert len(response.data['results']) == min(group_count, 500)
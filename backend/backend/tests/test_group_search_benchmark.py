@@ -0,0 +1,62 @@
+"""
+Latency of Group.objects.search at 10k and 100k groups: the first 20 matches, and
+the first page of /api/groups/?search= as GroupViewSet orders it.
+
+Opt in with GROUP_SEARCH_BENCHMARK=1.
+"""
+import os
+import random
+import time
+
+import pytest
+
+from api.models import Group
+
+pytestmark = pytest.mark.skipif(not os.environ.get('GROUP_SEARCH_BENCHMARK'),
+                                reason='set GROUP_SEARCH_BENCHMARK=1 to run')
+
+WORDS = (
+    'learning neural vision language robotics network security blockchain cloud '
+    'energy health agriculture mobile analytics quantum compiler database graph '
+    'sensor embedded education finance traffic climate speech recommender'
+).split()
+
+SIZES = (10_000, 100_000)
+# Common words, a multi-word phrase, an infix and a term nothing matches
+QUERIES = ('neural', 'quantum comp', 'curi', 'zebra')
+REPEAT = 5
+
+
+def seed(count):
+    rng = random.Random(count)
+    existing = Group.objects.count()
+    Group.objects.bulk_create([
+        Group(
+            name=f'{rng.choice(WORDS).title()} Group {existing + i}',
+            status='APPROVED',
+            proposed_topic_title=' '.join(rng.sample(WORDS, 3)),
+            keywords=', '.join(rng.sample(WORDS, 4)),
+            abstract=' '.join(rng.sample(WORDS, 8)),
+        )
+        for i in range(count - existing)
+    ], batch_size=1000)
+
+
+def best_of(queryset):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        list(queryset[:20])
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+@pytest.mark.slow
+@pytest.mark.django_db(transaction=True)
+def test_search_latency():
+    for size in SIZES:
+        seed(size)
+        for query in QUERIES:
+            first = best_of(Group.objects.search(query))
+            page = best_of(Group.objects.search(query).order_by('created_at', 'id'))
+            print(f'\ngroups={size:>7} query={query!r:<16} first 20={first:.1f}ms first page={page:.1f}ms', end='')
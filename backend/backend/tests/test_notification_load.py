@@ -0,0 +1,88 @@
+"""
+Request volume of badge polling vs. NotificationConsumer push for 1,000 connected users.
+
+Opt in with CHANNELS_LOAD_TEST=1.
+"""
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.utils.notifications import notify_users
+
+pytestmark = pytest.mark.skipif(not os.environ.get('CHANNELS_LOAD_TEST'),
+                                reason='set CHANNELS_LOAD_TEST=1 to run')
+
+User = get_user_model()
+
+USERS = 1000
+WINDOW = 300         # seconds of activity being compared
+POLL_INTERVAL = 30   # how often a polling client refreshes its badge
+FAN_OUTS = 20        # notification fan-outs during the window...
+FAN_OUT_SIZE = 25    # ...each to this many users
+
+
+@pytest.mark.slow
+@pytest.mark.django_db(transaction=True)
+def test_polling_vs_push():
+    from backend.asgi import application
+
+    users = User.objects.bulk_create([User(email=f'reader{i}@test.com', role='STUDENT') for i in range(USERS)])
+    tokens = [str(AccessToken.for_user(user)) for user in users]
+
+    # Polling: every client asks for its badge every POLL_INTERVAL seconds
+    client = APIClient()
+    sample = []
+    for token in tokens[:100]:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        started = time.perf_counter()
+        assert client.get('/api/notifications/unread_count/').status_code == 200
+        sample.append(time.perf_counter() - started)
+    poll_requests = USERS * WINDOW // POLL_INTERVAL
+    poll_seconds = poll_requests * statistics.mean(sample)
+
+    # Push: every client holds a socket and only hears about its own notifications
+    async def run():
+        sockets = [WebsocketCommunicator(application, f'/ws/notifications/?token={token}',
+                                         headers=[(b'origin', b'http://localhost')]) for token in tokens]
+        for socket in sockets:
+            assert (await socket.connect())[0]
+        await asyncio.gather(*(socket.receive_json_from(timeout=10) for socket in sockets))
+
+        rng = random.Random(0)
+        latencies, frames = [], 0
+        started = time.perf_counter()
+        for _ in range(FAN_OUTS):
+            recipients = rng.sample(range(USERS), FAN_OUT_SIZE)
+            sent = time.perf_counter()
+            await database_sync_to_async(notify_users)([users[i] for i in recipients], 'Load notification')
+            for index in recipients:
+                message = await sockets[index].receive_json_from(timeout=10)
+                assert message['type'] == 'notification'
+                latencies.append(time.perf_counter() - sent)
+                frames += 1
+        elapsed = time.perf_counter() - started
+
+        for socket in sockets:
+            await socket.disconnect()
+        return frames, latencies, elapsed
+
+    frames, latencies, elapsed = async_to_sync(run)()
+
+    assert frames == FAN_OUTS * FAN_OUT_SIZE
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+    print(f'\n{USERS} users over {WINDOW}s:'
+          f'\n  polling every {POLL_INTERVAL}s: {poll_requests:,} HTTP requests, '
+          f'~{poll_seconds:.1f}s of request time ({statistics.mean(sample) * 1000:.2f}ms each)'
+          f'\n  push: {USERS:,} sockets, 0 requests, {frames} frames for {FAN_OUTS} fan-outs '
+          f'(p50 {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms, '
+          f'{elapsed:.2f}s total)')
@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import ArchivedNotification, Notification
+from api.services.notification_retention import archive_notifications
+
+
+def make_notification(user, days_old, is_read=True, title='Old'):
+    notification = Notification.objects.create(user=user, title=title, is_read=is_read)
+    # created_at is auto_now_add, so backdate it afterwards
+    Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(days=days_old))
+    notification.refresh_from_db()
+    return notification
+
+
+@pytest.mark.django_db
+class TestArchiveNotifications:
+    def test_moves_only_old_read_notifications(self, student_user):
+        old = make_notification(student_user, 120, title='Old and read')
+        unread = make_notification(student_user, 120, is_read=False)
+        recent = make_notification(student_user, 10)
+
+        assert archive_notifications(days=90) == 1
+
+        assert set(Notification.objects.values_list('id', flat=True)) == {unread.id, recent.id}
+        archived = ArchivedNotification.objects.get()
+        assert (archived.id, archived.user, archived.title, archived.created_at) == \
+            (old.id, student_user, 'Old and read', old.created_at)
+
+    def test_moves_rows_in_batches(self, student_user):
+        for _ in range(7):
+            make_notification(student_user, 100)
+
+        with CaptureQueriesContext(connection) as queries:
+            assert archive_notifications(days=90, batch_size=3) == 7
+
+        deletes = [query for query in queries if query['sql'].startswith('DELETE')]
+        assert len(deletes) == 3
+        assert ArchivedNotification.objects.count() == 7
+        assert not Notification.objects.exists()
+
+    def test_nothing_to_archive(self, student_user):
+        make_notification(student_user, 1)
+
+        assert archive_notifications(days=90) == 0
+        assert not ArchivedNotification.objects.exists()
+
+    def test_command_uses_retention_setting(self, settings, student_user):
+        settings.NOTIFICATION_RETENTION_DAYS = 30
+        make_notification(student_user, 45)
+
+        call_command('archive_notifications')
+
+        assert ArchivedNotification.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestArchiveEndpoint:
+    def test_lists_own_archived_notifications_newest_first(self, authenticated_client, student_user, adviser_user):
+        for days in (200, 150, 100):
+            make_notification(student_user, days, title=f'{days} days')
+        make_notification(adviser_user, 100, title='Not mine')
+        archive_notifications(days=90)
+
+        first = authenticated_client.get('/api/notifications/archive/', {'page_size': 2})
+        second = authenticated_client.get(first.data['next'])
+
+        assert first.status_code == 200
+        assert [n['title'] for n in first.data['results']] == ['100 days', '150 days']
+        assert [n['title'] for n in second.data['results']] == ['200 days']
+        assert second.data['next'] is None
+
+    def test_archive_is_not_a_notification_id(self, authenticated_client):
+        response = authenticated_client.get('/api/notifications/archive/')
+
+        assert response.status_code == 200
+        assert response.data['results'] == []
+
+    def test_requires_authentication(self, api_client):
+        assert api_client.get('/api/notifications/archive/').status_code == 401
@@ -0,0 +1,163 @@
+import os
+import threading
+
+import pytest
+from django.core import mail
+from django.core.cache import CacheHandler
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Group, Notification, OutboundEmail, Thesis
+from api.utils import notifications
+from api.utils.notifications import create_notification, get_unread_count, notify_users
+
+
+def make_users(user_factory, count, role='PANEL'):
+    return [user_factory(email=f'{role.lower()}{i}@test.com', role=role) for i in range(count)]
+
+
+@pytest.mark.django_db
+class TestNotifyUsers:
+    def test_writes_notifications_and_emails(self, user_factory):
+        users = make_users(user_factory, 3)
+
+        notifications = notify_users(users, 'Review requested', body='Please review\nchapter 2', link='/thesis/1')
+
+        assert [n.user for n in notifications] == users
+        assert Notification.objects.filter(title='Review requested', link='/thesis/1').count() == 3
+        emails = OutboundEmail.objects.order_by('to_email')
+        assert [email.to_email for email in emails] == ['panel0@test.com', 'panel1@test.com', 'panel2@test.com']
+        assert '<p>Please review<br>chapter 2</p>' in emails[0].html
+        assert mail.outbox == []
+
+    def test_query_count_does_not_grow_with_recipients(self, user_factory):
+        few, many = make_users(user_factory, 2), make_users(user_factory, 12, role='STUDENT')
+
+        with CaptureQueriesContext(connection) as few_queries:
+            notify_users(few, 'Hello')
+        with CaptureQueriesContext(connection) as many_queries:
+            notify_users(many, 'Hello')
+
+        assert len(many_queries) == len(few_queries)
+        assert Notification.objects.count() == OutboundEmail.objects.count() == 14
+
+    def test_create_notification_returns_the_row(self, student_user):
+        notification = create_notification(student_user, 'Approved', body='Your topic has been approved.')
+
+        assert notification.pk and notification.user == student_user
+        assert OutboundEmail.objects.get().to_email == student_user.email
+
+
+@pytest.mark.django_db
+def test_approving_a_thesis_notifies_every_panelist(adviser_client, adviser_user, student_user, user_factory):
+    group = Group.objects.create(name='Panel Group', status='APPROVED', adviser=adviser_user, leader=student_user)
+    group.members.add(student_user)
+    panels = make_users(user_factory, 5)
+    group.panels.add(*panels)
+    thesis = Thesis.objects.create(title='Fan-out', abstract='', group=group, proposer=student_user,
+                                   status='CONCEPT_APPROVED')
+
+    response = adviser_client.post(f'/api/theses/{thesis.id}/adviser_review/', {'action': 'approve_thesis'},
+                                   format='json')
+
+    assert response.status_code == 200
+    assert set(Notification.objects.values_list('user', flat=True)) == {panel.id for panel in panels}
+    assert OutboundEmail.objects.filter(subject='Thesis ready for panel review: Fan-out').count() == 5
+
+
+def unread(client):
+    return client.get('/api/notifications/unread_count/').data['unread_count']
+
+
+@pytest.fixture(params=['file', 'redis'])
+def worker_caches(request, tmp_path):
+    """Two independent clients of one shared cache, as two worker processes would hold"""
+    if request.param == 'redis':
+        if not os.environ.get('REDIS_URL'):
+            pytest.skip('set REDIS_URL to run against Redis')
+        config = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': os.environ['REDIS_URL'],
+                  'KEY_PREFIX': 'test-unread'}
+    else:
+        config = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': str(tmp_path)}
+    return [CacheHandler({'default': config})['default'] for _ in range(2)]
+
+
+# Counters change when the transaction commits, so these tests need real commits
+@pytest.mark.django_db(transaction=True)
+class TestUnreadCount:
+    def test_counter_follows_new_notifications(self, authenticated_client, student_user, adviser_user):
+        assert unread(authenticated_client) == 0
+
+        create_notification(student_user, 'One')
+        notify_users([student_user, adviser_user], 'Two')
+
+        with CaptureQueriesContext(connection) as queries:
+            assert unread(authenticated_client) == 2
+        assert not any('COUNT(' in query['sql'] for query in queries)
+
+    def test_badge_cost_does_not_grow_with_notifications(self, authenticated_client, student_user):
+        unread(authenticated_client)
+        with CaptureQueriesContext(connection) as few:
+            unread(authenticated_client)
+        notify_users([student_user] * 30, 'Many')
+        with CaptureQueriesContext(connection) as many:
+            assert unread(authenticated_client) == 30
+
+        assert len(many) == len(few)
+
+    def test_mark_read_decrements_once(self, authenticated_client, student_user):
+        first, _ = notify_users([student_user, student_user], 'Unread')
+        assert unread(authenticated_client) == 2
+
+        for _ in range(2):
+            assert authenticated_client.post(f'/api/notifications/{first.id}/mark_read/').data['is_read']
+
+        assert unread(authenticated_client) == 1
+        assert Notification.objects.filter(is_read=False).count() == 1
+
+    def test_mark_all_read_is_one_update(self, authenticated_client, student_user, adviser_user):
+        notify_users([student_user] * 5 + [adviser_user], 'Unread')
+        assert unread(authenticated_client) == 5
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.post('/api/notifications/mark_all_read/')
+
+        assert response.data == {'updated': 5}
+        assert [query['sql'].split()[0] for query in queries if query['sql'].startswith('UPDATE')] == ['UPDATE']
+        assert unread(authenticated_client) == 0
+        assert Notification.objects.get(user=adviser_user).is_read is False
+
+    def test_fan_out_runs_off_the_request_thread(self, student_user, adviser_user, monkeypatch):
+        sent = []
+
+        class ChannelLayer:
+            async def group_send(self, group, message):
+                sent.append((threading.current_thread().name, group, message['unread_count']))
+
+        monkeypatch.setattr(notifications, 'get_channel_layer', lambda: ChannelLayer())
+        monkeypatch.setattr(notifications, 'fan_out', notifications.NotificationFanOut(chunk_size=2))
+        get_unread_count(student_user.pk)
+
+        notify_users([student_user, adviser_user, student_user], 'Fan-out')
+        notifications.fan_out.wait()
+
+        assert all(name.startswith('notification-fanout') for name, _, _ in sent)
+        assert [(group, count) for _, group, count in sent] == [
+            (f'notifications_{student_user.pk}', 1),
+            (f'notifications_{adviser_user.pk}', None),
+            (f'notifications_{student_user.pk}', 2),
+        ]
+
+    def test_counter_is_shared_between_workers(self, worker_caches, student_user, monkeypatch):
+        writer, reader = worker_caches
+        monkeypatch.setattr(notifications, 'cache', reader)
+        assert get_unread_count(student_user.pk) == 0
+
+        monkeypatch.setattr(notifications, 'cache', writer)
+        notify_users([student_user] * 3, 'Elsewhere')
+
+        monkeypatch.setattr(notifications, 'cache', reader)
+        with CaptureQueriesContext(connection) as queries:
+            assert get_unread_count(student_user.pk) == 3
+        assert len(queries) == 0
+        reader.delete(notifications.unread_count_key(student_user.pk))
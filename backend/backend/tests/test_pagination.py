@@ -0,0 +1,78 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    """Test keyset pagination on the list endpoints"""
+
+    def _walk(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert 'count' not in response.data
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_groups_walk_in_created_order(self, admin_client):
+        from api.models import Group
+
+        groups = [Group.objects.create(name=f'Group {i}', status='APPROVED') for i in range(7)]
+
+        ids = self._walk(admin_client, '/api/groups/?page_size=3')
+
+        assert ids == [g.id for g in groups]
+
+    def test_notifications_newest_first(self, authenticated_client, student_user):
+        from api.models import Notification
+
+        notifications = [Notification.objects.create(user=student_user, title=f'N{i}') for i in range(5)]
+
+        ids = self._walk(authenticated_client, '/api/notifications/?page_size=2')
+
+        assert ids == [n.id for n in reversed(notifications)]
+
+    def test_schedules_ordered_by_start(self, adviser_client, adviser_user):
+        from api.models import Group, DefenseSchedule
+
+        start_time = timezone.now() + timedelta(days=7)
+        groups = Group.objects.bulk_create([Group(name=f'Group {i}', adviser=adviser_user) for i in range(4)])
+        schedules = DefenseSchedule.objects.bulk_create([
+            DefenseSchedule(group=group, start_at=start_time - timedelta(days=i),
+                            end_at=start_time - timedelta(days=i) + timedelta(hours=1))
+            for i, group in enumerate(groups)
+        ])
+
+        ids = self._walk(adviser_client, '/api/schedules/?page_size=3')
+
+        assert ids == [s.id for s in reversed(schedules)]
+
+    def test_page_size_is_capped(self, admin_client, monkeypatch):
+        from api.models import Group
+        from api.pagination import KeysetPagination
+
+        Group.objects.bulk_create([Group(name=f'Group {i}', status='APPROVED') for i in range(5)])
+        monkeypatch.setattr(KeysetPagination, 'max_page_size', 2)
+
+        response = admin_client.get('/api/groups/?page_size=1000')
+
+        assert len(response.data['results']) == 2
+        assert response.data['next'] is not None
+
+    def test_group_search_walks_in_created_order(self, admin_client):
+        from api.models import Group
+
+        abstract_hit = Group.objects.create(name='Systems Lab', status='APPROVED', abstract='robotics work')
+        Group.objects.create(name='Vision Lab', status='APPROVED')
+        name_hit = Group.objects.create(name='Robotics Lab', status='APPROVED')
+
+        ids = self._walk(admin_client, '/api/groups/?search=robotics&page_size=1')
+
+        assert ids == [abstract_hit.id, name_hit.id]
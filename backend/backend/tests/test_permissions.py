@@ -0,0 +1,83 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIRequestFactory
+
+from api.models import Group
+from api.models.schedule_models import DefenseSchedule
+from api.permissions.membership import GroupMembership, get_group_membership
+
+User = get_user_model()
+
+
+@pytest.fixture
+def groups(student_user, adviser_user, panel_user):
+    """One group per relation the resolver tracks, plus a group the student has nothing to do with"""
+    member_of = Group.objects.create(name='Member Of', status='APPROVED', leader=student_user)
+    member_of.members.add(student_user)
+    advised = Group.objects.create(name='Advised', status='APPROVED', adviser=adviser_user)
+    panelled = Group.objects.create(name='Panelled', status='APPROVED')
+    panelled.panels.add(panel_user)
+    outsider = User.objects.create_user(email='outsider@test.com', password=None, role='STUDENT')
+    unrelated = Group.objects.create(name='Unrelated', status='PENDING', leader=outsider)
+    unrelated.members.add(outsider)
+    return {'member_of': member_of, 'advised': advised, 'panelled': panelled, 'unrelated': unrelated}
+
+
+@pytest.mark.django_db
+class TestGroupMembership:
+    """The resolver loads every group a user belongs to in one UNION query"""
+
+    def test_splits_groups_by_relation(self, groups, student_user, adviser_user, panel_user,
+                                       django_assert_num_queries):
+        with django_assert_num_queries(1):
+            membership = GroupMembership.for_user(student_user)
+
+        assert membership.member == {groups['member_of'].id}
+        assert groups['member_of'].id in membership
+        assert groups['unrelated'].id not in membership
+        assert GroupMembership.for_user(adviser_user).advised == {groups['advised'].id}
+        assert GroupMembership.for_user(panel_user).panel == {groups['panelled'].id}
+
+    def test_resolved_once_per_request(self, groups, student_user, django_assert_num_queries):
+        request = APIRequestFactory().get('/')
+        request.user = student_user
+
+        with django_assert_num_queries(1):
+            first = get_group_membership(request)
+            second = get_group_membership(request)
+
+        assert first is second
+
+
+@pytest.mark.django_db
+class TestMembershipPermissions:
+    """Object permissions check the resolved membership instead of loading the M2M tables"""
+
+    def test_student_cannot_retrieve_unrelated_pending_group(self, groups, authenticated_client):
+        response = authenticated_client.get(f"/api/groups/{groups['unrelated'].id}/")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_student_retrieves_own_group(self, groups, authenticated_client):
+        response = authenticated_client.get(f"/api/groups/{groups['member_of'].id}/")
+
+        assert response.status_code == status.HTTP_200_OK
+
+    @pytest.fixture
+    def schedule(self, groups, admin_user):
+        start = timezone.now() + timedelta(days=3)
+        return DefenseSchedule.objects.create(group=groups['panelled'], start_at=start,
+                                              end_at=start + timedelta(hours=1), created_by=admin_user)
+
+    def test_schedule_visible_to_its_panel(self, schedule, panel_client):
+        response = panel_client.get(f'/api/schedules/{schedule.id}/')
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_schedule_hidden_from_other_students(self, schedule, authenticated_client):
+        response = authenticated_client.get(f'/api/schedules/{schedule.id}/')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
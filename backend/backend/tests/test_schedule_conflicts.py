@@ -0,0 +1,193 @@
+import pytest
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+def seed_schedules(count, adviser, panel, start_time):
+    """Bulk-create `count` groups with one overlapping schedule each"""
+    from api.models import Group, DefenseSchedule
+
+    groups = Group.objects.bulk_create([
+        Group(name=f'Bench Group {i}', status='APPROVED', adviser=adviser if i % 2 == 0 else None)
+        for i in range(count)
+    ])
+    Group.panels.through.objects.bulk_create([
+        Group.panels.through(group_id=group.id, user_id=panel.id)
+        for group in groups[1::2]
+    ])
+    DefenseSchedule.objects.bulk_create([
+        DefenseSchedule(
+            group=group,
+            start_at=start_time + timedelta(minutes=i % 60),
+            end_at=start_time + timedelta(hours=2),
+            location=f'Room {i}'
+        )
+        for i, group in enumerate(groups)
+    ])
+
+
+@pytest.mark.django_db
+class TestScheduleConflictEngine:
+    """Test the set-based conflict lookup in DefenseSchedule.check_conflicts"""
+
+    def _target_group(self, adviser, panel):
+        from api.models import Group
+
+        group = Group.objects.create(name='Target Group', adviser=adviser)
+        group.panels.add(panel)
+        return group
+
+    def test_conflicts_by_adviser_and_panel(self, adviser_user, panel_user):
+        """Schedules sharing the adviser or a panelist are reported, others are not"""
+        from api.models import Group, DefenseSchedule
+
+        start_time = timezone.now() + timedelta(days=7)
+        other_adviser = User.objects.create_user(email='other@test.com', password='x', role='ADVISER')
+        third_adviser = User.objects.create_user(email='third@test.com', password='x', role='ADVISER')
+
+        by_adviser = Group.objects.create(name='Adviser Group', adviser=adviser_user)
+        by_panel = Group.objects.create(name='Panel Group', adviser=other_adviser)
+        by_panel.panels.add(panel_user)
+        unrelated = Group.objects.create(name='Unrelated Group', adviser=third_adviser)
+
+        for group in (by_adviser, by_panel, unrelated):
+            DefenseSchedule.objects.create(
+                group=group, start_at=start_time, end_at=start_time + timedelta(hours=1)
+            )
+
+        target = self._target_group(adviser_user, panel_user)
+        conflicts = DefenseSchedule.check_conflicts(
+            target, start_time + timedelta(minutes=30), start_time + timedelta(hours=2)
+        )
+
+        assert sorted(c.group.name for c in conflicts) == ['Adviser Group', 'Panel Group']
+
+    def test_no_conflict_outside_window(self, adviser_user, panel_user):
+        """Back-to-back schedules do not conflict"""
+        from api.models import Group, DefenseSchedule
+
+        start_time = timezone.now() + timedelta(days=7)
+        group = Group.objects.create(name='Adviser Group', adviser=adviser_user)
+        DefenseSchedule.objects.create(
+            group=group, start_at=start_time, end_at=start_time + timedelta(hours=1)
+        )
+
+        target = self._target_group(adviser_user, panel_user)
+        result = DefenseSchedule.validate_schedule_availability(
+            target, start_time + timedelta(hours=1), start_time + timedelta(hours=2)
+        )
+
+        assert result == {'has_conflicts': False, 'conflicts': []}
+
+    def test_availability_payload(self, adviser_user, panel_user):
+        """validate_schedule_availability keeps its payload shape"""
+        from api.models import Group, DefenseSchedule
+
+        start_time = timezone.now() + timedelta(days=7)
+        group = Group.objects.create(name='Adviser Group', adviser=adviser_user)
+        schedule = DefenseSchedule.objects.create(
+            group=group, start_at=start_time, end_at=start_time + timedelta(hours=1), location='Room 101'
+        )
+
+        target = self._target_group(adviser_user, panel_user)
+        result = DefenseSchedule.validate_schedule_availability(
+            target, start_time, start_time + timedelta(hours=1)
+        )
+
+        assert result['has_conflicts'] is True
+        assert result['conflicts'] == [{
+            'id': schedule.id,
+            'group': 'Adviser Group',
+            'start_at': schedule.start_at,
+            'end_at': schedule.end_at,
+            'location': 'Room 101'
+        }]
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize('schedule_count', [10, 500, 3000])
+    def test_query_count_independent_of_overlaps(self, schedule_count, adviser_user, panel_user,
+                                                 django_assert_num_queries):
+        """Benchmark: the conflict check costs one query however many schedules overlap"""
+        from api.models import DefenseSchedule
+
+        start_time = timezone.now() + timedelta(days=7)
+        seed_schedules(schedule_count, adviser_user, panel_user, start_time)
+        target = self._target_group(adviser_user, panel_user)
+
+        with django_assert_num_queries(1):
+            result = DefenseSchedule.validate_schedule_availability(
+                target, start_time, start_time + timedelta(hours=2)
+            )
+
+        assert len(result['conflicts']) == schedule_count
+
+
+@pytest.mark.django_db
+class TestUserConflictsEndpoint:
+    """Test the sweep-line implementation behind /api/schedules/user-conflicts/"""
+
+    def test_overlapping_pairs(self, adviser_client, adviser_user):
+        """Only schedules that actually overlap are paired, in start order"""
+        from api.models import Group, DefenseSchedule
+
+        start_time = timezone.now() + timedelta(days=7)
+        groups = Group.objects.bulk_create([
+            Group(name=f'Group {i}', status='APPROVED', adviser=adviser_user) for i in range(3)
+        ])
+        first, second, third = DefenseSchedule.objects.bulk_create([
+            DefenseSchedule(group=groups[0], start_at=start_time, end_at=start_time + timedelta(hours=2)),
+            DefenseSchedule(group=groups[1], start_at=start_time + timedelta(hours=1),
+                            end_at=start_time + timedelta(hours=3)),
+            DefenseSchedule(group=groups[2], start_at=start_time + timedelta(hours=3),
+                            end_at=start_time + timedelta(hours=4)),
+        ])
+
+        response = adviser_client.get('/api/schedules/user-conflicts/')
+
+        assert response.status_code == 200
+        assert response.data['has_conflicts'] is True
+        pairs = [
+            (entry['schedule']['id'], [c['id'] for c in entry['conflicts']])
+            for entry in response.data['conflicts']
+        ]
+        assert pairs == [(first.id, [second.id]), (second.id, [first.id])]
+        assert response.data['conflicts'][0]['schedule']['group_name'] == 'Group 0'
+
+    def test_date_range_keeps_edge_conflicts(self, adviser_client, adviser_user):
+        """A schedule outside the range is still reported as a conflict of one inside it"""
+        from api.models import Group, DefenseSchedule
+
+        start_time = timezone.now() + timedelta(days=7)
+        groups = Group.objects.bulk_create([
+            Group(name=f'Group {i}', status='APPROVED', adviser=adviser_user) for i in range(2)
+        ])
+        early, inside = DefenseSchedule.objects.bulk_create([
+            DefenseSchedule(group=groups[0], start_at=start_time - timedelta(hours=1),
+                            end_at=start_time + timedelta(hours=1)),
+            DefenseSchedule(group=groups[1], start_at=start_time, end_at=start_time + timedelta(hours=2)),
+        ])
+
+        response = adviser_client.get('/api/schedules/user-conflicts/', {
+            'start_date': start_time.isoformat(),
+        })
+
+        assert [entry['schedule']['id'] for entry in response.data['conflicts']] == [inside.id]
+        assert [c['id'] for c in response.data['conflicts'][0]['conflicts']] == [early.id]
+
+    @pytest.mark.slow
+    @pytest.mark.parametrize('schedule_count', [10, 300])
+    def test_query_count_independent_of_schedules(self, schedule_count, adviser_client, adviser_user,
+                                                  panel_user, django_assert_num_queries):
+        """Benchmark: a busy adviser's conflict report is a fixed number of queries"""
+        start_time = timezone.now() + timedelta(days=7)
+        seed_schedules(schedule_count, adviser_user, panel_user, start_time)
+
+        # Authentication (user lookup) + the single schedules fetch
+        with django_assert_num_queries(2):
+            response = adviser_client.get('/api/schedules/user-conflicts/')
+
+        assert response.status_code == 200
+        assert len(response.data['conflicts']) == (schedule_count + 1) // 2
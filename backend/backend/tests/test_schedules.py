@@ -262,7 +262,7 @@ class TestScheduleCreation:
         response = adviser_client.get('/api/schedules/')
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) >= 1
+        assert len(response.data['results']) >= 1
 
     def test_list_schedules_filtered_by_group(self, adviser_client, adviser_user):
         """Test listing schedules filtered by group"""
@@ -332,8 +332,8 @@ class TestScheduleCreation:
         response = adviser_client.get(f'/api/schedules/?group_id={group1.id}')
         
         assert response.status_code == status.HTTP_200_OK
-        assert len(response.data) == 1
-        assert response.data[0]['group'] == group1.id
+        assert len(response.data['results']) == 1
+        assert response.data['results'][0]['group'] == group1.id
 
     def test_list_schedules_filtered_by_date_range(self, adviser_client, adviser_user):
         """Test listing schedules filtered by date range"""
@@ -390,7 +390,7 @@ class TestScheduleCreation:
         
         assert response.status_code == status.HTTP_200_OK
         # Should only return January schedules
-        for schedule in response.data:
+        for schedule in response.data['results']:
             schedule_date = datetime.fromisoformat(schedule['start_at'].replace('Z', '+00:00')).date()
             assert schedule_date.month == 1
             assert schedule_date.year == 2024
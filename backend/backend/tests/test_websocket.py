@@ -0,0 +1,317 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.models import Document, Group, Thesis
+from api.utils.notifications import create_notification
+from backend.asgi import application
+
+
+@pytest.fixture
+def document(student_user, adviser_user):
+    group = Group.objects.create(name='Editors', status='APPROVED', leader=student_user, adviser=adviser_user)
+    group.members.add(student_user)
+    thesis = Thesis.objects.create(title='Shared Draft', group=group, proposer=student_user)
+    return Document.objects.create(thesis=thesis, uploaded_by=student_user, provider='google',
+                                   google_doc_url='https://docs.google.com/document/d/abc/edit')
+
+
+def token_for(user):
+    return str(RefreshToken.for_user(user).access_token)
+
+
+def communicator(document, token=None, headers=None):
+    path = f'/ws/document/{document.id}/'
+    if token:
+        path += f'?token={token}'
+    return WebsocketCommunicator(application, path, headers=[(b'origin', b'http://localhost')] + (headers or []))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDocumentSocketRouting:
+    """The ASGI router mounts DocumentEditConsumer behind JWT authentication"""
+
+    def test_rejects_missing_token(self, document):
+        async def run():
+            socket = communicator(document)
+            connected, code = await socket.connect()
+            return connected, code
+
+        connected, code = async_to_sync(run)()
+
+        assert not connected
+        assert code == 4001
+
+    def test_rejects_invalid_token(self, document):
+        async def run():
+            connected, _ = await communicator(document, token='not-a-jwt').connect()
+            return connected
+
+        assert not async_to_sync(run)()
+
+    def test_rejects_users_outside_the_group(self, document, user_factory):
+        outsider = token_for(user_factory(email='outsider@test.com'))
+
+        async def run():
+            return await communicator(document, token=outsider).connect()
+
+        assert async_to_sync(run)() == (False, 4003)
+
+    def test_admin_may_join_any_document(self, document, admin_user):
+        token = token_for(admin_user)
+
+        async def run():
+            socket = communicator(document, token=token)
+            connected, _ = await socket.connect()
+            await socket.disconnect()
+            return connected
+
+        assert async_to_sync(run)()
+
+    def test_query_token_connects_and_sends_state(self, document, student_user):
+        token = token_for(student_user)
+
+        async def run():
+            socket = communicator(document, token=token)
+            connected, _ = await socket.connect()
+            messages = {}
+            for _ in range(2):
+                message = await socket.receive_json_from()
+                messages[message['type']] = message
+            await socket.disconnect()
+            return connected, messages
+
+        connected, messages = async_to_sync(run)()
+
+        assert connected
+        assert messages['user_joined'] == {'type': 'user_joined', 'user': {
+            'id': student_user.id, 'username': student_user.email,
+            'first_name': student_user.first_name, 'last_name': student_user.last_name,
+        }}
+        assert messages['document_state']['document']['title'] == 'Shared Draft'
+
+    def test_bearer_header_connects(self, document, student_user):
+        token = token_for(student_user)
+
+        async def run():
+            socket = communicator(document, headers=[(b'authorization', f'Bearer {token}'.encode())])
+            connected, _ = await socket.connect()
+            await socket.disconnect()
+            return connected
+
+        assert async_to_sync(run)()
+
+    def test_edits_reach_other_editors_only(self, document, student_user, adviser_user):
+        author_token, reader_token = token_for(student_user), token_for(adviser_user)
+
+        async def run():
+            author = communicator(document, token=author_token)
+            reader = communicator(document, token=reader_token)
+            await author.connect()
+            await reader.connect()
+            # drain the join/state messages on both sockets
+            for _ in range(3):
+                await author.receive_json_from()
+            for _ in range(2):
+                await reader.receive_json_from()
+
+            await author.send_json_to({'type': 'text_change', 'operation': 'insert',
+                                       'position': 0, 'content': 'hi', 'timestamp': 1})
+            ack = await author.receive_json_from()
+            received = await reader.receive_json_from()
+            echoed = await author.receive_nothing()
+            await author.disconnect()
+            await reader.disconnect()
+            return ack, received, echoed
+
+        ack, received, echoed = async_to_sync(run)()
+
+        assert ack == {'type': 'ack', 'version': 1}
+        assert received['ops'] == ['hi']
+        assert received['version'] == 1
+        assert received['user_id'] == student_user.id
+        assert 'user' not in received and 'sender' not in received
+        assert echoed
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPresence:
+    """Cursor and selection updates are batched into id-only presence frames"""
+
+    def test_late_joiner_gets_roster(self, document, student_user, adviser_user):
+        first, second = token_for(student_user), token_for(adviser_user)
+
+        async def run():
+            author = communicator(document, token=first)
+            reader = communicator(document, token=second)
+            await author.connect()
+            await reader.connect()
+            messages = {}
+            for _ in range(2):
+                message = await reader.receive_json_from()
+                messages[message['type']] = message
+            await author.disconnect()
+            left = await reader.receive_json_from()
+            await reader.disconnect()
+            return messages['document_state'], left
+
+        state, left = async_to_sync(run)()
+
+        assert {user['id'] for user in state['users']} == {student_user.id, adviser_user.id}
+        assert left == {'type': 'user_left', 'user_id': student_user.id}
+
+    def test_updates_are_coalesced_per_tick(self, document, student_user, adviser_user):
+        author_token, reader_token = token_for(student_user), token_for(adviser_user)
+
+        async def run():
+            author = communicator(document, token=author_token)
+            reader = communicator(document, token=reader_token)
+            await author.connect()
+            await reader.connect()
+            for _ in range(3):
+                await author.receive_json_from()
+            for _ in range(2):
+                await reader.receive_json_from()
+
+            for position in range(10):
+                await author.send_json_to({'type': 'cursor_position', 'position': position})
+            await author.send_json_to({'type': 'selection_change', 'start': 2, 'end': 9})
+            frame = await reader.receive_json_from()
+            extra = await reader.receive_nothing(timeout=0.2)
+            echoed = await author.receive_nothing(timeout=0.1)
+            await author.disconnect()
+            await reader.disconnect()
+            return frame, extra, echoed
+
+        frame, extra, echoed = async_to_sync(run)()
+
+        assert frame == {'type': 'presence', 'cursors': [
+            {'id': student_user.id, 'position': 9, 'selection': {'start': 2, 'end': 9}},
+        ]}
+        assert extra
+        assert echoed
+
+    def test_editors_on_other_workers_are_announced(self, document, student_user, adviser_user, monkeypatch):
+        from api import consumers
+
+        first, second = token_for(student_user), token_for(adviser_user)
+
+        async def run():
+            author = communicator(document, token=first)
+            await author.connect()
+            for _ in range(2):
+                await author.receive_json_from()
+
+            # The reader lands on a second worker, which has its own states and roster
+            monkeypatch.setattr(consumers, 'WORKER_ID', 'second-worker')
+            monkeypatch.setattr(consumers, 'document_states', {})
+            monkeypatch.setattr(consumers, 'document_presence', {})
+            reader = communicator(document, token=second)
+            await reader.connect()
+            messages = [await reader.receive_json_from() for _ in range(3)]
+            joined = await author.receive_json_from()
+
+            await author.send_json_to({'type': 'cursor_position', 'position': 4})
+            frame = await reader.receive_json_from()
+            await author.disconnect()
+            await reader.disconnect()
+            return messages, joined, frame
+
+        messages, joined, frame = async_to_sync(run)()
+
+        state = next(message for message in messages if message['type'] == 'document_state')
+        announced = [message['user']['id'] for message in messages if message['type'] == 'user_joined']
+        assert [user['id'] for user in state['users']] == [adviser_user.id]
+        assert sorted(announced) == sorted([adviser_user.id, student_user.id])
+        assert joined['user']['id'] == adviser_user.id
+        assert frame == {'type': 'presence', 'cursors': [{'id': student_user.id, 'position': 4}]}
+
+
+def test_updates_sent_during_a_frame_go_out_next_tick():
+    from api.consumers import DocumentPresence
+
+    class ChannelLayer:
+        def __init__(self):
+            self.frames = []
+
+        async def group_send(self, group, message):
+            self.frames.append(message['cursors'])
+            if len(self.frames) == 1:
+                # The user moves again while the first frame is on its way
+                await asyncio.sleep(0)
+                presence.update(1, position=9)
+
+    layer = ChannelLayer()
+    presence = DocumentPresence(layer, 'doc_1')
+    presence.join({'id': 1})
+
+    async def run():
+        presence.update(1, position=3)
+        await asyncio.sleep(DocumentPresence.TICK * 4)
+
+    async_to_sync(run)()
+
+    assert layer.frames == [[{'id': 1, 'position': 3}], [{'id': 1, 'position': 9}]]
+
+
+def notification_socket(token=None):
+    path = '/ws/notifications/' + (f'?token={token}' if token else '')
+    return WebsocketCommunicator(application, path, headers=[(b'origin', b'http://localhost')])
+
+
+@pytest.mark.django_db(transaction=True)
+class TestNotificationStream:
+    """NotificationConsumer pushes each user's new notifications and unread count"""
+
+    def test_rejects_anonymous(self):
+        async def run():
+            return await notification_socket().connect()
+
+        assert async_to_sync(run)() == (False, 4001)
+
+    def test_pushes_own_notifications(self, student_user, adviser_user):
+        create_notification(student_user, 'Earlier')
+        token, other_token = token_for(student_user), token_for(adviser_user)
+
+        async def run():
+            socket, other = notification_socket(token), notification_socket(other_token)
+            await socket.connect()
+            await other.connect()
+            initial = await socket.receive_json_from()
+            await other.receive_json_from()
+
+            await database_sync_to_async(create_notification)(student_user, 'Topic approved', link='/thesis/1')
+            pushed = await socket.receive_json_from()
+            leaked = await other.receive_nothing(timeout=0.1)
+            await socket.disconnect()
+            await other.disconnect()
+            return initial, pushed, leaked
+
+        initial, pushed, leaked = async_to_sync(run)()
+
+        assert initial == {'type': 'unread_count', 'unread_count': 1}
+        assert pushed['type'] == 'notification'
+        assert pushed['unread_count'] == 2
+        assert pushed['notification']['title'] == 'Topic approved'
+        assert pushed['notification']['link'] == '/thesis/1'
+        assert leaked
+
+    def test_pushes_count_after_mark_all_read(self, api_client, student_user):
+        create_notification(student_user, 'Unread')
+        token = token_for(student_user)
+        api_client.force_authenticate(student_user)
+
+        async def run():
+            socket = notification_socket(token)
+            await socket.connect()
+            await socket.receive_json_from()
+            await database_sync_to_async(api_client.post)('/api/notifications/mark_all_read/')
+            pushed = await socket.receive_json_from()
+            await socket.disconnect()
+            return pushed
+
+        assert async_to_sync(run)() == {'type': 'unread_count', 'unread_count': 0}
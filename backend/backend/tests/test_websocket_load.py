@@ -0,0 +1,213 @@
+"""
+Broadcast latency, throughput and presence cost for DocumentEditConsumer with 200
+concurrent editors.
+
+Opt in with CHANNELS_LOAD_TEST=1. The multi-process run also needs REDIS_URL pointing
+at a Redis server (e.g. `docker compose up redis`) and channels-redis installed.
+"""
+import asyncio
+import multiprocessing
+import os
+import statistics
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.consumers import DocumentPresence
+from api.models import Document, Group, Thesis
+
+pytestmark = pytest.mark.skipif(not os.environ.get('CHANNELS_LOAD_TEST'),
+                                reason='set CHANNELS_LOAD_TEST=1 to run')
+
+User = get_user_model()
+
+EDITORS = 200
+EDITS = 50
+WORKERS = 4
+CURSOR_ROUNDS = 20
+
+
+def report(label, latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f'\n{label}: {len(latencies)} deliveries in {elapsed:.2f}s '
+          f'({len(latencies) / elapsed:,.0f} msg/s), '
+          f'p50 {statistics.median(latencies) * 1000:.1f}ms, p95 {p95 * 1000:.1f}ms')
+
+
+def load_document(admin_user):
+    """A document with EDITORS students and a token for each"""
+    users = User.objects.bulk_create([
+        User(email=f'editor{i}@test.com', role='STUDENT') for i in range(EDITORS)
+    ])
+    group = Group.objects.create(name='Load Group', status='APPROVED')
+    group.members.add(*users)
+    thesis = Thesis.objects.create(title='Load Draft', group=group, proposer=admin_user)
+    document = Document.objects.create(thesis=thesis, provider='google')
+    return document, [str(AccessToken.for_user(user)) for user in users]
+
+
+async def connect_editors(application, document, tokens):
+    sockets = [
+        WebsocketCommunicator(application, f'/ws/document/{document.id}/?token={token}',
+                              headers=[(b'origin', b'http://localhost')])
+        for token in tokens
+    ]
+    for socket in sockets:
+        assert (await socket.connect())[0]
+    # each editor sees its own state plus a join from itself and everyone after it
+    await asyncio.gather(*(
+        asyncio.gather(*(socket.receive_from() for _ in range(EDITORS - i + 1)))
+        for i, socket in enumerate(sockets)
+    ))
+    return sockets
+
+
+@pytest.mark.slow
+@pytest.mark.django_db(transaction=True)
+def test_in_process_broadcast(admin_user):
+    """Every edit reaches the other 199 editors through the full ASGI stack"""
+    from backend.asgi import application
+
+    document, tokens = load_document(admin_user)
+
+    async def run():
+        sockets = await connect_editors(application, document, tokens)
+
+        latencies = []
+        started = time.perf_counter()
+        for edit in range(EDITS):
+            author = sockets[edit % EDITORS]
+            readers = [socket for socket in sockets if socket is not author]
+            sent = time.perf_counter()
+            await author.send_json_to({'type': 'text_change', 'operation': 'insert',
+                                       'position': edit, 'content': 'x', 'timestamp': edit})
+            await author.receive_from(timeout=10)  # ack
+
+            async def delivered(socket):
+                await socket.receive_from(timeout=10)
+                latencies.append(time.perf_counter() - sent)
+
+            await asyncio.gather(*(delivered(socket) for socket in readers))
+        elapsed = time.perf_counter() - started
+
+        for socket in sockets:
+            await socket.disconnect()
+        return latencies, elapsed
+
+    latencies, elapsed = async_to_sync(run)()
+
+    assert len(latencies) == EDITS * (EDITORS - 1)
+    report('in-memory layer, 1 process', latencies, elapsed)
+
+
+@pytest.mark.slow
+@pytest.mark.django_db(transaction=True)
+def test_presence_fanout(admin_user):
+    """Every editor moves its cursor each tick; presence frames keep delivery linear in editors"""
+    from backend.asgi import application
+
+    document, tokens = load_document(admin_user)
+
+    async def run():
+        sockets = await connect_editors(application, document, tokens)
+        delivered = [0] * EDITORS
+        latest = [{} for _ in sockets]
+
+        async def read(index, socket):
+            while not await socket.receive_nothing(timeout=DocumentPresence.TICK * 10):
+                message = await socket.receive_json_from()
+                delivered[index] += 1
+                for cursor in message['cursors']:
+                    latest[index][cursor['id']] = cursor['position']
+
+        readers = [asyncio.ensure_future(read(i, socket)) for i, socket in enumerate(sockets)]
+        cpu, started = time.process_time(), time.perf_counter()
+        for position in range(CURSOR_ROUNDS):
+            for socket in sockets:
+                await socket.send_json_to({'type': 'cursor_position', 'position': position})
+            await asyncio.sleep(DocumentPresence.TICK)
+        await asyncio.gather(*readers)
+        # the readers' closing timeout is idle time, not delivery time
+        elapsed = time.perf_counter() - started - DocumentPresence.TICK * 10
+        cpu = time.process_time() - cpu
+
+        for socket in sockets:
+            await socket.disconnect()
+        return delivered, latest, elapsed, cpu
+
+    delivered, latest, elapsed, cpu = async_to_sync(run)()
+
+    assert all(len(positions) == EDITORS - 1 for positions in latest)
+    assert all(set(positions.values()) == {CURSOR_ROUNDS - 1} for positions in latest)
+    updates = EDITORS * CURSOR_ROUNDS
+    print(f'\npresence: {updates} cursor updates from {EDITORS} editors -> {sum(delivered)} frames '
+          f'(unbatched: {updates * (EDITORS - 1):,}) in {elapsed:.2f}s '
+          f'({sum(delivered) / elapsed:,.0f} msg/s), '
+          f'CPU {cpu / EDITORS * 1000:.2f}ms per connection')
+
+
+def fanout_worker(redis_url, group, editors, edits, ready, results):
+    """Hold `editors` channels in the document group and time every broadcast they receive"""
+    from channels_redis.core import RedisChannelLayer
+
+    async def main():
+        layer = RedisChannelLayer(hosts=[redis_url], capacity=edits * 2)
+        channels = [await layer.new_channel() for _ in range(editors)]
+        for channel in channels:
+            await layer.group_add(group, channel)
+        ready.put(os.getpid())
+
+        async def editor(channel):
+            latencies = []
+            for _ in range(edits):
+                message = await layer.receive(channel)
+                latencies.append(time.time() - message['sent_at'])
+            return latencies
+
+        per_editor = await asyncio.gather(*(editor(channel) for channel in channels))
+        results.put([latency for latencies in per_editor for latency in latencies])
+        await layer.flush()
+
+    asyncio.run(main())
+
+
+@pytest.mark.slow
+def test_multi_process_redis_fanout():
+    """Broadcasts published once reach editors spread over several worker processes"""
+    redis_url = os.environ.get('REDIS_URL')
+    if not redis_url:
+        pytest.skip('REDIS_URL is required for the multi-process run')
+    from channels_redis.core import RedisChannelLayer
+
+    group = f'doc_load_{os.getpid()}'
+    context = multiprocessing.get_context('spawn')
+    ready, results = context.Queue(), context.Queue()
+    workers = [
+        context.Process(target=fanout_worker,
+                        args=(redis_url, group, EDITORS // WORKERS, EDITS, ready, results))
+        for _ in range(WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        ready.get(timeout=60)
+
+    async def publish():
+        layer = RedisChannelLayer(hosts=[redis_url])
+        for edit in range(EDITS):
+            await layer.group_send(group, {'type': 'text_change', 'seq': edit, 'sent_at': time.time()})
+
+    started = time.perf_counter()
+    asyncio.run(publish())
+    latencies = [latency for _ in workers for latency in results.get(timeout=120)]
+    elapsed = time.perf_counter() - started
+    for worker in workers:
+        worker.join(timeout=10)
+
+    assert len(latencies) == EDITS * EDITORS
+    report(f'redis layer, {WORKERS} processes', latencies, elapsed)
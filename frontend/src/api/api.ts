@@ -1,4 +1,4 @@
-import axios, { AxiosError, InternalAxiosRequestConfig, AxiosHeaders } from 'axios'
+import axios, { AxiosError, AxiosRequestConfig, AxiosResponse, InternalAxiosRequestConfig, AxiosHeaders } from 'axios'
 
 const API_BASE = import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8000/api/'
 
@@ -48,8 +48,15 @@ api.interceptors.request.use(
 api.interceptors.response.use(
   (response) => {
     console.log('API response:', response.config.url, 'Status:', response.status)
+    // List endpoints return cursor pages ({ next, previous, results }).
+    // Hand callers the results array and keep the cursors on the response.
+    const data = response.data
+    if (data && Array.isArray(data.results) && 'next' in data && 'previous' in data) {
+      (response as any).pagination = { next: data.next, previous: data.previous }
+      response.data = data.results
+    }
     return response
-  }, // Return successful responses as-is
+  },
   async (error: AxiosError) => {
     console.error('API error:', error.config?.url, 'Status:', error.response?.status, 'Data:', error.response?.data)
     const originalRequest = error.config as InternalAxiosRequestConfig & { _retry?: boolean }
@@ -121,4 +128,26 @@ api.interceptors.response.use(
   }
 )
 
+// The URL of the next page of a cursor-paginated list response, or null on the last page.
+// List services take it back as their `next` argument.
+export const nextPage = (response: AxiosResponse): string | null => (response as any).pagination?.next ?? null
+
+// GET a list endpoint, following the `next` cursor until every page is loaded.
+// Only for lookups that stay small (e.g. the adviser and panel rosters); anything that
+// grows with usage should be shown a page at a time with nextPage().
+export async function getAll<T = any>(url: string, config?: AxiosRequestConfig): Promise<AxiosResponse<T[]>> {
+  const response = await api.get(url, config)
+  let next = nextPage(response)
+  if (!next) return response
+  const results: T[] = [...response.data]
+  while (next) {
+    const page = await api.get(next)
+    results.push(...page.data)
+    next = nextPage(page)
+  }
+  response.data = results
+  ;(response as any).pagination = { next: null, previous: null }
+  return response
+}
+
 export default api
@@ -1,6 +1,7 @@
 import api from './api'
 
-export const listDocuments = (params='') => api.get(`documents/${params}`)
+// One cursor page, newest first; pass nextPage(response) to fetch the one after it
+export const listDocuments = (params='', next?: string | null) => api.get(next || `documents/${params}`)
 
 export const uploadDocument = (formData:FormData) => api.post('documents/', formData, { headers:{ 'Content-Type':'multipart/form-data' } })
 
@@ -9,6 +10,16 @@ export const uploadToDrive = (formData:FormData) => {
   return api.post('documents/', formData, { headers: { 'Content-Type': 'multipart/form-data' } })
 }
 
+// Drive uploads come back PENDING; poll until the background upload settles
+export const waitForUpload = async (id:number, intervalMs=2000, attempts=150) => {
+  for (let i = 0; i < attempts; i++) {
+    const { data } = await api.get(`documents/${id}/`)
+    if (data.status !== 'PENDING') return data
+    await new Promise(resolve => setTimeout(resolve, intervalMs))
+  }
+  throw new Error('Upload is still pending')
+}
+
 export const linkGoogleDoc = (payload:any) => api.post('documents/link-google-doc/', payload) // payload: { thesis: id, google_doc_url, provider: 'google' }
 
 export const deleteDocument = (id:number) => api.delete(`documents/${id}/`)
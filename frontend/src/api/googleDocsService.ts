@@ -77,6 +77,10 @@ export const googleDocsApi = {
   // Share document
   shareDocument: (documentId: string, data: { email: string; role: string }) => 
     api.post(`/google-docs/${documentId}/share/`, data),
+
+  // Share document with a thesis's members, adviser and panels in one batch
+  shareDocumentWithThesis: (documentId: string, thesisId: number) =>
+    api.post(`/google-docs/${documentId}/share-thesis/`, { thesis: thesisId }),
 };
 
 // WebSocket connection helper
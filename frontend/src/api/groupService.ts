@@ -1,5 +1,6 @@
 import api from './api'
-export const listGroups = () => api.get('groups/')
+// List calls return one cursor page; pass nextPage(response) to fetch the one after it
+export const listGroups = (next?: string | null) => api.get(next || 'groups/')
 export const createGroup = (payload:any) => api.post('groups/', payload)
 export const getCurrentUserGroups = () => {
   console.log('Making API call to get_current_user_groups')
@@ -11,4 +12,4 @@ export const getGroup = (id:number) => api.get(`groups/${id}/`)
 export const updateGroup = (id:number, payload:any) => api.put(`groups/${id}/`, payload)
 export const assignAdviser = (groupId:number, adviserId:number) => api.post(`groups/${groupId}/assign_adviser/`, { adviser_id: adviserId })
 export const assignPanels = (groupId:number, panelIds:number[]) => api.post(`groups/${groupId}/assign_panel/`, { panel_ids: panelIds })
-export const searchUsers = (query:string) => api.get(`users/?search=${encodeURIComponent(query)}`)
\ No newline at end of file
+export const searchUsers = (query:string) => api.get('users/', { params: { search: query, page_size: 20 } })
\ No newline at end of file
@@ -1,3 +1,39 @@
 import api from './api'
-export const listNotifications = () => api.get('notifications/')
+// One cursor page, newest first; pass nextPage(response) to fetch the one after it
+export const listNotifications = (next?: string | null) => api.get(next || 'notifications/')
 export const markRead = (id:number) => api.post(`notifications/${id}/mark_read/`)
+export const markAllRead = () => api.post('notifications/mark_all_read/')
+// Notifications older than the retention period; pass the `next` URL's cursor to page back
+export const listArchivedNotifications = (cursor?: string) =>
+  api.get('notifications/archive/', { params: cursor ? { cursor } : undefined })
+export const getUnreadCount = () => api.get<{ unread_count: number }>('notifications/unread_count/')
+
+export type NotificationEvent =
+  | { type: 'notification'; notification: any; unread_count: number }
+  | { type: 'unread_count'; unread_count: number }
+
+// Push stream of the user's new notifications and unread count; returns an unsubscribe function.
+// Reconnects with backoff, and the server resends the count on every connect.
+export function subscribeToNotifications(onEvent: (event: NotificationEvent) => void): () => void {
+  let ws: WebSocket | null = null
+  let retry: ReturnType<typeof setTimeout> | undefined
+  let attempts = 0
+  let closed = false
+  const connect = () => {
+    const token = localStorage.getItem('access_token')
+    if (!token || closed) return
+    ws = new WebSocket(`ws://localhost:8000/ws/notifications/?token=${encodeURIComponent(token)}`)
+    ws.onopen = () => { attempts = 0 }
+    ws.onmessage = (message) => onEvent(JSON.parse(message.data))
+    ws.onclose = (event) => {
+      if (closed || event.code === 4001) return
+      retry = setTimeout(connect, Math.min(30000, 1000 * 2 ** attempts++))
+    }
+  }
+  connect()
+  return () => {
+    closed = true
+    clearTimeout(retry)
+    ws?.close()
+  }
+}
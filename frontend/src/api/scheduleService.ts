@@ -1,5 +1,6 @@
 import api from './api'
-export const listSchedules = () => api.get('schedules/')
+// One cursor page in start order; pass nextPage(response) to fetch the one after it
+export const listSchedules = (next?: string | null) => api.get(next || 'schedules/')
 export const createSchedule = (payload:any) => api.post('schedules/', payload)
 export const updateSchedule = (id:number, payload:any) => api.patch(`schedules/${id}/`, payload)
 export const deleteSchedule = (id:number) => api.delete(`schedules/${id}/`)
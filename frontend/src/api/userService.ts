@@ -1,3 +1,4 @@
 import api from './api'
-export const listUsers = (params='') => api.get(`users/${params}`)
+// One cursor page; pass nextPage(response) to fetch the one after it
+export const listUsers = (params='', next?: string | null) => api.get(next || `users/${params}`)
 export const getUser = (id:number) => api.get(`users/${id}/`)
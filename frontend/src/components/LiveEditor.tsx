@@ -35,6 +35,7 @@ import {
 import PresencePanel from './PresencePanel';
 import { ConflictResolutionProvider, useConflictResolution, DocumentOperation } from '../context/ConflictResolutionContext';
 import ConflictResolutionUI from './ConflictResolutionUI';
+import { OTClient } from '../utils/ot';
 
 interface User {
   id: number;
@@ -97,6 +98,10 @@ const LiveEditorContent: React.FC<LiveEditorProps> = ({
   const websocketRef = useRef<WebSocket | null>(null);
   const iframeRef = useRef<HTMLIFrameElement>(null);
   const reconnectTimeoutRef = useRef<NodeJS.Timeout | null>(null);
+  // Presence frames carry user ids only; details arrive with document_state and user_joined
+  const usersRef = useRef<Map<number, User>>(new Map());
+  // Mirror of the server's text and version; local edits go out through it with their base version
+  const otClientRef = useRef<OTClient | null>(null);
 
   const getUserColor = useCallback((userId: number) => {
     return USER_COLORS[userId % USER_COLORS.length];
@@ -105,9 +110,13 @@ const LiveEditorContent: React.FC<LiveEditorProps> = ({
   const connectWebSocket = useCallback(() => {
     if (!documentId) return;
 
-    const wsUrl = `ws://localhost:8000/ws/document/${documentId}/`;
+    const token = localStorage.getItem('access_token');
+    const wsUrl = `ws://localhost:8000/ws/document/${documentId}/?token=${encodeURIComponent(token ?? '')}`;
     const ws = new WebSocket(wsUrl);
     websocketRef.current = ws;
+    otClientRef.current = new OTClient(message => {
+      if (ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify(message));
+    });
 
     ws.onopen = () => {
       console.log('WebSocket connected');
@@ -122,45 +131,55 @@ const LiveEditorContent: React.FC<LiveEditorProps> = ({
         switch (data.type) {
           case 'document_state':
             setDocumentState(data.document);
+            usersRef.current = new Map(data.users.map((u: User) => [u.id, u]));
+            setActiveUsers(data.users);
+            otClientRef.current?.reset(data);
+            break;
+
+          case 'ack':
+            otClientRef.current?.serverAck(data.version);
+            break;
+
+          case 'resync':
+            // The server couldn't apply our edit against the version we sent; start over from its state
+            console.warn('Document resync:', data.error);
+            otClientRef.current?.reset(data);
             break;
             
           case 'user_joined':
+            usersRef.current.set(data.user.id, data.user);
             setActiveUsers(prev => [...prev.filter(u => u.id !== data.user.id), data.user]);
             break;
             
           case 'user_left':
-            setActiveUsers(prev => prev.filter(u => u.id !== data.user.id));
-            setPresenceIndicators(prev => prev.filter(p => p.user.id !== data.user.id));
+            usersRef.current.delete(data.user_id);
+            setActiveUsers(prev => prev.filter(u => u.id !== data.user_id));
+            setPresenceIndicators(prev => prev.filter(p => p.user.id !== data.user_id));
             break;
             
           case 'text_change':
             // Handle real-time text changes
+            otClientRef.current?.serverOperation(data.ops, data.version);
             handleTextChange(data);
             break;
             
-          case 'cursor_position':
-            setPresenceIndicators(prev => {
-              const filtered = prev.filter(p => p.user.id !== data.user.id);
-              return [...filtered, {
-                user: data.user,
-                position: data.position,
-                color: getUserColor(data.user.id),
-                status: 'editing',
-                lastSeen: new Date()
-              }];
-            });
-            break;
-            
-          case 'selection_change':
+          case 'presence':
             setPresenceIndicators(prev => {
-              const filtered = prev.filter(p => p.user.id !== data.user.id);
-              return [...filtered, {
-                user: data.user,
-                selection: { start: data.start, end: data.end },
-                color: getUserColor(data.user.id),
-                status: 'editing',
-                lastSeen: new Date()
-              }];
+              const indicators = new Map(prev.map(p => [p.user.id, p]));
+              for (const cursor of data.cursors) {
+                const user = usersRef.current.get(cursor.id);
+                if (!user) continue;
+                const previous = indicators.get(cursor.id);
+                indicators.set(cursor.id, {
+                  user,
+                  position: cursor.position ?? previous?.position,
+                  selection: cursor.selection ?? previous?.selection,
+                  color: getUserColor(cursor.id),
+                  status: 'editing',
+                  lastSeen: new Date()
+                });
+              }
+              return Array.from(indicators.values());
             });
             break;
             
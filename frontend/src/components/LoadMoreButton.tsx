@@ -0,0 +1,20 @@
+import React from 'react'
+import { Box, Button, CircularProgress } from '@mui/material'
+
+// Fetches the next page of a cursor-paginated list; renders nothing once the last page is loaded
+export default function LoadMoreButton({ hasMore, loading, onClick, label = 'Load more' }: {
+  hasMore: boolean
+  loading?: boolean
+  onClick: () => void
+  label?: string
+}) {
+  if (!hasMore) return null
+  return (
+    <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+      <Button variant="outlined" size="small" onClick={onClick} disabled={loading}
+        startIcon={loading ? <CircularProgress size={14} /> : undefined}>
+        {label}
+      </Button>
+    </Box>
+  )
+}
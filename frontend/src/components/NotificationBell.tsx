@@ -4,20 +4,29 @@ import Badge from '@mui/material/Badge'
 import NotificationsIcon from '@mui/icons-material/Notifications'
 import Menu from '@mui/material/Menu'
 import MenuItem from '@mui/material/MenuItem'
-import { listNotifications, markRead } from '../api/notificationService'
+import { nextPage } from '../api/api'
+import { listNotifications, subscribeToNotifications } from '../api/notificationService'
 
 export default function NotificationBell(){
   const [anchor, setAnchor] = useState<null|HTMLElement>(null)
   const [items,setItems] = useState<any[]>([])
-  useEffect(()=>{ load() },[])
-  async function load(){ try{ const r = await listNotifications(); setItems(r.data) }catch{} }
-  const unread = items.filter(i=>!i.is_read).length
+  const [unread,setUnread] = useState(0)
+  const [next,setNext] = useState<string|null>(null)
+  // The badge is pushed by the server; the list is only fetched when the menu opens
+  useEffect(()=>subscribeToNotifications(event=>{
+    setUnread(event.unread_count)
+    if (event.type === 'notification') setItems(current=>[event.notification, ...current])
+  }),[])
+  // One page when the menu opens; older ones are fetched from the last menu item
+  async function load(){ try{ const r = await listNotifications(); setItems(r.data); setNext(nextPage(r)) }catch{} }
+  async function loadMore(){ try{ const r = await listNotifications(next); setItems(current=>[...current, ...r.data]); setNext(nextPage(r)) }catch{} }
   return (
     <>
-      <IconButton color="inherit" onClick={(e)=>setAnchor(e.currentTarget)}><Badge badgeContent={unread} color="error"><NotificationsIcon/></Badge></IconButton>
+      <IconButton color="inherit" onClick={(e)=>{ setAnchor(e.currentTarget); load() }}><Badge badgeContent={unread} color="error"><NotificationsIcon/></Badge></IconButton>
       <Menu anchorEl={anchor} open={Boolean(anchor)} onClose={()=>setAnchor(null)}>
         {items.length===0 && <MenuItem>No notifications</MenuItem>}
         {items.map(n=> <MenuItem key={n.id}><div><strong>{n.title}</strong><div style={{fontSize:12}}>{new Date(n.created_at).toLocaleString()}</div></div></MenuItem>)}
+        {next && <MenuItem onClick={loadMore}><em>Show older</em></MenuItem>}
       </Menu>
     </>
   )
@@ -1,9 +1,17 @@
 import React, { createContext, useEffect, useState } from 'react'
-import { listNotifications } from '../api/notificationService'
-export const NotificationContext = createContext({ items:[], refresh: ()=>{} })
+import { listNotifications, subscribeToNotifications } from '../api/notificationService'
+import { usePagedList } from '../hooks/usePagedList'
+export const NotificationContext = createContext({ items:[] as any[], unreadCount: 0, hasMore: false, loadingMore: false, refresh: ()=>{}, loadMore: ()=>{} })
 export const NotificationProvider = ({ children }:{children:React.ReactNode})=>{
-  const [items,setItems]=useState<any[]>([])
-  const refresh = async ()=>{ try{ const r = await listNotifications(); setItems(r.data) }catch{} }
+  // The newest page is loaded up front; older notifications are fetched a page at a time on request
+  const { items, hasMore, loadingMore, reload, loadMore } = usePagedList(listNotifications)
+  const [unreadCount,setUnreadCount]=useState(0)
+  const refresh = async ()=>{ try{ await reload() }catch{} }
   useEffect(()=>{ refresh() },[])
-  return <NotificationContext.Provider value={{ items, refresh }}>{children}</NotificationContext.Provider>
+  // Refetch when the server pushes a new notification instead of polling
+  useEffect(()=>subscribeToNotifications(event=>{
+    setUnreadCount(event.unread_count)
+    if (event.type === 'notification') refresh()
+  }),[])
+  return <NotificationContext.Provider value={{ items, unreadCount, hasMore, loadingMore, refresh, loadMore }}>{children}</NotificationContext.Provider>
 }
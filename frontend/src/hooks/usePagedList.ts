@@ -0,0 +1,46 @@
+import { useCallback, useRef, useState } from 'react'
+import type { AxiosResponse } from 'axios'
+import { nextPage } from '../api/api'
+
+/**
+ * Hook for showing a cursor-paginated list a page at a time
+ * `fetchPage` is a list service call such as listDocuments; it is called with no
+ * argument for the first page and with the previous page's `next` URL after that.
+ */
+export const usePagedList = <T = any>(fetchPage: (next?: string | null) => Promise<AxiosResponse<T[]>>) => {
+  const [items, setItems] = useState<T[]>([])
+  const [next, setNext] = useState<string | null>(null)
+  const [loading, setLoading] = useState(false)
+  const [loadingMore, setLoadingMore] = useState(false)
+  // Drops a load-more page that lands after reload() has started over
+  const generation = useRef(0)
+
+  const reload = useCallback(async () => {
+    const current = ++generation.current
+    setLoading(true)
+    try {
+      const response = await fetchPage()
+      if (current !== generation.current) return
+      setItems(response.data || [])
+      setNext(nextPage(response))
+    } finally {
+      if (current === generation.current) setLoading(false)
+    }
+  }, [fetchPage])
+
+  const loadMore = useCallback(async () => {
+    if (!next || loadingMore) return
+    const current = generation.current
+    setLoadingMore(true)
+    try {
+      const response = await fetchPage(next)
+      if (current !== generation.current) return
+      setItems(previous => [...previous, ...(response.data || [])])
+      setNext(nextPage(response))
+    } finally {
+      setLoadingMore(false)
+    }
+  }, [fetchPage, next, loadingMore])
+
+  return { items, setItems, hasMore: next !== null, loading, loadingMore, reload, loadMore }
+}
@@ -7,6 +7,7 @@ import { listGroups, getCurrentUserGroups } from '../api/groupService'
 import { listDocuments } from '../api/documentService'
 import { listNotifications } from '../api/notificationService'
 import { listSchedules } from '../api/scheduleService'
+import { nextPage } from '../api/api'
 
 // Dashboard component - Fixed icon issues
 export default function Dashboard(){
@@ -21,6 +22,10 @@ export default function Dashboard(){
   const [documents, setDocuments] = useState([])
   const [notifications, setNotifications] = useState([])
   const [schedules, setSchedules] = useState([])
+  // Lists with further pages; the dashboard only reads the first page of each
+  const [partial, setPartial] = useState<Record<string, boolean>>({})
+
+  const countOf = (items: any[], list: string) => `${items.length}${partial[list] ? '+' : ''}`
 
   useEffect(() => {
     const fetchData = async () => {
@@ -41,6 +46,12 @@ export default function Dashboard(){
           setDocuments(docRes.data || [])
           setNotifications(notifRes.data || [])
           setSchedules(schedRes.data || [])
+          setPartial({
+            theses: nextPage(thesisRes) !== null,
+            groups: nextPage(groupRes) !== null,
+            documents: nextPage(docRes) !== null,
+            schedules: nextPage(schedRes) !== null,
+          })
         } else {
           // For non-admin users, fetch their specific data
           const thesisRes = await listThesis()
@@ -61,6 +72,7 @@ export default function Dashboard(){
           })
           
           setTheses(userTheses)
+          setPartial(current => ({ ...current, theses: nextPage(thesisRes) !== null }))
           setNotifications(notifRes.data || [])
           
           // Fetch groups if user is adviser or student
@@ -90,6 +102,7 @@ export default function Dashboard(){
               userTheses.some(t => t.id === d.thesis)
             )
             setDocuments(userDocs)
+            setPartial(current => ({ ...current, documents: nextPage(docRes) !== null }))
           }
         }
       } catch (error) {
@@ -114,31 +127,31 @@ export default function Dashboard(){
     switch (userRole) {
       case 'STUDENT':
         return [
-          { label: 'My Thesis', value: theses.length.toString(), icon: FileText, color: '#10B981', bgColor: '#D1FAE5' },
-          { label: 'Documents', value: documents.length.toString(), icon: Upload, color: '#3B82F6', bgColor: '#DBEAFE' },
-          { label: 'Pending Reviews', value: theses.filter(t => t.status === 'PENDING_REVIEW').length.toString(), icon: Clock, color: '#F59E0B', bgColor: '#FEF3C7' },
+          { label: 'My Thesis', value: countOf(theses, 'theses'), icon: FileText, color: '#10B981', bgColor: '#D1FAE5' },
+          { label: 'Documents', value: countOf(documents, 'documents'), icon: Upload, color: '#3B82F6', bgColor: '#DBEAFE' },
+          { label: 'Pending Reviews', value: countOf(theses.filter(t => t.status === 'PENDING_REVIEW'), 'theses'), icon: Clock, color: '#F59E0B', bgColor: '#FEF3C7' },
           { label: 'Group Members', value: groups.length > 0 ? groups[0]?.members?.length?.toString() || '0' : '0', icon: Users, color: '#8B5CF6', bgColor: '#EDE9FE' },
         ];
       case 'ADVISER':
         return [
-          { label: 'Advised Theses', value: theses.length.toString(), icon: FileText, color: '#10B981', bgColor: '#D1FAE5' },
-          { label: 'Pending Reviews', value: theses.filter(t => t.status === 'CONCEPT_SUBMITTED').length.toString(), icon: Clock, color: '#F59E0B', bgColor: '#FEF3C7' },
-          { label: 'Approved', value: theses.filter(t => t.status === 'FINAL_APPROVED').length.toString(), icon: CheckCircle, color: '#3B82F6', bgColor: '#DBEAFE' },
+          { label: 'Advised Theses', value: countOf(theses, 'theses'), icon: FileText, color: '#10B981', bgColor: '#D1FAE5' },
+          { label: 'Pending Reviews', value: countOf(theses.filter(t => t.status === 'CONCEPT_SUBMITTED'), 'theses'), icon: Clock, color: '#F59E0B', bgColor: '#FEF3C7' },
+          { label: 'Approved', value: countOf(theses.filter(t => t.status === 'FINAL_APPROVED'), 'theses'), icon: CheckCircle, color: '#3B82F6', bgColor: '#DBEAFE' },
           { label: 'Students', value: groups.reduce((acc, g) => acc + (g.members?.length || 0), 0).toString(), icon: Users, color: '#8B5CF6', bgColor: '#EDE9FE' },
         ];
       case 'PANEL':
         return [
-          { label: 'Assigned Theses', value: theses.length.toString(), icon: FileText, color: '#10B981', bgColor: '#D1FAE5' },
-          { label: 'To Review', value: theses.filter(t => t.status === 'PROPOSAL_APPROVED').length.toString(), icon: Clock, color: '#F59E0B', bgColor: '#FEF3C7' },
-          { label: 'Upcoming Defenses', value: schedules.filter(s => new Date(s.start_at) > new Date()).length.toString(), icon: Calendar, color: '#3B82F6', bgColor: '#DBEAFE' },
-          { label: 'Reviewed', value: theses.filter(t => ['FINAL_APPROVED', 'REJECTED'].includes(t.status)).length.toString(), icon: CheckCircle, color: '#8B5CF6', bgColor: '#EDE9FE' },
+          { label: 'Assigned Theses', value: countOf(theses, 'theses'), icon: FileText, color: '#10B981', bgColor: '#D1FAE5' },
+          { label: 'To Review', value: countOf(theses.filter(t => t.status === 'PROPOSAL_APPROVED'), 'theses'), icon: Clock, color: '#F59E0B', bgColor: '#FEF3C7' },
+          { label: 'Upcoming Defenses', value: countOf(schedules.filter(s => new Date(s.start_at) > new Date()), 'schedules'), icon: Calendar, color: '#3B82F6', bgColor: '#DBEAFE' },
+          { label: 'Reviewed', value: countOf(theses.filter(t => ['FINAL_APPROVED', 'REJECTED'].includes(t.status)), 'theses'), icon: CheckCircle, color: '#8B5CF6', bgColor: '#EDE9FE' },
         ];
       default:
         return [
-          { label: 'Total Theses', value: theses.length.toString(), icon: FileText, color: '#10B981', bgColor: '#D1FAE5' },
-          { label: 'Active Groups', value: groups.length.toString(), icon: Users, color: '#3B82F6', bgColor: '#DBEAFE' },
-          { label: 'Total Documents', value: documents.length.toString(), icon: Upload, color: '#F59E0B', bgColor: '#FEF3C7' },
-          { label: 'This Month', value: theses.filter(t => new Date(t.created_at) > new Date(Date.now() - 30*24*60*60*1000)).length.toString(), icon: TrendingUp, color: '#8B5CF6', bgColor: '#EDE9FE' },
+          { label: 'Total Theses', value: countOf(theses, 'theses'), icon: FileText, color: '#10B981', bgColor: '#D1FAE5' },
+          { label: 'Active Groups', value: countOf(groups, 'groups'), icon: Users, color: '#3B82F6', bgColor: '#DBEAFE' },
+          { label: 'Total Documents', value: countOf(documents, 'documents'), icon: Upload, color: '#F59E0B', bgColor: '#FEF3C7' },
+          { label: 'This Month', value: countOf(theses.filter(t => new Date(t.created_at) > new Date(Date.now() - 30*24*60*60*1000)), 'theses'), icon: TrendingUp, color: '#8B5CF6', bgColor: '#EDE9FE' },
         ];
     }
   };
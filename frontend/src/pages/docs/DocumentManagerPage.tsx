@@ -3,7 +3,9 @@ import { Container, Typography, Box, TextField, Button, List, ListItem, ListItem
 import { useNavigate } from 'react-router-dom'
 import { Upload, Grid3x3, ViewList, Filter, Download, Visibility, Share, Description, Tablet, Slideshow, PictureAsPdf } from '@mui/icons-material'
 import FileUpload from '../../components/FileUpload'
-import { listDocuments, uploadDocument, uploadToDrive, linkGoogleDoc, deleteDocument, deleteFromDrive } from '../../api/documentService'
+import LoadMoreButton from '../../components/LoadMoreButton'
+import { nextPage } from '../../api/api'
+import { listDocuments, uploadDocument, uploadToDrive, waitForUpload, linkGoogleDoc, deleteDocument, deleteFromDrive } from '../../api/documentService'
 import { listThesis } from '../../api/thesisService'
 import DeleteIcon from '@mui/icons-material/Delete'
 import CloudUploadIcon from '@mui/icons-material/CloudUpload'
@@ -20,6 +22,8 @@ interface Document {
   provider: string
   file_size: number | null
   mime_type: string | null
+  status: 'PENDING' | 'READY' | 'FAILED'
+  upload_error: string
   created_at: string
   embed_url: string | null
   file_url: string | null
@@ -35,6 +39,8 @@ export default function DocumentManagerPage() {
   const [uploadDialog, setUploadDialog] = useState(false)
   const [linkDialog, setLinkDialog] = useState(false)
   const [theses, setTheses] = useState<any[]>([])
+  const [docsNext, setDocsNext] = useState<string | null>(null)
+  const [thesesNext, setThesesNext] = useState<string | null>(null)
   const [viewMode, setViewMode] = useState<'grid' | 'list'>('grid')
   const [fileTypeFilter, setFileTypeFilter] = useState('all')
   const [permissionFilter, setPermissionFilter] = useState('all')
@@ -48,8 +54,10 @@ export default function DocumentManagerPage() {
         listDocuments(),
         listThesis()
       ])
-      setItems(docsRes.data.results || docsRes.data)
-      setTheses(thesesRes.data.results || thesesRes.data)
+      setItems(docsRes.data)
+      setDocsNext(nextPage(docsRes))
+      setTheses(thesesRes.data)
+      setThesesNext(nextPage(thesesRes))
     } catch (error) {
       console.error('Error loading data:', error)
     } finally {
@@ -57,6 +65,27 @@ export default function DocumentManagerPage() {
     }
   }
 
+  // Older documents and the rest of the thesis picker are fetched a page at a time
+  async function loadMoreDocuments() {
+    try {
+      const res = await listDocuments('', docsNext)
+      setItems(current => [...current, ...res.data])
+      setDocsNext(nextPage(res))
+    } catch (error) {
+      console.error('Error loading documents:', error)
+    }
+  }
+
+  async function loadMoreTheses() {
+    try {
+      const res = await listThesis(thesesNext)
+      setTheses(current => [...current, ...res.data])
+      setThesesNext(nextPage(res))
+    } catch (error) {
+      console.error('Error loading theses:', error)
+    }
+  }
+
   useEffect(() => { load() }, [])
 
   const getFileIcon = (mimeType: string | null) => {
@@ -111,7 +140,13 @@ export default function DocumentManagerPage() {
         const fd = new FormData()
         fd.append('file', f)
         fd.append('thesis', thesisId)
-        await uploadToDrive(fd)
+        const { data } = await uploadToDrive(fd)
+        setUploadDialog(false)
+        load()
+        const settled = await waitForUpload(data.id)
+        if (settled.status === 'FAILED') {
+          alert(`Drive upload failed: ${settled.upload_error}`)
+        }
       } else {
         const fd = new FormData()
         fd.append('file', f)
@@ -609,6 +644,8 @@ export default function DocumentManagerPage() {
         </Paper>
       )}
 
+      {!loading && <LoadMoreButton hasMore={docsNext !== null} onClick={loadMoreDocuments} label="Load older documents" />}
+
       {/* Delete Confirmation Dialog */}
       <Dialog open={deleteDialog.open} onClose={() => setDeleteDialog({ open: false, doc: null })}>
         <DialogTitle>Confirm Delete</DialogTitle>
@@ -651,6 +688,7 @@ export default function DocumentManagerPage() {
                 ))}
               </Select>
             </FormControl>
+            <LoadMoreButton hasMore={thesesNext !== null} onClick={loadMoreTheses} label="Load more theses" />
 
             <FormControl>
               <InputLabel>Upload Type</InputLabel>
@@ -693,6 +731,7 @@ export default function DocumentManagerPage() {
                 ))}
               </Select>
             </FormControl>
+            <LoadMoreButton hasMore={thesesNext !== null} onClick={loadMoreTheses} label="Load more theses" />
 
             <TextField
               label="Google Doc URL"
@@ -48,7 +48,8 @@ import {
 } from '@mui/icons-material';
 import {listGroups, createGroup, getCurrentUserGroups, assignAdviser} from '../../api/groupService'
 import {useNavigate} from 'react-router-dom'
-import api from '../../api/api'
+import api, { getAll, nextPage } from '../../api/api'
+import LoadMoreButton from '../../components/LoadMoreButton'
 
 interface GroupData {
     name: string
@@ -85,6 +86,7 @@ interface User {
 export default function GroupListPage() {
     const [myGroups, setMyGroups] = useState<Group[]>([])
     const [otherGroups, setOtherGroups] = useState<Group[]>([])
+    const [groupsNext, setGroupsNext] = useState<string | null>(null)
     const [allGroups, setAllGroups] = useState<Group[]>([])
     const [pendingProposals, setPendingProposals] = useState<Group[]>([])
     const [pendingProposalsForStudents, setPendingProposalsForStudents] = useState<Group[]>([])
@@ -109,6 +111,7 @@ export default function GroupListPage() {
     })
     const [advisers, setAdvisers] = useState<User[]>([])
     const [students, setStudents] = useState<User[]>([])
+    const [studentsNext, setStudentsNext] = useState<string | null>(null)
     const [panels, setPanels] = useState<User[]>([])
     const [currentUser, setCurrentUser] = useState<User | null>(null)
     const [searchQuery, setSearchQuery] = useState('')
@@ -166,28 +169,12 @@ export default function GroupListPage() {
                 url += '?' + params.toString();
             }
 
+            // First page only; the rest is fetched with the "Load more" button
             const otherGroupsResponse = await api.get(url);
             const otherGroupsData = otherGroupsResponse.data || []
             setAllGroups(otherGroupsData)
-
-            // Filter out user's own groups from other groups
-            if (currentUser) {
-                const filteredOtherGroups = otherGroupsData.filter((group: Group) => {
-                    // Check if current user is a member or adviser
-                    const isMember = Array.isArray(group.members)
-                        ? group.members.some((member: any) =>
-                            typeof member === 'number' ? member === currentUser.id : member.id === currentUser.id
-                        )
-                        : ((group.members || []) as number[]).includes(currentUser.id)
-                    const isAdviser = typeof group.adviser === 'number'
-                        ? group.adviser === currentUser.id
-                        : (group.adviser as any)?.id === currentUser.id
-                    return !isMember && !isAdviser
-                })
-                setOtherGroups(filteredOtherGroups)
-            } else {
-                setOtherGroups(otherGroupsData)
-            }
+            setOtherGroups(excludeOwnGroups(otherGroupsData))
+            setGroupsNext(nextPage(otherGroupsResponse))
         } catch (error) {
             console.error('Failed to load groups:', error);
             setMyGroups([])
@@ -201,6 +188,44 @@ export default function GroupListPage() {
         }
     }
 
+    // Filter out groups the current user is a member or adviser of
+    function excludeOwnGroups(groups: Group[]) {
+        if (!currentUser) return groups
+        return groups.filter((group: Group) => {
+            const isMember = Array.isArray(group.members)
+                ? group.members.some((member: any) =>
+                    typeof member === 'number' ? member === currentUser.id : member.id === currentUser.id
+                )
+                : ((group.members || []) as number[]).includes(currentUser.id)
+            const isAdviser = typeof group.adviser === 'number'
+                ? group.adviser === currentUser.id
+                : (group.adviser as any)?.id === currentUser.id
+            return !isMember && !isAdviser
+        })
+    }
+
+    async function loadMoreGroups() {
+        try {
+            const response = await api.get(groupsNext!);
+            const groups = response.data || []
+            setAllGroups(current => [...current, ...groups])
+            setOtherGroups(current => [...current, ...excludeOwnGroups(groups)])
+            setGroupsNext(nextPage(response))
+        } catch (error) {
+            console.error('Failed to load more groups:', error);
+        }
+    }
+
+    async function loadMoreStudents() {
+        try {
+            const response = await api.get(studentsNext!);
+            setStudents(current => [...current, ...response.data])
+            setStudentsNext(nextPage(response))
+        } catch (error) {
+            console.error('Failed to load more students:', error);
+        }
+    }
+
     async function loadUsers() {
         try {
             console.log('Loading users...');
@@ -225,10 +250,11 @@ export default function GroupListPage() {
                 return;
             }
 
-            // Load actual users from API
+            // Load actual users from API. Advisers and panels are small staff rosters and are
+            // loaded whole; students grow every term, so only their first page is fetched.
             try {
                 console.log('Loading advisers...');
-                const advisersRes = await api.get('users/?role=ADVISER');
+                const advisersRes = await getAll('users/?role=ADVISER');
                 console.log('Advisers response:', advisersRes.data);
                 setAdvisers(advisersRes.data);
 
@@ -236,8 +262,9 @@ export default function GroupListPage() {
                 const studentsRes = await api.get('users/?role=STUDENT');
                 console.log('Students response:', studentsRes.data);
                 setStudents(studentsRes.data);
+                setStudentsNext(nextPage(studentsRes));
 
-                const panelsData = await api.get('users/?role=PANEL');
+                const panelsData = await getAll('users/?role=PANEL');
                 setPanels(panelsData.data)
 
 
@@ -638,7 +665,7 @@ export default function GroupListPage() {
                                 </Typography>
                             </Box>
                         </Paper>
-                    ) : otherGroups.length === 0 ? (
+                    ) : otherGroups.length === 0 && groupsNext === null ? (
                         <Paper sx={{p: 6, textAlign: 'center', border: '2px dashed #CBD5E1'}}>
                             <Box sx={{display: 'flex', flexDirection: 'column', alignItems: 'center', gap: 3}}>
                                 <Groups style={{fontSize: 64, color: '#CBD5E1'}}/>
@@ -830,6 +857,7 @@ export default function GroupListPage() {
                                     </TableBody>
                                 </Table>
                             </TableContainer>
+                            <LoadMoreButton hasMore={groupsNext !== null} onClick={loadMoreGroups} label="Load more groups"/>
                         </>
                     )}
                 </>
@@ -1471,6 +1499,7 @@ export default function GroupListPage() {
                             ))}
                         </Select>
                     </FormControl>
+                    <LoadMoreButton hasMore={studentsNext !== null} onClick={loadMoreStudents} label="Load more students"/>
 
                     <FormControl fullWidth sx={{mb: 3}}>
                         <InputLabel>Panels</InputLabel>
@@ -1,9 +1,10 @@
 import React, { useEffect, useState, useContext } from 'react'
 import { Box, Typography, Paper, Button, Chip, Avatar, IconButton, Tooltip, Tabs, Tab, Badge, Card, CardContent } from '@mui/material'
 import { Notifications, CheckCircle, Description, Upload, EventNote, Delete, MarkEmailRead } from '@mui/icons-material'
-import { listNotifications, markRead } from '../../api/notificationService'
+import { markAllRead, markRead } from '../../api/notificationService'
 import { NotificationContext } from '../../context/NotificationContext'
 import { useAuth } from '../../hooks/useAuth'
+import LoadMoreButton from '../../components/LoadMoreButton'
 
 interface TabPanelProps {
   children?: React.ReactNode
@@ -29,7 +30,7 @@ function TabPanel(props: TabPanelProps) {
 
 export default function NotificationCenterPage() {
   const { user } = useAuth()
-  const { items: notifications, refresh } = useContext(NotificationContext)
+  const { items: notifications, unreadCount, hasMore, loadingMore, loadMore } = useContext(NotificationContext)
   const [tabValue, setTabValue] = useState(0)
   const [localNotifications, setLocalNotifications] = useState<any[]>([])
 
@@ -37,8 +38,6 @@ export default function NotificationCenterPage() {
     setLocalNotifications(notifications)
   }, [notifications])
 
-  const unreadCount = localNotifications.filter(n => !n.read_at).length
-
   const getCategoryColor = (category: string) => {
     switch (category) {
       case 'Thesis':
@@ -68,22 +67,22 @@ export default function NotificationCenterPage() {
   const handleMarkAsRead = async (id: number) => {
     try {
       await markRead(id)
-      refresh()
+      // Update in place rather than refetching, which would drop the older pages already loaded
+      const readAt = new Date().toISOString()
+      setLocalNotifications(current => current.map(n => n.id === id ? { ...n, read_at: n.read_at || readAt } : n))
     } catch (error) {
       console.error('Failed to mark notification as read:', error)
     }
   }
 
   const handleMarkAllAsRead = async () => {
-    const unreadNotifications = localNotifications.filter(n => !n.read_at)
-    for (const notification of unreadNotifications) {
-      try {
-        await markRead(notification.id)
-      } catch (error) {
-        console.error('Failed to mark notification as read:', error)
-      }
+    try {
+      await markAllRead()
+      const readAt = new Date().toISOString()
+      setLocalNotifications(current => current.map(n => ({ ...n, read_at: n.read_at || readAt })))
+    } catch (error) {
+      console.error('Failed to mark notifications as read:', error)
     }
-    refresh()
   }
 
   const getFilteredNotifications = () => {
@@ -359,6 +358,7 @@ export default function NotificationCenterPage() {
               ))}
             </Box>
           )}
+          <LoadMoreButton hasMore={hasMore} loading={loadingMore} onClick={loadMore} label="Load older notifications" />
         </Box>
       </Card>
     </Box>
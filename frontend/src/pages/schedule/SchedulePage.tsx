@@ -28,11 +28,14 @@ import {DateTimePicker} from '@mui/x-date-pickers/DateTimePicker'
 import {AdapterDateFns} from '@mui/x-date-pickers/AdapterDateFns'
 import {Schedule, Delete, Add, EventNote, LocationOn, People, AccessTime} from '@mui/icons-material'
 import {listSchedules, createSchedule, deleteSchedule} from '../../api/scheduleService'
+import {nextPage} from '../../api/api'
 import {useAuth} from '../../hooks/useAuth'
+import LoadMoreButton from '../../components/LoadMoreButton'
 
 export default function SchedulePage() {
     const {user, isAdmin, isAdviser, isStudent, isPanel} = useAuth()
     const [schedules, setSchedules] = useState<any[]>([])
+    const [next, setNext] = useState<string | null>(null)
     const [start, setStart] = useState<Date | null>(new Date())
     const [end, setEnd] = useState<Date | null>(new Date(Date.now() + 3600 * 1000))
     const [group, setGroup] = useState('')
@@ -42,9 +45,10 @@ export default function SchedulePage() {
     const [dialogOpen, setDialogOpen] = useState(false)
     const [selectedWeek, setSelectedWeek] = useState('Dec 18-22, 2024')
 
-    async function load() {
+    // Loads the first page, or appends the page after `more`
+    async function load(more?: string | null) {
         try {
-            const r = await listSchedules();
+            const r = await listSchedules(more);
             let allSchedules = r.data
 
             // Filter schedules based on user role
@@ -55,7 +59,8 @@ export default function SchedulePage() {
                 )
             }
 
-            setSchedules(allSchedules)
+            setSchedules(current => more ? [...current, ...allSchedules] : allSchedules)
+            setNext(nextPage(r))
         } catch {
         }
     }
@@ -272,6 +277,7 @@ export default function SchedulePage() {
                             ))}
                         </Box>
                     )}
+                    <LoadMoreButton hasMore={next !== null} onClick={() => load(next)} label="Load more schedules"/>
                 </Box>
             </Paper>
 
@@ -46,9 +46,10 @@ import {
   FilterList,
   Timeline
 } from '@mui/icons-material'
-import { listThesis, getAllTheses, createThesis } from '../../api/thesisService'
+import { listThesis, createThesis } from '../../api/thesisService'
 import { getCurrentUserGroups } from '../../api/groupService'
-import api from '../../api/api'
+import api, { nextPage } from '../../api/api'
+import LoadMoreButton from '../../components/LoadMoreButton'
 
 interface Thesis {
   id: number
@@ -88,6 +89,7 @@ interface User {
 export default function ThesisCrudPage() {
   const [theses, setTheses] = useState<Thesis[]>([])
   const [allTheses, setAllTheses] = useState<Thesis[]>([])
+  const [next, setNext] = useState<string | null>(null)
   const [open, setOpen] = useState(false)
   const [title, setTitle] = useState('')
   const [abstract, setAbstract] = useState('')
@@ -107,13 +109,13 @@ export default function ThesisCrudPage() {
   const load = async () => {
     try {
       setLoading(true)
-      const [thesisRes, allThesisRes, groupsRes] = await Promise.all([
+      // Both tabs show the same list, a page at a time
+      const [thesisRes, groupsRes] = await Promise.all([
         listThesis(),
-        getAllTheses(),
         getCurrentUserGroups()
       ])
       const thesesData = thesisRes.data || []
-      const allThesesData = allThesisRes.data || []
+      const allThesesData = thesesData
       console.log('Loaded my theses:', thesesData)
       console.log('Loaded all theses:', allThesesData)
       thesesData.forEach(thesis => {
@@ -124,6 +126,7 @@ export default function ThesisCrudPage() {
       })
       setTheses(thesesData)
       setAllTheses(allThesesData)
+      setNext(nextPage(thesisRes))
       setUserGroups(groupsRes.data || [])
     } catch (error) {
       console.error('Error loading data:', error)
@@ -132,6 +135,17 @@ export default function ThesisCrudPage() {
     }
   }
 
+  const loadMore = async () => {
+    try {
+      const thesisRes = await listThesis(next)
+      setTheses(current => [...current, ...thesisRes.data])
+      setAllTheses(current => [...current, ...thesisRes.data])
+      setNext(nextPage(thesisRes))
+    } catch (error) {
+      console.error('Error loading theses:', error)
+    }
+  }
+
   useEffect(() => {
     load()
     // Load current user
@@ -588,6 +602,7 @@ export default function ThesisCrudPage() {
                   </TableBody>
                 </Table>
               </TableContainer>
+              <LoadMoreButton hasMore={next !== null} onClick={loadMore} label="Load more theses" />
             </Paper>
           </Grid>
         </Grid>
@@ -720,6 +735,7 @@ export default function ThesisCrudPage() {
                       </TableBody>
                     </Table>
                   </TableContainer>
+                  <LoadMoreButton hasMore={next !== null} onClick={loadMore} label="Load more theses" />
                 </Paper>
               </Grid>
             </Grid>
@@ -41,6 +41,8 @@ import {
   InsertDriveFile
 } from '@mui/icons-material'
 import { listThesis, submitThesis, adviserReview } from '../../api/thesisService'
+import { nextPage } from '../../api/api'
+import LoadMoreButton from '../../components/LoadMoreButton'
 
 interface Thesis {
   id: number
@@ -64,6 +66,7 @@ interface Thesis {
 
 export default function ThesisWorkflowPage() {
   const [theses, setTheses] = useState<Thesis[]>([])
+  const [next, setNext] = useState<string | null>(null)
   const [selectedThesis, setSelectedThesis] = useState<Thesis | null>(null)
   const [searchQuery, setSearchQuery] = useState("")
   const [filterStatus, setFilterStatus] = useState<string>("all")
@@ -76,10 +79,11 @@ export default function ThesisWorkflowPage() {
     loadTheses()
   }, [])
 
-  async function loadTheses() {
+  // Loads the first page, or appends the page after `more`
+  async function loadTheses(more?: string | null) {
     try {
       console.log('Loading theses...')
-      const response = await listThesis()
+      const response = await listThesis(more)
       console.log('Raw API response:', response)
       console.log('Response data:', response.data)
       console.log('Response data type:', typeof response.data)
@@ -126,6 +130,11 @@ export default function ThesisWorkflowPage() {
       
       console.log('Transformed theses:', transformedTheses)
       console.log('Setting theses in state...')
+      setNext(nextPage(response))
+      if (more) {
+        setTheses(current => [...current, ...transformedTheses])
+        return
+      }
       setTheses(transformedTheses)
       
       if (transformedTheses.length > 0) {
@@ -380,6 +389,7 @@ export default function ThesisWorkflowPage() {
                   </TableBody>
                 </Table>
               </TableContainer>
+              <LoadMoreButton hasMore={next !== null} onClick={() => loadTheses(next)} label="Load more theses" />
             </Paper>
           </Grid>
 
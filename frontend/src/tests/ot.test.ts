@@ -0,0 +1,67 @@
+import { OTClient, Ops, apply, transform } from '../utils/ot';
+
+const start = (client: OTClient, text: string, version: number) =>
+  client.reset({ snapshot: { version, text }, operations: [], version });
+
+describe('OTClient', () => {
+  test('sends edits against its version and buffers until acknowledged', () => {
+    const sent: Array<{ ops: Ops; version: number }> = [];
+    const client = new OTClient(message => sent.push(message));
+    start(client, 'abc', 4);
+
+    client.applyLocal([3, 'd']);
+    client.applyLocal([4, 'e']);
+
+    expect(sent).toEqual([{ type: 'text_change', ops: [3, 'd'], version: 4 }]);
+
+    client.serverAck(5);
+
+    expect(sent[1]).toEqual({ type: 'text_change', ops: [4, 'e'], version: 5 });
+    expect(client.text).toBe('abcde');
+  });
+
+  test('transforms pending edits past operations from other editors', () => {
+    const client = new OTClient(() => {});
+    start(client, 'abc', 0);
+
+    client.applyLocal(['x', 3]);
+    client.serverOperation([3, 'y'], 1);
+    client.serverAck(2);
+
+    expect(client.text).toBe('xabcy');
+    expect(client.version).toBe(2);
+    expect(client.isSynchronized).toBe(true);
+  });
+
+  test('applies versions in order when they arrive out of order', () => {
+    const client = new OTClient(() => {});
+    start(client, '', 0);
+
+    client.serverOperation([1, 'b'], 2);
+    expect(client.text).toBe('');
+
+    client.serverOperation(['a'], 1);
+
+    expect(client.text).toBe('ab');
+    expect(client.version).toBe(2);
+  });
+
+  test('resync drops unacknowledged edits', () => {
+    const client = new OTClient(() => {});
+    start(client, 'abc', 0);
+    client.applyLocal(['x', 3]);
+
+    client.reset({ snapshot: { version: 0, text: 'abc' }, operations: [[3, '!']], version: 1 });
+
+    expect(client.text).toBe('abc!');
+    expect(client.isSynchronized).toBe(true);
+  });
+});
+
+test('transform converges', () => {
+  const a: Ops = [1, 'x', -1, 1];
+  const b: Ops = [-2, 'y', 1];
+  const [aPrime, bPrime] = transform(a, b);
+
+  expect(apply(bPrime, apply(a, 'abc'))).toBe(apply(aPrime, apply(b, 'abc')));
+});
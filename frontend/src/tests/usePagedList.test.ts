@@ -0,0 +1,41 @@
+import { renderHook, act } from '@testing-library/react';
+import { usePagedList } from '../hooks/usePagedList';
+
+jest.mock('../api/api', () => ({
+  nextPage: (response: any) => response.pagination?.next ?? null
+}));
+
+const page = (data: number[], next: string | null) => ({ data, pagination: { next, previous: null } }) as any;
+
+describe('usePagedList', () => {
+  test('loads one page at a time', async () => {
+    const fetchPage = jest.fn((next?: string | null) =>
+      Promise.resolve(next ? page([3, 4], null) : page([1, 2], 'theses/?cursor=abc')));
+    const { result } = renderHook(() => usePagedList(fetchPage));
+
+    await act(() => result.current.reload());
+
+    expect(result.current.items).toEqual([1, 2]);
+    expect(result.current.hasMore).toBe(true);
+    expect(fetchPage).toHaveBeenCalledTimes(1);
+
+    await act(() => result.current.loadMore());
+
+    expect(fetchPage).toHaveBeenLastCalledWith('theses/?cursor=abc');
+    expect(result.current.items).toEqual([1, 2, 3, 4]);
+    expect(result.current.hasMore).toBe(false);
+  });
+
+  test('reload starts over from the first page', async () => {
+    const fetchPage = jest.fn((next?: string | null) =>
+      Promise.resolve(next ? page([3], null) : page([1, 2], 'theses/?cursor=abc')));
+    const { result } = renderHook(() => usePagedList(fetchPage));
+
+    await act(() => result.current.reload());
+    await act(() => result.current.loadMore());
+    await act(() => result.current.reload());
+
+    expect(result.current.items).toEqual([1, 2]);
+    expect(result.current.hasMore).toBe(true);
+  });
+});
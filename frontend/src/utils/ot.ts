@@ -0,0 +1,227 @@
+// Operational transformation client for the document WebSocket (api/utils/ot.py on the server).
+// An operation walks the whole document: a positive number retains that many characters,
+// a negative number deletes that many and a string inserts it.
+
+export type Ops = Array<number | string>;
+
+const isRetain = (op: number | string | undefined): op is number => typeof op === 'number' && op > 0;
+const isDelete = (op: number | string | undefined): op is number => typeof op === 'number' && op < 0;
+const isInsert = (op: number | string | undefined): op is string => typeof op === 'string';
+
+class Builder {
+  ops: Ops = [];
+
+  retain(n: number) {
+    if (n <= 0) return this;
+    const last = this.ops[this.ops.length - 1];
+    if (isRetain(last)) this.ops[this.ops.length - 1] = last + n;
+    else this.ops.push(n);
+    return this;
+  }
+
+  insert(text: string) {
+    if (!text) return this;
+    const ops = this.ops;
+    const last = ops[ops.length - 1];
+    if (isInsert(last)) {
+      ops[ops.length - 1] = last + text;
+    } else if (isDelete(last)) {
+      // Keep inserts ahead of deletes so equivalent operations compare equal
+      const beforeLast = ops[ops.length - 2];
+      if (isInsert(beforeLast)) {
+        ops[ops.length - 2] = beforeLast + text;
+      } else {
+        ops.push(last);
+        ops[ops.length - 2] = text;
+      }
+    } else {
+      ops.push(text);
+    }
+    return this;
+  }
+
+  delete(n: number) {
+    n = Math.abs(n);
+    if (n === 0) return this;
+    const last = this.ops[this.ops.length - 1];
+    if (isDelete(last)) this.ops[this.ops.length - 1] = last - n;
+    else this.ops.push(-n);
+    return this;
+  }
+}
+
+export function apply(ops: Ops, text: string): string {
+  const parts: string[] = [];
+  let index = 0;
+  for (const op of ops) {
+    if (isRetain(op)) {
+      if (index + op > text.length) throw new Error('Operation is longer than the document');
+      parts.push(text.slice(index, index + op));
+      index += op;
+    } else if (isInsert(op)) {
+      parts.push(op);
+    } else {
+      index -= op;
+    }
+  }
+  if (index !== text.length) throw new Error('Operation does not cover the whole document');
+  return parts.join('');
+}
+
+export function compose(a: Ops, b: Ops): Ops {
+  const result = new Builder();
+  let i = 0, j = 0;
+  let op1 = a[i++], op2 = b[j++];
+  while (op1 !== undefined || op2 !== undefined) {
+    if (isDelete(op1)) { result.delete(op1); op1 = a[i++]; continue; }
+    if (isInsert(op2)) { result.insert(op2); op2 = b[j++]; continue; }
+    if (op1 === undefined || op2 === undefined) throw new Error('Cannot compose operations: lengths do not line up');
+
+    if (isRetain(op1) && isRetain(op2)) {
+      if (op1 > op2) { result.retain(op2); op1 = op1 - op2; op2 = b[j++]; }
+      else if (op1 === op2) { result.retain(op1); op1 = a[i++]; op2 = b[j++]; }
+      else { result.retain(op1); op2 = op2 - op1; op1 = a[i++]; }
+    } else if (isInsert(op1) && isDelete(op2)) {
+      if (op1.length > -op2) { op1 = op1.slice(-op2); op2 = b[j++]; }
+      else if (op1.length === -op2) { op1 = a[i++]; op2 = b[j++]; }
+      else { op2 = op2 + op1.length; op1 = a[i++]; }
+    } else if (isInsert(op1) && isRetain(op2)) {
+      if (op1.length > op2) { result.insert(op1.slice(0, op2)); op1 = op1.slice(op2); op2 = b[j++]; }
+      else if (op1.length === op2) { result.insert(op1); op1 = a[i++]; op2 = b[j++]; }
+      else { result.insert(op1); op2 = op2 - op1.length; op1 = a[i++]; }
+    } else {
+      const retain = op1 as number, del = op2 as number;
+      if (retain > -del) { result.delete(del); op1 = retain + del; op2 = b[j++]; }
+      else if (retain === -del) { result.delete(del); op1 = a[i++]; op2 = b[j++]; }
+      else { result.delete(retain); op2 = del + retain; op1 = a[i++]; }
+    }
+  }
+  return result.ops;
+}
+
+// Transform concurrent operations into [a', b'] so that a then b' equals b then a'.
+// Inserts at the same position from `a` land first, as on the server.
+export function transform(a: Ops, b: Ops): [Ops, Ops] {
+  const aPrime = new Builder(), bPrime = new Builder();
+  let i = 0, j = 0;
+  let op1 = a[i++], op2 = b[j++];
+  while (op1 !== undefined || op2 !== undefined) {
+    if (isInsert(op1)) { aPrime.insert(op1); bPrime.retain(op1.length); op1 = a[i++]; continue; }
+    if (isInsert(op2)) { aPrime.retain(op2.length); bPrime.insert(op2); op2 = b[j++]; continue; }
+    if (op1 === undefined || op2 === undefined) throw new Error('Cannot transform operations: one is too short');
+
+    let length: number;
+    if (isRetain(op1) && isRetain(op2)) {
+      if (op1 > op2) { length = op2; op1 = op1 - op2; op2 = b[j++]; }
+      else if (op1 === op2) { length = op2; op1 = a[i++]; op2 = b[j++]; }
+      else { length = op1; op2 = op2 - op1; op1 = a[i++]; }
+      aPrime.retain(length);
+      bPrime.retain(length);
+    } else if (isDelete(op1) && isDelete(op2)) {
+      // Both sides deleted the same text; neither needs to delete it again
+      if (-op1 > -op2) { op1 = op1 - op2; op2 = b[j++]; }
+      else if (op1 === op2) { op1 = a[i++]; op2 = b[j++]; }
+      else { op2 = op2 - op1; op1 = a[i++]; }
+    } else if (isDelete(op1) && isRetain(op2)) {
+      if (-op1 > op2) { length = op2; op1 = op1 + op2; op2 = b[j++]; }
+      else if (-op1 === op2) { length = op2; op1 = a[i++]; op2 = b[j++]; }
+      else { length = -op1; op2 = op2 + op1; op1 = a[i++]; }
+      aPrime.delete(length);
+    } else {
+      const retain = op1 as number, del = op2 as number;
+      if (retain > -del) { length = -del; op1 = retain + del; op2 = b[j++]; }
+      else if (retain === -del) { length = retain; op1 = a[i++]; op2 = b[j++]; }
+      else { length = retain; op2 = del + retain; op1 = a[i++]; }
+      bPrime.delete(length);
+    }
+  }
+  return [aPrime.ops, bPrime.ops];
+}
+
+export interface CatchUp {
+  snapshot: { version: number; text: string };
+  operations: Ops[];
+  version: number;
+}
+
+type ServerEvent = { kind: 'ack' } | { kind: 'operation'; ops: Ops };
+
+// The ot.js client state machine. At most one operation is in flight, sent against the
+// last server version this client has seen; later local edits are buffered until it is
+// acknowledged. Versions can arrive out of order when editors are spread over several
+// server workers, so server events are applied strictly in version order.
+export class OTClient {
+  text = '';
+  version = 0;
+  private outstanding: Ops | null = null;
+  private buffer: Ops | null = null;
+  private pending = new Map<number, ServerEvent>();
+
+  constructor(
+    private send: (message: { type: 'text_change'; ops: Ops; version: number }) => void,
+    private onChange: (text: string, version: number) => void = () => {}
+  ) {}
+
+  // Start over from a document_state or resync message; unacknowledged local edits are dropped
+  reset({ snapshot, operations, version }: CatchUp) {
+    this.text = operations.reduce((text, ops) => apply(ops, text), snapshot.text);
+    this.version = version;
+    this.outstanding = this.buffer = null;
+    this.pending.forEach((_, pendingVersion) => {
+      if (pendingVersion <= version) this.pending.delete(pendingVersion);
+    });
+    this.onChange(this.text, this.version);
+    this.drain();
+  }
+
+  applyLocal(ops: Ops) {
+    this.text = apply(ops, this.text);
+    if (this.outstanding === null) {
+      this.outstanding = ops;
+      this.send({ type: 'text_change', ops, version: this.version });
+    } else {
+      this.buffer = this.buffer === null ? ops : compose(this.buffer, ops);
+    }
+    this.onChange(this.text, this.version);
+  }
+
+  serverAck(version: number) {
+    this.receive(version, { kind: 'ack' });
+  }
+
+  serverOperation(ops: Ops, version: number) {
+    this.receive(version, { kind: 'operation', ops });
+  }
+
+  get isSynchronized() {
+    return this.outstanding === null && this.pending.size === 0;
+  }
+
+  private receive(version: number, event: ServerEvent) {
+    if (version <= this.version) return;
+    this.pending.set(version, event);
+    this.drain();
+  }
+
+  private drain() {
+    let event = this.pending.get(this.version + 1);
+    while (event) {
+      this.pending.delete(this.version + 1);
+      this.version += 1;
+      if (event.kind === 'ack') {
+        this.outstanding = this.buffer;
+        this.buffer = null;
+        if (this.outstanding !== null) {
+          this.send({ type: 'text_change', ops: this.outstanding, version: this.version });
+        }
+      } else {
+        let ops = event.ops;
+        if (this.outstanding !== null) [this.outstanding, ops] = transform(this.outstanding, ops);
+        if (this.buffer !== null) [this.buffer, ops] = transform(this.buffer, ops);
+        this.text = apply(ops, this.text);
+        this.onChange(this.text, this.version);
+      }
+      event = this.pending.get(this.version + 1);
+    }
+  }
+}